@@ -0,0 +1,77 @@
+"""
+    background_search.py
+
+    Description:
+    Runs minimax.get_next_move on a background thread, so a GUI can keep handling
+    events while the AI thinks. The GUI starts a BackgroundSearch, waits for done()
+    (by polling it or by being called back through on_done) and reads the move
+    from result once it is. stats is filled in by the search as it goes (depth
+    finished, nodes visited and best move so far), so it can be shown while
+    waiting. cancel() tells the search to stop at its next check and
+    the result is thrown away.
+
+    The search holds the GIL while it runs, but Python hands it to the GUI thread
+    every few milliseconds, which is plenty to keep a window responsive
+"""
+
+import threading
+import time
+import minimax
+
+
+class BackgroundSearch:
+    """One get_next_move call running on its own thread"""
+
+    __slots__ = ('player', 'heuristic_method', 'stats', 'result', 'start_time', 'end_time', 'stop', 'finished',
+                 'on_done', 'thread')
+
+    # Starts searching board for player's move. Any other get_next_move arguments
+    # can be given as keywords. board is copied, so it can change while the search
+    # runs. on_done is called on the search thread once the search finishes, unless
+    # it was cancelled. It must not touch a GUI toolkit that is not thread safe,
+    # such as Tk, which should poll done() from its own thread instead
+    def __init__(self, board, player, heuristic_method, on_done=None, **search_arguments):
+        self.player = player
+        self.heuristic_method = heuristic_method
+        self.stats = dict([("depth", 0), ("nodes", 0), ("move", ())])
+        self.result = None
+        self.start_time = time.perf_counter()
+        self.end_time = None
+        self.stop = threading.Event()
+        self.finished = threading.Event()
+        self.on_done = on_done
+
+        # Daemon, so a search that is still running never keeps the program open
+        self.thread = threading.Thread(target=self.run, args=([row[:] for row in board], search_arguments),
+                                       daemon=True)
+        self.thread.start()
+
+    def run(self, board, search_arguments):
+        try:
+            self.result = minimax.get_next_move(board, self.player, self.heuristic_method, stats=self.stats,
+                                                stop=self.stop, **search_arguments)
+        finally:
+            self.end_time = time.perf_counter()
+            self.finished.set()
+
+        if self.on_done is not None and not self.stop.is_set():
+            self.on_done()
+
+    # Whether the search has finished and was not cancelled
+    def done(self):
+        return self.finished.is_set() and not self.stop.is_set()
+
+    def cancelled(self):
+        return self.stop.is_set()
+
+    # Stops the search. It finishes on its own thread shortly after, and its result is never used
+    def cancel(self):
+        self.stop.set()
+
+    # Waits for the search thread to finish, for at most timeout seconds if it is given
+    def join(self, timeout=None):
+        self.thread.join(timeout)
+
+    # Seconds the search has been running for, or ran for if it has finished
+    def elapsed(self):
+        return (self.end_time if self.end_time is not None else time.perf_counter()) - self.start_time
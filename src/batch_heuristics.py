@@ -0,0 +1,114 @@
+"""
+    batch_heuristics.py
+
+    Description:
+    NumPy versions of the heuristics in heurisitcs.py that score many boards at
+    once. Boards are stacked into an (N, 8, 8) int8 array from the point of view of
+    the player being scored, where 1 is one of their pieces, -1 an opponent piece
+    and 0 an empty square (see encode_board). Each function returns an array of N
+    scores that match the scalar heuristic exactly.
+
+    Requires NumPy
+"""
+
+import numpy as np
+
+PLAYER = 1
+OPPONENT = -1
+EMPTY = 0
+
+
+# Encodes a single board from player's point of view
+def encode_board(board, player):
+    encoded = np.zeros((8, 8), dtype=np.int8)
+
+    for y in range(0, 8, 1):
+        for x in range(0, 8, 1):
+            if board[y][x] == player:
+                encoded[y, x] = PLAYER
+            elif board[y][x] != ' ':
+                encoded[y, x] = OPPONENT
+
+    return encoded
+
+
+# Encodes a list of boards from player's point of view into an (N, 8, 8) array
+def encode_boards(boards, player):
+    encoded = np.zeros((len(boards), 8, 8), dtype=np.int8)
+    for index, board in enumerate(boards):
+        encoded[index] = encode_board(board, player)
+    return encoded
+
+
+# Returns count copies of an encoded board, stacked into a (count, 8, 8) array
+def repeat_board(encoded, count):
+    return np.repeat(encoded[np.newaxis], count, axis=0)
+
+
+# Counts the true values on each board of an (N, 8, 8) or (N, a, b) boolean array
+def _count(mask):
+    return mask.sum(axis=(1, 2), dtype=np.int32)
+
+
+def simple_heuristic(boards):
+    return 5 * (_count(boards == PLAYER) - _count(boards == OPPONENT))
+
+
+def defensive_heuristic(boards):
+    mine = boards == PLAYER
+    counter = simple_heuristic(boards)
+
+    # Discourage single spaces in between pieces, in rows and then columns
+    counter -= _count(mine[:, :, :-2] & mine[:, :, 2:])
+    counter -= _count(mine[:, :-2, :] & mine[:, 2:, :])
+
+    # Discourage pieces right next to each other, in rows and then columns
+    counter -= _count(mine[:, :, :-1] & mine[:, :, 1:])
+    counter -= _count(mine[:, :-1, :] & mine[:, 1:, :])
+
+    # Encourage edges. The left and right edges are counted once for each of 7 columns in the scalar version
+    counter += 7 * (mine[:, :, 0].sum(axis=1, dtype=np.int32) + mine[:, :, 7].sum(axis=1, dtype=np.int32))
+    counter += mine[:, 0, :].sum(axis=1, dtype=np.int32) + mine[:, 7, :].sum(axis=1, dtype=np.int32)
+
+    # Encourage diagonals
+    counter += _count(mine[:, :-1, :-1] & mine[:, 1:, 1:])
+
+    return counter
+
+
+def aggressive_heuristic(boards):
+    mine = boards == PLAYER
+    theirs = boards == OPPONENT
+    base_counter = defensive_heuristic(boards)
+    simple_counter = simple_heuristic(boards)
+
+    # Higher counter for taking pieces encourages trades
+    counter = 8 * _count(mine) - 5 * _count(theirs)
+
+    # Encourage being next to the opponent (right, left, down and up)
+    counter += _count(mine[:, :, :-1] & theirs[:, :, 1:])
+    counter += _count(mine[:, :, 1:] & theirs[:, :, :-1])
+    counter += _count(mine[:, :-1, :] & theirs[:, 1:, :])
+    counter += _count(mine[:, 1:, :] & theirs[:, :-1, :])
+
+    return np.where(base_counter > counter, base_counter,
+                    np.where(base_counter < counter, counter, simple_counter))
+
+
+def stay_in_the_center_heuristic(boards):
+    return simple_heuristic(boards) + _count(boards[:, 2:6, 2:6] == PLAYER)
+
+
+# Batch versions of the registered heuristics (see heurisitcs.py), by name
+batch_heuristics = dict([("simple", simple_heuristic),
+                         ("aggressive", aggressive_heuristic),
+                         ("defensive", defensive_heuristic),
+                         ("stay_in_center", stay_in_the_center_heuristic)])
+
+
+# Returns the batch version of a heuristic
+def get_batch_heuristic(name):
+    if name not in batch_heuristics:
+        raise ValueError('Heuristic {0!r} has no batch version, expected one of {1}'.format(
+            name, ', '.join(batch_heuristics)))
+    return batch_heuristics[name]
@@ -0,0 +1,328 @@
+"""
+    bench.py
+
+    Description:
+    Benchmark suite for the move generation, captures and search. It has three parts:
+
+    perft: counts every line of play to a fixed depth from each position in the
+    corpus, along with the pieces captured by the last move. The counts are
+    compared with known good values, so a change to the move generation or
+    captures that changes the game shows up as a wrong count.
+
+    search: searches every corpus position with each heuristic to a fixed depth
+    and records the nodes visited, nodes per second and the time it took to finish
+    each depth. Each perft and search is repeated and the fastest run is kept, as
+    the slower runs only add noise from whatever else the machine was doing.
+
+    alpha_beta: the same searches again with plain alpha-beta, without principal
+    variation search or aspiration windows (see minimax.get_next_move), printed
+    next to the search results so the nodes and time to depth they save show up.
+
+    compare: reads two result files written by run and flags regressions, meaning
+    nodes per second or time to depth worse by more than the threshold, perft
+    counts that are wrong and searches that visited a different number of nodes.
+
+    Usage:
+    > `python3 bench.py run [--depth 3] [--perft-depth 2] [--repeat 3] [--no-alpha-beta] [--out results.json]`
+    > `python3 bench.py compare old.json new.json [--threshold 0.1]`
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+import time
+import heurisitcs
+import minimax
+import movegen
+import transposition
+from bench_positions import CORPUS, corpus_board
+from position import Position
+
+RESULTS_VERSION = 1
+
+# Known good perft results as {position name: [(nodes, captures) at depth 1, 2, 3]}. Checked
+# against the original func.make_move and func.is_valid_move, trying every move on the board
+PERFT_EXPECTED = dict([
+    ("start", [(48, 0), (2136, 0), (112874, 128)]),
+    ("opening_1", [(72, 0), (3508, 36), (236069, 1268)]),
+    ("opening_2", [(46, 2), (2871, 97), (138013, 5993)]),
+    ("middlegame_1", [(72, 2), (3164, 37), (217375, 5444)]),
+    ("middlegame_2", [(47, 1), (2378, 31), (116348, 3230)]),
+    ("middlegame_3", [(62, 4), (3673, 200), (222714, 18773)]),
+    ("endgame_1", [(36, 0), (1306, 11), (44618, 439)]),
+    ("endgame_2", [(46, 0), (1064, 2), (47292, 54)]),
+])
+
+DEFAULT_DEPTH = 3
+DEFAULT_PERFT_DEPTH = 2
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.1
+
+# The heuristics benchmarked. random is left out as its scores and so its searches are not repeatable
+HEURISTICS = [info.name for info in heurisitcs.registered_heuristics() if info.name != 'random']
+
+
+# Counts the lines of play depth moves deep from position with player to move,
+# and the pieces captured by the last move of each. Returns (nodes, captures)
+def perft(position, player, depth):
+    moves = movegen.legal_moves(position.board, player)
+    if depth == 1:
+        captures = 0
+        for move in moves:
+            captures += len(position.make(player, move))
+            position.unmake()
+        return len(moves), captures
+
+    opponent = 'B' if player == 'W' else 'W'
+    nodes = 0
+    captures = 0
+    for move in moves:
+        position.make(player, move)
+        move_nodes, move_captures = perft(position, opponent, depth - 1)
+        position.unmake()
+        nodes += move_nodes
+        captures += move_captures
+    return nodes, captures
+
+
+# Runs perft on every corpus position to each depth up to max_depth, keeping the fastest of repeat runs
+def run_perft(max_depth, repeat=DEFAULT_REPEAT):
+    results = []
+    for name, category, player, rows in CORPUS:
+        for depth in range(1, max_depth + 1, 1):
+            elapsed = None
+            for _ in range(0, repeat, 1):
+                position = Position(corpus_board(rows))
+                start = time.perf_counter()
+                nodes, captures = perft(position, player, depth)
+                run_time = time.perf_counter() - start
+                if elapsed is None or run_time < elapsed:
+                    elapsed = run_time
+
+            expected = PERFT_EXPECTED[name][depth - 1] if depth <= len(PERFT_EXPECTED.get(name, [])) else None
+            results.append(dict([("position", name), ("depth", depth), ("nodes", nodes), ("captures", captures),
+                                 ("seconds", elapsed), ("nodes_per_second", nodes / elapsed if elapsed else 0),
+                                 ("correct", None if expected is None else [nodes, captures] == list(expected))]))
+    return results
+
+
+# Searches every corpus position with each heuristic to depth, keeping the fastest of repeat runs.
+# pvs and aspiration are passed on to minimax.get_next_move
+def run_search(depth, repeat=DEFAULT_REPEAT, pvs=True, aspiration=minimax.DEFAULT_ASPIRATION):
+    results = []
+    for heuristic_method in HEURISTICS:
+        for name, category, player, rows in CORPUS:
+            elapsed = None
+            for _ in range(0, repeat, 1):
+                run_stats = dict()
+                start = time.perf_counter()
+                move = minimax.get_next_move(corpus_board(rows), player, heuristic_method, max_depth=depth,
+                                             table=transposition.TranspositionTable(minimax.WORKER_TABLE_SIZE),
+                                             stats=run_stats, pvs=pvs, aspiration=aspiration)
+                run_time = time.perf_counter() - start
+                if elapsed is None or run_time < elapsed:
+                    elapsed = run_time
+                    stats = run_stats
+
+            results.append(dict([("heuristic", heuristic_method), ("position", name), ("category", category),
+                                 ("depth", stats["depth"]), ("nodes", stats["nodes"]), ("seconds", elapsed),
+                                 ("nodes_per_second", stats["nodes"] / elapsed if elapsed else 0),
+                                 ("depth_times", stats["depth_times"]), ("move", list(move))]))
+    return results
+
+
+# Totals of the search results for each heuristic, and for each heuristic and category
+def summarize(search_results):
+    summary = dict()
+    for result in search_results:
+        for key in (result["heuristic"], result["heuristic"] + '/' + result["category"]):
+            total = summary.setdefault(key, dict([("nodes", 0), ("seconds", 0.0)]))
+            total["nodes"] += result["nodes"]
+            total["seconds"] += result["seconds"]
+
+    for total in summary.values():
+        total["nodes_per_second"] = total["nodes"] / total["seconds"] if total["seconds"] else 0
+    return summary
+
+
+# Runs every benchmark. Plain alpha-beta is left out with alpha_beta=False, as it doubles the time the searches take
+def run(depth, perft_depth, repeat=DEFAULT_REPEAT, alpha_beta=True):
+    perft_results = run_perft(perft_depth, repeat)
+    search_results = run_search(depth, repeat)
+    alpha_beta_results = run_search(depth, repeat, pvs=False, aspiration=None) if alpha_beta else []
+    return dict([("version", RESULTS_VERSION),
+                 ("time", datetime.datetime.now().isoformat()),
+                 ("python", platform.python_version()),
+                 ("platform", platform.platform()),
+                 ("depth", depth),
+                 ("perft_depth", perft_depth),
+                 ("repeat", repeat),
+                 ("perft", perft_results),
+                 ("search", search_results),
+                 ("alpha_beta", alpha_beta_results),
+                 ("summary", summarize(search_results))])
+
+
+def print_results(results):
+    print('{0:<14} {1:>5} {2:>10} {3:>9} {4:>12} {5:>8}'.format('perft', 'depth', 'nodes', 'captures',
+                                                                 'nodes/s', 'correct'))
+    for result in results["perft"]:
+        correct = '-' if result["correct"] is None else ('yes' if result["correct"] else 'NO')
+        print('{0:<14} {1:>5} {2:>10} {3:>9} {4:>12.0f} {5:>8}'.format(
+            result["position"], result["depth"], result["nodes"], result["captures"], result["nodes_per_second"],
+            correct))
+
+    print('\n{0:<16} {1:<14} {2:>9} {3:>10} {4:>10}  {5}'.format('heuristic', 'position', 'nodes', 'nodes/s',
+                                                                  'seconds', 'seconds to each depth'))
+    for result in results["search"]:
+        print('{0:<16} {1:<14} {2:>9} {3:>10.0f} {4:>10.3f}  {5}'.format(
+            result["heuristic"], result["position"], result["nodes"], result["nodes_per_second"], result["seconds"],
+            ' '.join('{0:.3f}'.format(seconds) for seconds in result["depth_times"])))
+
+    if results.get("alpha_beta"):
+        print_alpha_beta(results["search"], results["alpha_beta"])
+
+    print('\n{0:<28} {1:>10} {2:>10} {3:>10}'.format('summary', 'nodes', 'seconds', 'nodes/s'))
+    for key, total in sorted(results["summary"].items()):
+        print('{0:<28} {1:>10} {2:>10.3f} {3:>10.0f}'.format(key, total["nodes"], total["seconds"],
+                                                             total["nodes_per_second"]))
+
+
+# Prints the nodes and time to the deepest depth of each search next to those of plain alpha-beta
+def print_alpha_beta(search_results, alpha_beta_results):
+    print('\n{0:<16} {1:<14} {2:>10} {3:>9} {4:>8} {5:>10} {6:>9} {7:>8}'.format(
+        'vs alpha-beta', 'position', 'ab nodes', 'nodes', 'change', 'ab secs', 'seconds', 'change'))
+    alpha_beta = dict(((result["heuristic"], result["position"]), result) for result in alpha_beta_results)
+    totals = dict()
+    for result in search_results:
+        before = alpha_beta.get((result["heuristic"], result["position"]))
+        if before is None or before["depth"] != result["depth"] or not before["nodes"]:
+            continue
+        before_seconds = before["depth_times"][-1]
+        seconds = result["depth_times"][-1]
+        print('{0:<16} {1:<14} {2:>10} {3:>9} {4:>+8.1%} {5:>10.3f} {6:>9.3f} {7:>+8.1%}'.format(
+            result["heuristic"], result["position"], before["nodes"], result["nodes"],
+            result["nodes"] / before["nodes"] - 1, before_seconds, seconds, seconds / before_seconds - 1))
+
+        total = totals.setdefault(result["heuristic"], [0, 0, 0.0, 0.0])
+        total[0] += before["nodes"]
+        total[1] += result["nodes"]
+        total[2] += before_seconds
+        total[3] += seconds
+
+    for heuristic, (before_nodes, nodes, before_seconds, seconds) in sorted(totals.items()):
+        print('{0:<16} {1:<14} {2:>10} {3:>9} {4:>+8.1%} {5:>10.3f} {6:>9.3f} {7:>+8.1%}'.format(
+            heuristic, 'total', before_nodes, nodes, nodes / before_nodes - 1, before_seconds, seconds,
+            seconds / before_seconds - 1))
+
+
+# Compares two result files. Returns a list of (kind, description) for every
+# regression or difference found, where kind is 'regression', 'wrong' or 'changed'
+def compare(old, new, threshold=DEFAULT_THRESHOLD):
+    findings = []
+
+    for result in new["perft"]:
+        if result["correct"] is False:
+            findings.append(('wrong', 'perft {0} depth {1} gives {2} nodes and {3} captures'.format(
+                result["position"], result["depth"], result["nodes"], result["captures"])))
+
+    old_perft = dict(((result["position"], result["depth"]), result) for result in old["perft"])
+    for result in new["perft"]:
+        before = old_perft.get((result["position"], result["depth"]))
+        if before is None:
+            continue
+        if (before["nodes"], before["captures"]) != (result["nodes"], result["captures"]):
+            findings.append(('wrong', 'perft {0} depth {1} changed from {2}/{3} to {4}/{5} nodes/captures'.format(
+                result["position"], result["depth"], before["nodes"], before["captures"], result["nodes"],
+                result["captures"])))
+        elif result["nodes_per_second"] < before["nodes_per_second"] * (1 - threshold):
+            findings.append(('regression', 'perft {0} depth {1}: {2:.0f} -> {3:.0f} nodes/s'.format(
+                result["position"], result["depth"], before["nodes_per_second"], result["nodes_per_second"])))
+
+    old_search = dict(((result["heuristic"], result["position"]), result) for result in old["search"])
+    for result in new["search"]:
+        before = old_search.get((result["heuristic"], result["position"]))
+        if before is None or before["depth"] != result["depth"]:
+            continue
+        label = '{0} on {1}'.format(result["heuristic"], result["position"])
+
+        if before["nodes"] != result["nodes"]:
+            findings.append(('changed', '{0}: {1} -> {2} nodes'.format(label, before["nodes"], result["nodes"])))
+        if result["nodes_per_second"] < before["nodes_per_second"] * (1 - threshold):
+            findings.append(('regression', '{0}: {1:.0f} -> {2:.0f} nodes/s'.format(
+                label, before["nodes_per_second"], result["nodes_per_second"])))
+        if result["seconds"] > before["seconds"] * (1 + threshold):
+            findings.append(('regression', '{0}: {1:.3f} -> {2:.3f} seconds to depth {3}'.format(
+                label, before["seconds"], result["seconds"], result["depth"])))
+
+    return findings
+
+
+# The nodes per second of each summary total in two result files, as a list of
+# (heuristic or heuristic/category, old nodes per second, new nodes per second)
+def compare_summaries(old, new):
+    changes = []
+    old_summary = old.get("summary", dict())
+    for key, total in sorted(new.get("summary", dict()).items()):
+        before = old_summary.get(key)
+        if before is not None and before["nodes_per_second"]:
+            changes.append((key, before["nodes_per_second"], total["nodes_per_second"]))
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the move generation and search')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH,
+                            help='search depth (default {0})'.format(DEFAULT_DEPTH))
+    run_parser.add_argument('--perft-depth', type=int, default=DEFAULT_PERFT_DEPTH,
+                            help='perft depth (default {0})'.format(DEFAULT_PERFT_DEPTH))
+    run_parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                            help='runs of each benchmark, the fastest is kept (default {0})'.format(DEFAULT_REPEAT))
+    run_parser.add_argument('--no-alpha-beta', action='store_true',
+                            help='do not repeat the searches with plain alpha-beta to compare against')
+    run_parser.add_argument('--out', help='file to write the results to as JSON')
+
+    compare_parser = commands.add_parser('compare', help='compare two result files')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help='fraction slower that counts as a regression (default {0})'.format(
+                                    DEFAULT_THRESHOLD))
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run(args.depth, args.perft_depth, args.repeat, not args.no_alpha_beta)
+        print_results(results)
+        if args.out:
+            with open(args.out, 'w') as out_file:
+                json.dump(results, out_file, indent=1)
+
+        # Wrong perft counts mean the rules changed, so fail
+        if any(result["correct"] is False for result in results["perft"]):
+            sys.exit(1)
+    else:
+        with open(args.old) as old_file:
+            old = json.load(old_file)
+        with open(args.new) as new_file:
+            new = json.load(new_file)
+
+        for key, before, after in compare_summaries(old, new):
+            print('{0:<28} {1:>10.0f} -> {2:>10.0f} nodes/s ({3:+.1%})'.format(key, before, after, after / before - 1))
+
+        findings = compare(old, new, args.threshold)
+        for kind, description in findings:
+            print('{0:<10} {1}'.format(kind.upper(), description))
+        if not findings:
+            print('No regressions')
+
+        if any(kind in ('regression', 'wrong') for kind, _ in findings):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
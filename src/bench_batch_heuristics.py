@@ -0,0 +1,70 @@
+"""
+    bench_batch_heuristics.py
+
+    Description:
+    Compares the heuristics in heurisitcs.py with their NumPy versions in
+    batch_heuristics.py. Random boards are scored one at a time with the scalar
+    heuristic (the original loops over every square) and all at once with the
+    batch heuristic, for several batch sizes. The single pass version the
+    heuristics are registered with (see features.py) is scored one at a time too,
+    for reference. The boards scored per second by each, the speedup of the batch
+    heuristic over the scalar one and whether every score matched are printed.
+    Encoding the boards is not counted, as the search encodes a board once and
+    updates copies of it (see minimax.evaluate_frontier).
+
+    Requires NumPy
+
+    Usage:
+    > `python3 bench_batch_heuristics.py [seed]`
+"""
+
+import sys
+import time
+import batch_heuristics
+import heurisitcs
+from bench_positions import build_boards
+
+BATCH_SIZES = [1, 64, 1024, 65536]
+PLAYER = 'W'
+
+# The original scalar version of each heuristic with a batch version. The registered
+# ones are the single pass versions in features.py
+SCALAR_HEURISTICS = dict([("simple", heurisitcs.simple_heuristic),
+                          ("aggressive", heurisitcs.aggressive_heuristic),
+                          ("defensive", heurisitcs.defensive_heuristic),
+                          ("stay_in_center", heurisitcs.stay_in_the_center_heuristic)])
+
+
+def main():
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 5368
+    boards = build_boards(max(BATCH_SIZES), seed)
+    encoded = batch_heuristics.encode_boards(boards, PLAYER)
+
+    print('{0:>15} {1:>7} {2:>14} {3:>14} {4:>14} {5:>8} {6:>6}'.format('heuristic', 'boards', 'scalar/s',
+                                                                        'single pass/s', 'batch/s', 'speedup',
+                                                                        'same'))
+    for name in batch_heuristics.batch_heuristics:
+        function = SCALAR_HEURISTICS[name]
+        single_pass_function = heurisitcs.get_heuristic(name).function
+        batch_function = batch_heuristics.get_batch_heuristic(name)
+
+        for size in BATCH_SIZES:
+            start = time.perf_counter()
+            scalar_scores = [function(board, PLAYER) for board in boards[:size]]
+            scalar_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            single_pass_scores = [single_pass_function(board, PLAYER) for board in boards[:size]]
+            single_pass_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batch_scores = batch_function(encoded[:size]).tolist()
+            batch_time = time.perf_counter() - start
+
+            print('{0:>15} {1:>7} {2:>14.0f} {3:>14.0f} {4:>14.0f} {5:>8.1f} {6:>6}'.format(
+                name, size, size / scalar_time, size / single_pass_time, size / batch_time, scalar_time / batch_time,
+                'yes' if scalar_scores == batch_scores == single_pass_scores else 'NO'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+    bench_line_tables.py
+
+    Description:
+    Measures the lookup tables in line_tables.py. Prints how long building the
+    tables from scratch and loading them from the cache file take, then scores
+    random boards with the heuristics in heurisitcs.py and with their versions
+    that read the features from the tables (see features.py), printing the boards
+    scored per second by each and whether every score matched.
+
+    Usage:
+    > `python3 bench_line_tables.py [boards]`
+"""
+
+import os
+import sys
+import tempfile
+import time
+import features
+import heurisitcs
+import line_tables
+from bench_positions import build_boards
+
+HEURISTICS = [('simple', heurisitcs.simple_heuristic, features.simple_heuristic),
+              ('defensive', heurisitcs.defensive_heuristic, features.defensive_heuristic),
+              ('aggressive', heurisitcs.aggressive_heuristic, features.aggressive_heuristic),
+              ('center', heurisitcs.stay_in_the_center_heuristic, features.stay_in_the_center_heuristic)]
+
+
+# Prints how long building, saving and loading the tables take
+def time_start_up():
+    start = time.perf_counter()
+    tables = line_tables.build_tables()
+    build_time = time.perf_counter() - start
+
+    handle, path = tempfile.mkstemp(suffix='.bin')
+    os.close(handle)
+    try:
+        start = time.perf_counter()
+        line_tables.save_tables(tables, path)
+        save_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = line_tables.load_tables(path)
+        load_time = time.perf_counter() - start
+    finally:
+        os.remove(path)
+
+    print('Building the tables: {0:.1f} ms'.format(build_time * 1000))
+    print('Saving the tables:   {0:.1f} ms'.format(save_time * 1000))
+    print('Loading the tables:  {0:.1f} ms ({1})'.format(load_time * 1000,
+                                                        'same' if loaded == tables else 'DIFFERENT'))
+
+
+# Prints the boards per second scored by each heuristic and its table version
+def time_evaluation(boards):
+    print('{0:>12} {1:>12} {2:>12} {3:>8} {4:>6}'.format('heuristic', 'scan/s', 'tables/s', 'speedup', 'same'))
+
+    for name, function, table_function in HEURISTICS:
+        start = time.perf_counter()
+        scores = [function(board, player) for board in boards for player in ('W', 'B')]
+        scan_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        table_scores = [table_function(board, player) for board in boards for player in ('W', 'B')]
+        table_time = time.perf_counter() - start
+
+        count = 2 * len(boards)
+        print('{0:>12} {1:>12.0f} {2:>12.0f} {3:>8.1f} {4:>6}'.format(
+            name, count / scan_time, count / table_time, scan_time / table_time,
+            'yes' if scores == table_scores else 'NO'))
+
+
+def main():
+    boards = build_boards(int(sys.argv[1]) if len(sys.argv) > 1 else 20000, 5368)
+    time_start_up()
+    time_evaluation(boards)
+
+
+if __name__ == '__main__':
+    main()
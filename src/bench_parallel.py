@@ -0,0 +1,56 @@
+"""
+    bench_parallel.py
+
+    Description:
+    Measures how a parallel search (minimax.get_next_move with workers=...) scales
+    with the number of worker processes. A fixed set of positions is searched to a
+    fixed depth in one process and then with each worker count. The time, speedup
+    over one process and whether the same moves were chosen as with one worker
+    (the parallel search should not depend on the worker count) are printed.
+
+    Usage:
+    > `python3 bench_parallel.py [depth] [positions]`
+"""
+
+import sys
+import time
+import minimax
+import transposition
+from bench_positions import build_positions
+
+WORKER_COUNTS = [1, 2, 4, 8, 16]
+HEURISTIC = 'defensive'
+
+
+# Searches every position and returns the chosen moves and the time it took
+def run(positions, depth, workers):
+    start = time.perf_counter()
+    moves = [minimax.get_next_move(board, player, HEURISTIC, max_depth=depth, workers=workers,
+                                   table=transposition.TranspositionTable(minimax.WORKER_TABLE_SIZE))
+             for board, player in positions]
+    return moves, time.perf_counter() - start
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    positions = build_positions(int(sys.argv[2]) if len(sys.argv) > 2 else 6)
+
+    serial_moves, serial_time = run(positions, depth, None)
+    print('{0:>8} {1:>10} {2:>8} {3:>10}'.format('workers', 'seconds', 'speedup', 'same move'))
+    print('{0:>8} {1:>10.2f} {2:>8.2f} {3:>10}'.format('serial', serial_time, 1.0, '-'))
+
+    first_moves = None
+    for workers in WORKER_COUNTS:
+        # Start the pool before timing so process start up is not counted
+        minimax.get_worker_pool(workers)
+        moves, elapsed = run(positions, depth, workers)
+        if first_moves is None:
+            first_moves = moves
+        print('{0:>8} {1:>10.2f} {2:>8.2f} {3:>10}'.format(workers, elapsed, serial_time / elapsed,
+                                                           'yes' if moves == first_moves else 'no'))
+
+    minimax.shutdown_worker_pools()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+    bench_positions.py
+
+    Description:
+    The positions the benchmark scripts measure on: a fixed corpus of named
+    positions (see bench.py), random boards with pieces scattered over them and
+    positions reached by playing random moves from the start. Everything is built
+    from a fixed seed, so each run measures the same positions
+"""
+
+import random
+import func
+import movegen
+
+# Fixed positions to benchmark, as (name, category, player to move, rows)
+CORPUS = [
+    ("start", "opening", "W",
+     ["BBBBBBBB", "        ", "        ", "        ", "        ", "        ", "        ", "WWWWWWWW"]),
+    ("opening_1", "opening", "W",
+     ["BBBBBB  ", "      B ", "      B ", "W       ", "        ", " W      ", "     W  ", "  WWW WW"]),
+    ("opening_2", "opening", "W",
+     ["B BBBB  ", "       B", "        ", "        ", " W B    ", "  B     ", "    W   ", "WW WWWW "]),
+    ("middlegame_1", "middlegame", "W",
+     ["B  BBBB ", "WBB     ", "      W ", "  W     ", "      B ", "     W  ", " W  W   ", "   W W  "]),
+    ("middlegame_2", "middlegame", "W",
+     [" B  B B ", "     BW ", "    W   ", " B      ", "        ", "  B BW  ", "  B  W  ", "WW   WW "]),
+    ("middlegame_3", "middlegame", "B",
+     ["B  B    ", " W   W  ", "  B  B  ", " W  W   ", "B  W  B ", "  B   W ", " W  B   ", "W       "]),
+    ("endgame_1", "endgame", "W",
+     ["   B    ", "        ", " W   B  ", "        ", "    W   ", " B      ", "      W ", "        "]),
+    ("endgame_2", "endgame", "B",
+     ["B      B", "        ", "   W    ", "        ", "  B  B  ", "        ", "     W  ", "        "]),
+]
+
+# Builds a board from a corpus entry's rows
+def corpus_board(rows):
+    return [list(row) for row in rows]
+
+
+# Builds count random boards with up to 8 pieces of each colour
+def build_boards(count, seed):
+    generator = random.Random(seed)
+    boards = []
+
+    for _ in range(0, count, 1):
+        board = [[' '] * 8 for _ in range(0, 8, 1)]
+        squares = generator.sample(range(0, 64, 1), generator.randrange(2, 17, 1))
+        for index, square in enumerate(squares):
+            board[square // 8][square % 8] = 'W' if index % 2 == 0 else 'B'
+        boards.append(board)
+
+    return boards
+
+
+# Builds count positions by playing random moves from the starting position with a fixed seed
+def build_positions(count, seed=5368):
+    generator = random.Random(seed)
+    positions = []
+
+    while len(positions) < count:
+        board = [['B'] * 8] + [[' '] * 8 for _ in range(0, 6, 1)] + [['W'] * 8]
+        player = 'W'
+
+        for ply in range(0, generator.randrange(6, 30, 1), 1):
+            moves = movegen.legal_moves(board, player)
+            if not moves:
+                break
+            board = func.make_move(board, player, generator.choice(moves))
+            player = 'B' if player == 'W' else 'W'
+
+        positions.append((board, player))
+
+    return positions
@@ -0,0 +1,220 @@
+"""
+    bitboard.py
+
+    Description:
+    An alternative board representation where each side is stored as a single
+    64-bit integer. Square (x, y) maps to bit y * 8 + x, so bit 0 is the top left
+    corner of the grid and bit 63 is the bottom right corner. The functions in this
+    module mirror is_valid_move and make_move in func.py (including the order in
+    which intervention and custodian captures are resolved).
+
+    This is a reference implementation of the rules only. The search, the games
+    and func.py all work on the list grid (see position.py and movegen.py), and
+    nothing dispatches to this module. It is kept as a second, independent version
+    of the rules that tests/test_captures.py checks the grid version against
+"""
+
+WC = 'W'
+BC = 'B'
+EC = ' '
+
+FULL_BOARD = (1 << 64) - 1
+
+# Masks used to stop horizontal shifts from wrapping around to the next row
+NOT_LEFT_COLUMN = 0
+NOT_RIGHT_COLUMN = 0
+for _y in range(0, 8, 1):
+    for _x in range(0, 8, 1):
+        if _x != 0:
+            NOT_LEFT_COLUMN |= 1 << (_y * 8 + _x)
+        if _x != 7:
+            NOT_RIGHT_COLUMN |= 1 << (_y * 8 + _x)
+
+
+# Builds the mask of every square a piece passes over (including where it lands)
+# when it slides from one square to another. Squares that are not in a straight
+# line of each other get a mask of 0
+def _build_path_masks():
+    masks = [[0] * 64 for _ in range(64)]
+
+    for start in range(0, 64, 1):
+        start_x, start_y = start % 8, start // 8
+        for end in range(0, 64, 1):
+            end_x, end_y = end % 8, end // 8
+
+            if start == end or (start_x != end_x and start_y != end_y):
+                continue
+
+            step_x = (end_x > start_x) - (end_x < start_x)
+            step_y = (end_y > start_y) - (end_y < start_y)
+            mask = 0
+            cur_x, cur_y = start_x, start_y
+            while (cur_x, cur_y) != (end_x, end_y):
+                cur_x += step_x
+                cur_y += step_y
+                mask |= 1 << (cur_y * 8 + cur_x)
+            masks[start][end] = mask
+
+    return masks
+
+
+PATH_MASKS = _build_path_masks()
+
+
+class BitBoard:
+    """A Squeeze-It position stored as one bitboard per side"""
+
+    __slots__ = ('white', 'black', '_rows')
+
+    def __init__(self, white=0, black=0):
+        self.white = white
+        self.black = black
+        self._rows = None
+
+    # Allows board[y][x] style reads so heuristics written for the list of lists
+    # grid also work on a bitboard. The grid is only built once per position
+    def __getitem__(self, y):
+        if self._rows is None:
+            self._rows = to_grid(self)
+        return self._rows[y]
+
+    def __eq__(self, other):
+        return isinstance(other, BitBoard) and self.white == other.white and self.black == other.black
+
+    def __hash__(self):
+        return hash((self.white, self.black))
+
+    def __repr__(self):
+        return 'BitBoard(white={0:#018x}, black={1:#018x})'.format(self.white, self.black)
+
+    # Returns the bitboard belonging to the given player
+    def pieces(self, player):
+        return self.white if player == WC else self.black
+
+
+# Converts a list of lists grid into a bitboard
+def from_grid(grid):
+    white = 0
+    black = 0
+
+    for y in range(0, 8, 1):
+        for x in range(0, 8, 1):
+            if grid[y][x] == WC:
+                white |= 1 << (y * 8 + x)
+            elif grid[y][x] == BC:
+                black |= 1 << (y * 8 + x)
+
+    return BitBoard(white, black)
+
+
+# Converts a bitboard back into a list of lists grid
+def to_grid(bitboard):
+    grid = []
+
+    for y in range(0, 8, 1):
+        row = []
+        for x in range(0, 8, 1):
+            bit = 1 << (y * 8 + x)
+            if bitboard.white & bit:
+                row.append(WC)
+            elif bitboard.black & bit:
+                row.append(BC)
+            else:
+                row.append(EC)
+        grid.append(row)
+
+    return grid
+
+
+# Counts the number of pieces a player has on the board
+def count_pieces(bitboard, player):
+    return bin(bitboard.pieces(player)).count('1')
+
+
+# Lists the squares of every set bit, ordered by column and then row to match
+# the order the grid based functions walk the board in
+def _squares_column_major(bits):
+    squares = []
+    while bits:
+        low_bit = bits & -bits
+        squares.append(low_bit.bit_length() - 1)
+        bits ^= low_bit
+    squares.sort(key=lambda square: (square & 7, square >> 3))
+    return squares
+
+
+# Checks move legality on a bitboard
+def is_valid_move(bitboard, player, move):
+    start = move[1] * 8 + move[0]
+    end = move[3] * 8 + move[2]
+
+    if not bitboard.pieces(player) >> start & 1:
+        # Chosen piece does not belong to the player or is not there, so invalid
+        return False
+
+    path = PATH_MASKS[start][end]
+    if not path:
+        # Not moving the piece or not moving in a straight line, so invalid
+        return False
+
+    # Every square we slide over and land on has to be empty
+    return not path & (bitboard.white | bitboard.black)
+
+
+# Makes a move on a bitboard and returns the resulting position. The passed in
+# bitboard is left untouched
+def make_move(bitboard, player, move):
+    if not is_valid_move(bitboard, player, move):
+        return BitBoard(bitboard.white, bitboard.black)
+
+    own = bitboard.pieces(player) & ~(1 << (move[1] * 8 + move[0])) | 1 << (move[3] * 8 + move[2])
+    other = bitboard.black if player == WC else bitboard.white
+
+    # Resolve any intervention captures. A capture can only start on an opponent
+    # piece that has one of our pieces directly below or to the right of it, and
+    # our pieces never change during this pass, so only those squares are walked
+    for square in _squares_column_major(other & ((own >> 8) | ((own & NOT_LEFT_COLUMN) >> 1))):
+        if not other >> square & 1:
+            continue
+        x, y = square & 7, square >> 3
+
+        # Check down
+        end_y = y + 1
+        while end_y < 8 and own >> (end_y * 8 + x) & 1:
+            end_y += 1
+        if end_y > y + 1 and end_y < 8 and other >> (end_y * 8 + x) & 1:
+            other &= ~(1 << square | 1 << (end_y * 8 + x))
+
+        # Check right
+        end_x = x + 1
+        while end_x < 8 and own >> (y * 8 + end_x) & 1:
+            end_x += 1
+        if end_x > x + 1 and end_x < 8 and other >> (y * 8 + end_x) & 1:
+            other &= ~(1 << square | 1 << (y * 8 + end_x))
+
+    # Resolve any custodian captures, starting from our pieces that have an
+    # opponent piece directly below or to the right of them
+    for square in _squares_column_major(own & ((other >> 8) | ((other & NOT_LEFT_COLUMN) >> 1))):
+        x, y = square & 7, square >> 3
+
+        # Check down
+        end_y = y + 1
+        captured = 0
+        while end_y < 8 and other >> (end_y * 8 + x) & 1:
+            captured |= 1 << (end_y * 8 + x)
+            end_y += 1
+        if end_y < 8 and own >> (end_y * 8 + x) & 1:
+            other &= ~captured
+
+        # Check right
+        end_x = x + 1
+        captured = 0
+        while end_x < 8 and other >> (y * 8 + end_x) & 1:
+            captured |= 1 << (y * 8 + end_x)
+            end_x += 1
+        if end_x < 8 and own >> (y * 8 + end_x) & 1:
+            other &= ~captured
+
+    if player == WC:
+        return BitBoard(own, other)
+    return BitBoard(other, own)
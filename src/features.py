@@ -0,0 +1,140 @@
+"""
+    features.py
+
+    Description:
+    Every feature the built-in heuristics look at, worked out in a single pass.
+    The heuristics in heurisitcs.py each rescan the board (and call each other), so
+    the aggressive heuristic alone goes over the board at least four times. Here
+    the features are read from the line tables (see line_tables.py) with one
+    lookup per row and per column, plus the diagonals and center from the rows'
+    piece masks, into a feature vector. Each heuristic is then a few additions of
+    that vector, and gives exactly the same scores as the original.
+
+    A feature vector is a list indexed by the constants below (named in
+    FEATURE_NAMES), from one player's point of view. Tools that tune or analyse the
+    heuristics can use it directly, and reuse one list for many boards by passing
+    it to extract_features
+"""
+
+import line_tables
+
+# Indices into a feature vector
+PIECES = 0  # The player's pieces
+OPPONENT_PIECES = 1  # The opponent's pieces
+ADJACENT = 2  # Pairs of the player's pieces right next to each other in a row or column
+GAPS = 3  # Pairs of the player's pieces with one empty or occupied square between them in a row or column
+SIDE_EDGES = 4  # The player's pieces in the left and right columns
+TOP_BOTTOM_EDGES = 5  # The player's pieces in the top and bottom rows
+DIAGONALS = 6  # Pairs of the player's pieces on a down-right diagonal
+CENTER = 7  # The player's pieces in the middle 4x4 squares
+CONTACT = 8  # Pairs of a player's piece and an opponent piece right next to each other in a row or column
+
+FEATURE_NAMES = ['pieces', 'opponent_pieces', 'adjacent', 'gaps', 'side_edges', 'top_bottom_edges', 'diagonals',
+                 'center', 'contact']
+
+# The middle 4 squares of a row, as a piece mask
+CENTER_MASK = 0x3C
+
+_BITS = line_tables.FIELD_BITS
+_MASK = line_tables.FIELD_MASK
+_BIT_COUNTS = line_tables.BIT_COUNTS
+
+
+# Returns a new feature vector of zeros
+def new_vector():
+    return [0] * len(FEATURE_NAMES)
+
+
+# Fills vector (a new one if not given) with the features of the board with the
+# given packed rows and columns (see line_tables.pack_board) for player
+def features_from_lines(rows, columns, player, vector=None):
+    player_tables = line_tables.tables[player]
+    line_features = player_tables['features']
+    pieces = player_tables['pieces']
+
+    row_counts = 0
+    for index in rows:
+        row_counts += line_features[index]
+    column_counts = 0
+    for index in columns:
+        column_counts += line_features[index]
+    line_counts = row_counts + column_counts
+
+    # Diagonals pair a piece in one row with the piece one to the right in the next row
+    diagonals = 0
+    below = pieces[rows[0]]
+    for y in range(1, 8, 1):
+        above = below
+        below = pieces[rows[y]]
+        diagonals += _BIT_COUNTS[(above << 1) & below & 0xFF]
+
+    center = 0
+    for y in range(2, 6, 1):
+        center += _BIT_COUNTS[pieces[rows[y]] & CENTER_MASK]
+
+    if vector is None:
+        vector = new_vector()
+
+    # Pieces are counted by the rows alone, edges by the lines running across them and the pairs by every line
+    vector[PIECES] = row_counts & _MASK
+    vector[OPPONENT_PIECES] = (row_counts >> (line_tables.LINE_OPPONENT_PIECES * _BITS)) & _MASK
+    vector[ADJACENT] = (line_counts >> (line_tables.LINE_ADJACENT * _BITS)) & _MASK
+    vector[GAPS] = (line_counts >> (line_tables.LINE_GAPS * _BITS)) & _MASK
+    vector[SIDE_EDGES] = (row_counts >> (line_tables.LINE_ENDS * _BITS)) & _MASK
+    vector[TOP_BOTTOM_EDGES] = (column_counts >> (line_tables.LINE_ENDS * _BITS)) & _MASK
+    vector[DIAGONALS] = diagonals
+    vector[CENTER] = center
+    vector[CONTACT] = (line_counts >> (line_tables.LINE_CONTACT * _BITS)) & _MASK
+    return vector
+
+
+# Fills vector (a new one if not given) with the features of board for player
+def extract_features(board, player, vector=None):
+    rows, columns = line_tables.pack_board(board)
+    return features_from_lines(rows, columns, player, vector)
+
+
+# The heuristics in heurisitcs.py, as combinations of a feature vector
+
+def simple_score(vector):
+    return 5 * (vector[PIECES] - vector[OPPONENT_PIECES])
+
+
+def defensive_score(vector):
+    # The left and right edges are counted once for each of 7 columns in heurisitcs.defensive_heuristic
+    return simple_score(vector) - vector[ADJACENT] - vector[GAPS] + 7 * vector[SIDE_EDGES] \
+        + vector[TOP_BOTTOM_EDGES] + vector[DIAGONALS]
+
+
+def aggressive_score(vector):
+    base_counter = defensive_score(vector)
+    counter = 8 * vector[PIECES] - 5 * vector[OPPONENT_PIECES] + vector[CONTACT]
+
+    if base_counter > counter:
+        return base_counter
+    elif base_counter < counter:
+        return counter
+    else:
+        return simple_score(vector)
+
+
+def stay_in_the_center_score(vector):
+    return simple_score(vector) + vector[CENTER]
+
+
+# The heuristics in heurisitcs.py, scored from a single pass over the board
+
+def simple_heuristic(board, player):
+    return simple_score(extract_features(board, player))
+
+
+def defensive_heuristic(board, player):
+    return defensive_score(extract_features(board, player))
+
+
+def aggressive_heuristic(board, player):
+    return aggressive_score(extract_features(board, player))
+
+
+def stay_in_the_center_heuristic(board, player):
+    return stay_in_the_center_score(extract_features(board, player))
@@ -5,89 +5,112 @@
     A series of helper functions used by both the minimax and game master
 """
 
-from copy import deepcopy
 
+# Every line on the board, used when we do not know which lines a capture could be on
+ALL_LINES = range(0, 8, 1)
 
-def make_move(board, player, move):
 
-    new_board = deepcopy(board)
-    opponent = 'W' if player == 'B' else 'B'
+# Makes a move and returns the resulting board. The passed in board is left untouched.
+#
+# Captures can only be completed on the rows and columns through the squares
+# pieces have just landed on, as vacating a square or removing a piece never
+# creates a new capture. Both our destination and the destination of the opponent's
+# previous move count (the opponent may have moved into a capture position, which
+# is only taken on our turn), so when previous_move is given only those lines are
+# checked. Without previous_move every line is checked
+def make_move(board, player, move, previous_move=None):
+
+    new_board = [row[:] for row in board]
 
     if is_valid_move(board, player, move):
         new_board[move[1]][move[0]] = ' '
         new_board[move[3]][move[2]] = player
 
-        # Resolve any intervention captures
-        for x in range(0, 8, 1):
-            for y in range(0, 8, 1):
-                if new_board[y][x] == opponent:
-                    # Check down
-                    for down_space in range(y + 1, 8, 1):
-                        if abs(y - down_space) > 1 and new_board[down_space][x] == opponent:
-                            # See if we have a series of opposite pieces between these two pieces
-                            capture_flag = True
-                            for inter in range(y + 1, down_space, 1):
-                                if new_board[inter][x] != player:
-                                    capture_flag = False
-
-                            if capture_flag:
-                                # All pieces between these two pieces are opposite, so intervention by player
-
-                                new_board[y][x] = ' '
-                                new_board[down_space][x] = ' '
-
-                    # Check right
-                    for right_space in range(x + 1, 8, 1):
-                        if abs(x - right_space) > 1 and new_board[y][right_space] == opponent:
-                            # See if we have a series of opposite pieces between these two pieces
-                            capture_flag = True
-
-                            for inter in range(x + 1, right_space, 1):
-                                if new_board[y][inter] != player:
-                                    capture_flag = False
-
-                            if capture_flag:
-                                # All pieces between these two pieces are opposite, so intervention by player
-
-                                new_board[y][x] = ' '
-                                new_board[y][right_space] = ' '
-
-        for x in range(0, 8, 1):
-            for y in range(0, 8, 1):
-                if new_board[y][x] == player:
-                    # Check down
-                    for down_space in range(y + 1, 8, 1):
-                        if new_board[down_space][x] == player:
-                            # See if we have a series of opposite pieces between these two pieces
-                            capture_flag = True
-                            for inter in range(y + 1, down_space, 1):
-                                if new_board[inter][x] != opponent:
-                                    capture_flag = False
-
-                            if capture_flag:
-                                # All pieces between these two pieces are opposite, so capture them
-                                for inter in range(y + 1, down_space, 1):
-
-                                    new_board[inter][x] = ' '
-
-                    # Check right
-                    for right_space in range(x + 1, 8, 1):
-                        if new_board[y][right_space] == player:
-                            # See if we have a series of opposite pieces between these two pieces
-                            capture_flag = True
-                            for inter in range(x + 1, right_space, 1):
-                                if new_board[y][inter] != opponent:
-                                    capture_flag = False
-
-                            if capture_flag:
-                                # All pieces between these two pieces are opposite, so capture them
-                                for inter in range(x + 1, right_space, 1):
-
-                                    new_board[y][inter] = ' '
+        if previous_move is None:
+            resolve_captures(new_board, player, ALL_LINES, ALL_LINES)
+        else:
+            resolve_captures(new_board, player, {move[2], previous_move[2]}, {move[3], previous_move[3]})
 
     return new_board
 
 
+# Removes every opponent piece captured by player, looking only at the given
+# columns and rows. Squares are visited in the same order as a scan of the
+# whole board (column by column, top to bottom), so the result is identical to
+# scanning every line as long as no capture exists outside the given lines.
+# Returns the (x, y) location of every piece that was captured
+def resolve_captures(board, player, columns, rows):
+    opponent = 'W' if player == 'B' else 'B'
+    sorted_rows = sorted(rows)
+    captured = []
+
+    # Resolve any intervention captures
+    for x in range(0, 8, 1):
+        check_column = x in columns
+        for y in (ALL_LINES if check_column else sorted_rows):
+            if board[y][x] != opponent:
+                continue
+
+            if check_column:
+                # Check down for a series of our pieces followed by another opponent piece
+                end_y = y + 1
+                while end_y < 8 and board[end_y][x] == player:
+                    end_y += 1
+                if end_y > y + 1 and end_y < 8 and board[end_y][x] == opponent:
+                    # All pieces between these two pieces are ours, so intervention by player
+                    board[y][x] = ' '
+                    board[end_y][x] = ' '
+                    captured.append((x, y))
+                    captured.append((x, end_y))
+
+            if y in rows:
+                # Check right for a series of our pieces followed by another opponent piece
+                row = board[y]
+                end_x = x + 1
+                while end_x < 8 and row[end_x] == player:
+                    end_x += 1
+                if end_x > x + 1 and end_x < 8 and row[end_x] == opponent:
+                    # All pieces between these two pieces are ours, so intervention by player
+                    if row[x] == opponent:
+                        # The piece we started from may already have been captured by the check down
+                        captured.append((x, y))
+                    row[x] = ' '
+                    row[end_x] = ' '
+                    captured.append((end_x, y))
+
+    # Resolve any custodian captures
+    for x in range(0, 8, 1):
+        check_column = x in columns
+        for y in (ALL_LINES if check_column else sorted_rows):
+            if board[y][x] != player:
+                continue
+
+            if check_column:
+                # Check down for a series of opponent pieces followed by another of our pieces
+                end_y = y + 1
+                while end_y < 8 and board[end_y][x] == opponent:
+                    end_y += 1
+                if end_y < 8 and board[end_y][x] == player:
+                    # All pieces between these two pieces are opposite, so capture them
+                    for inter in range(y + 1, end_y, 1):
+                        board[inter][x] = ' '
+                        captured.append((x, inter))
+
+            if y in rows:
+                # Check right for a series of opponent pieces followed by another of our pieces
+                row = board[y]
+                end_x = x + 1
+                while end_x < 8 and row[end_x] == opponent:
+                    end_x += 1
+                if end_x < 8 and row[end_x] == player:
+                    # All pieces between these two pieces are opposite, so capture them
+                    for inter in range(x + 1, end_x, 1):
+                        row[inter] = ' '
+                        captured.append((inter, y))
+
+    return captured
+
+
 # Checks move legality and updates grid
 def is_valid_move(board, player, move):
 
@@ -1,5 +1,5 @@
-from enum import Enum
 import re
+from game_state import GameState
 
 # Constants
 GRID_HEIGHT = 8
@@ -8,7 +8,6 @@ WC = 'W'
 BC = 'B'
 # Should we change to 0?
 EC = ' '
-PLAYERS = Enum("Players", "White Black")
 
 
 # Printing the Game Grid
@@ -24,49 +23,33 @@ def print_grid(grid):
     print("")
 
 
-# Forming the Game Grid
-def form_grid():
-    global grid
-    grid = [[BC, BC, BC, BC, BC, BC, BC, BC],
-            [EC, EC, EC, EC, EC, EC, EC, EC],
-            [EC, EC, EC, EC, EC, EC, EC, EC],
-            [EC, EC, EC, EC, EC, EC, EC, EC],
-            [EC, EC, EC, EC, EC, EC, EC, EC],
-            [EC, EC, EC, EC, EC, EC, EC, EC],
-            [EC, EC, EC, EC, EC, EC, EC, EC],
-            [WC, WC, WC, WC, WC, WC, WC, WC]]
-
-    return grid
-
-
 # Move function
-def move(value_package):
-    print("Turn : ", value_package["turn_count"])
-    if value_package["cur_turn"] == PLAYERS.White:
+def move(state):
+    print("Turn : ", state.turn_count)
+    if state.current_player == WC:
         print("White's turn :\n")
-        print_grid(value_package["board"])
+        print_grid(state.board)
 
         # Ask for command until the syntax is correct
         while True:
             print("Enter movement :", end="")
-            if interpret_response(value_package["board"], input()) == True:
-                value_package["cur_turn"] = PLAYERS.Black
-                value_package["turn_count"] += 1
+            if interpret_response(state, input()) == True:
                 break
     else:
         print("Black's turn :\n")
-        print_grid(value_package["board"])
+        print_grid(state.board)
 
         # WHERE AI FUNCTION FOR BLACK'S TURN
 
-        value_package["cur_turn"] = PLAYERS.White
+        # Black does not move yet, so hand the turn straight back without counting it
+        state.current_player = WC
 
 
 # Turns the move into a tuple and sees if syntax is valid and if move is legal
-def interpret_response(board, response):
+def interpret_response(state, response):
     if check_input_syntax(response):
         tuples = response_to_tuples(response)
-        if check_move_legality(board, tuples):
+        if check_move_legality(state, tuples):
             return True
     else:
         print("Syntax Error")
@@ -90,33 +73,36 @@ def response_to_tuples(response):
     return ((l_val1, r_val1), (l_val2, r_val2))
 
 
-# Checks move legality and updates grid
-def check_move_legality(board, tuples):
+# Checks move legality and makes the move
+def check_move_legality(state, tuples):
+    board = state.board
     fr = tuples[0]
     to = tuples[1]
 
-    if grid[fr[0]][fr[1]] == 'W':
-        if fr[0] == to[0] or fr[1] == to[1]:
-            if grid[to[0]][to[1]] == ' ':
-                grid[to[0]][to[1]] = 'W'
-                grid[fr[0]][fr[1]] = ' '
-                return True
-            else:
-                print('Space is not empty')
-        else:
-            print('Illegal Move')
+    # Tuples are (row, column), moves are (x, y, new x, new y)
+    white_move = (fr[1], fr[0], to[1], to[0])
 
+    if state.is_legal_move(white_move):
+        state.make_move(white_move)
+        return True
+    elif board[fr[0]][fr[1]] == WC and (fr[0] == to[0] or fr[1] == to[1]) and fr != to:
+        print('Path is not empty')
     else:
         print('Illegal Move')
-        return False
+    return False
 
 
 # Game interface
 def main():
     print('SQUEEZE IT')
-    value_package = dict([("board", form_grid()), ("turn_count", 1), ("cur_turn", PLAYERS.White)])
-    while True:
-        move(value_package)
+    state = GameState()
+    while not state.game_over():
+        move(state)
+
+    print_grid(state.board)
+    winner = state.winner()
+    print("White Wins!" if winner == WC else "Black Wins!" if winner == BC else "Its a Tie!")
 
 
-main()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+    game_state.py
+
+    Description:
+    The state of one game of Squeeze-It: the board, whose turn it is, the turn
+    count, how many pieces each player has left and every move made so far. The
+    GUIs, the command line game and the tournament runner all play through a
+    GameState, so none of them keep the game in module globals and any number of
+    games can be played in one process. Nothing here needs a display.
+
+    Moves are made in place. The piece counts are updated from the pieces each
+    move captures instead of counting the board every time they are needed
+"""
+
+import func
+import movegen
+
+WC = 'W'
+BC = 'B'
+EC = ' '
+
+# The game is over once the turn count goes past this
+MAX_TURNS = 100
+
+
+# Returns a new board with both players' pieces on their starting rows
+def starting_board():
+    return [[BC] * 8] + [[EC] * 8 for _ in range(0, 6, 1)] + [[WC] * 8]
+
+
+# Counts the pieces player has on board
+def count_board_pieces(board, player):
+    return sum(row.count(player) for row in board)
+
+
+class GameState:
+    """A game of Squeeze-It, updated as moves are made"""
+
+    __slots__ = ('board', 'current_player', 'turn_count', 'piece_counts', 'history')
+
+    # board is copied, so the caller's board is never changed. The starting position is used if it is not given
+    def __init__(self, board=None, current_player=WC, turn_count=1):
+        self.board = starting_board() if board is None else [row[:] for row in board]
+        self.current_player = current_player
+        self.turn_count = turn_count
+        self.piece_counts = dict([(WC, count_board_pieces(self.board, WC)),
+                                  (BC, count_board_pieces(self.board, BC))])
+
+        # (player, move, captured squares) of every move made, oldest first
+        self.history = []
+
+    def copy(self):
+        state = GameState(self.board, self.current_player, self.turn_count)
+        state.history = self.history[:]
+        return state
+
+    def opponent(self):
+        return BC if self.current_player == WC else WC
+
+    def count_pieces(self, player):
+        return self.piece_counts[player]
+
+    # The game is over once either player has no pieces left, the turn limit has
+    # passed or the player to move has no legal move
+    def game_over(self, max_turns=MAX_TURNS):
+        return self.turn_count > max_turns or self.piece_counts[WC] == 0 or self.piece_counts[BC] == 0 \
+            or not self.legal_moves()
+
+    # Who won a game that is over (see game_over), or None for a draw. A player
+    # left without a legal move loses, as the search scores it (see minimax.py and
+    # tablebase.py). Otherwise the player with more pieces wins, which is the only
+    # player with any once the other has lost them all
+    def winner(self):
+        if not self.legal_moves():
+            return self.opponent()
+        return self.leader()
+
+    # The player with more pieces left, or None if they have the same number
+    def leader(self):
+        if self.piece_counts[WC] > self.piece_counts[BC]:
+            return WC
+        elif self.piece_counts[WC] < self.piece_counts[BC]:
+            return BC
+        return None
+
+    def legal_moves(self):
+        return movegen.legal_moves(self.board, self.current_player)
+
+    def is_legal_move(self, move):
+        return movegen.is_legal_move(self.board, self.current_player, move)
+
+    # Makes a move for the current player, resolving its captures, and passes the
+    # turn on. The move is assumed to be legal (see is_legal_move). Returns the
+    # list of captured squares
+    def make_move(self, move):
+        board = self.board
+        player = self.current_player
+        opponent = self.opponent()
+
+        board[move[1]][move[0]] = EC
+        board[move[3]][move[2]] = player
+
+        # Every line is checked, like func.make_move without a previous move
+        captured = func.resolve_captures(board, player, func.ALL_LINES, func.ALL_LINES)
+
+        self.piece_counts[opponent] -= len(captured)
+        self.history.append((player, tuple(move), captured))
+        self.current_player = opponent
+        self.turn_count += 1
+        return captured
+
+    # Takes back the last move made. Returns the move
+    def undo_move(self):
+        player, move, captured = self.history.pop()
+        board = self.board
+        opponent = BC if player == WC else WC
+
+        for x, y in captured:
+            board[y][x] = opponent
+        board[move[3]][move[2]] = EC
+        board[move[1]][move[0]] = player
+
+        self.piece_counts[opponent] += len(captured)
+        self.current_player = player
+        self.turn_count -= 1
+        return move
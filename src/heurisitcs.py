@@ -1,4 +1,46 @@
 import random
+import features
+from collections import namedtuple
+
+# How expensive a heuristic is to evaluate
+CHEAP = 'cheap'  # A single pass counting pieces
+MODERATE = 'moderate'  # A few passes over the board
+EXPENSIVE = 'expensive'  # Several passes over the board, or worse
+
+# Everything the minimax and GUI need to know about a heuristic
+#   name: what the heuristic is chosen by (e.g. get_next_move's heuristic_method)
+#   label: what the GUI shows for it
+#   function: function(board, player) scoring board from player's point of view
+#   cost: one of CHEAP, MODERATE or EXPENSIVE
+#   incremental: whether it can be updated as moves are made instead of rescanning the board
+HeuristicInfo = namedtuple('HeuristicInfo', ['name', 'label', 'function', 'cost', 'incremental'])
+
+# Every registered heuristic by name, in the order they were registered
+heuristic_registry = dict()
+
+
+# Makes a heuristic available to the minimax and GUI
+def register_heuristic(name, function, label=None, cost=MODERATE, incremental=False):
+    if name in heuristic_registry:
+        raise ValueError('A heuristic named {0!r} is already registered'.format(name))
+    if cost not in (CHEAP, MODERATE, EXPENSIVE):
+        raise ValueError('Unknown cost class {0!r}'.format(cost))
+
+    info = HeuristicInfo(name, label if label is not None else name, function, cost, incremental)
+    heuristic_registry[name] = info
+    return info
+
+
+# Returns the HeuristicInfo for a registered heuristic
+def get_heuristic(name):
+    if name not in heuristic_registry:
+        raise ValueError('Unknown heuristic {0!r}, expected one of {1}'.format(name, ', '.join(heuristic_registry)))
+    return heuristic_registry[name]
+
+
+# Returns the HeuristicInfo of every registered heuristic, in the order they were registered
+def registered_heuristics():
+    return list(heuristic_registry.values())
 
 
 # Just counts up the pieces and rates the board based on
@@ -142,3 +184,13 @@ def stay_in_the_center_heuristic(board, player):
             if board[y][x] == player:
                 counter += 1
     return counter
+
+
+# The built-in heuristics are scored from a single pass over the board (see features.py),
+# which gives the same scores as the functions above
+register_heuristic('simple', features.simple_heuristic, 'Simple Minimax', CHEAP, incremental=True)
+register_heuristic('aggressive', features.aggressive_heuristic, 'Aggressive Minimax', MODERATE, incremental=True)
+register_heuristic('defensive', features.defensive_heuristic, 'Defensive Minimax', MODERATE, incremental=True)
+register_heuristic('stay_in_center', features.stay_in_the_center_heuristic, 'Center Minimax', CHEAP,
+                   incremental=True)
+register_heuristic('random', random_heuristic, 'Random Minimax', EXPENSIVE)
@@ -0,0 +1,183 @@
+"""
+    incremental.py
+
+    Description:
+    Incremental versions of the heuristics in heurisitcs.py. Every heuristic except
+    random is a sum of terms over single squares and pairs of nearby squares
+    (pieces, edges, the center, pieces next to or one apart from each other,
+    diagonals and pieces next to the opponent). An IncrementalEvaluator keeps those
+    terms as running totals for one player. When a move is made only the terms
+    touching the squares that changed (the start, the destination and any captured
+    squares) are recomputed, and the old totals are pushed on a stack so unmaking
+    the move just pops them back. Scoring a board is then a few additions instead
+    of several passes over it.
+
+    A Position given an evaluator keeps it up to date through make and unmake (see
+    position.py). With check=True, every score is also compared with the full
+    heuristic, and an EvaluationMismatch is raised if they ever differ
+"""
+
+import heurisitcs
+
+
+class EvaluationMismatch(Exception):
+    """The running score differs from rescanning the board"""
+    pass
+
+
+# Builds a table of the squares at each (dx, dy) offset from every square, by square index (y * 8 + x)
+def _neighbour_table(offsets):
+    table = []
+    for y in range(0, 8, 1):
+        for x in range(0, 8, 1):
+            table.append([(y + dy) * 8 + x + dx for dx, dy in offsets if 0 <= x + dx < 8 and 0 <= y + dy < 8])
+    return table
+
+
+# Squares that count against a piece when they hold one of the same player's pieces:
+# right next to it or one space away, in its row or column
+CROWDING = _neighbour_table([(-2, 0), (-1, 0), (1, 0), (2, 0), (0, -2), (0, -1), (0, 1), (0, 2)])
+
+# Squares that count for a piece when they hold one of the same player's pieces.
+# Only the down-right diagonal is scored, from either end
+DIAGONALS = _neighbour_table([(-1, -1), (1, 1)])
+
+# Squares right next to a piece, where an opponent piece counts for the aggressive heuristic
+CONTACT = _neighbour_table([(-1, 0), (1, 0), (0, -1), (0, 1)])
+
+# What a piece on each edge square is worth. The defensive heuristic counts the
+# left and right columns once for each of 7 columns and the top and bottom rows once
+EDGES = [(7 if x in (0, 7) else 0) + (1 if y in (0, 7) else 0) for y in range(0, 8, 1) for x in range(0, 8, 1)]
+
+# Squares counted by the stay in the center heuristic
+CENTER = [1 if 2 <= x < 6 and 2 <= y < 6 else 0 for y in range(0, 8, 1) for x in range(0, 8, 1)]
+
+
+def simple_score(evaluator):
+    return 5 * (evaluator.pieces - evaluator.opponent_pieces)
+
+
+def defensive_score(evaluator):
+    return simple_score(evaluator) + evaluator.structure
+
+
+def aggressive_score(evaluator):
+    base_counter = defensive_score(evaluator)
+    counter = 8 * evaluator.pieces - 5 * evaluator.opponent_pieces + evaluator.contact
+
+    if base_counter > counter:
+        return base_counter
+    elif base_counter < counter:
+        return counter
+    else:
+        return simple_score(evaluator)
+
+
+def stay_in_the_center_score(evaluator):
+    return simple_score(evaluator) + evaluator.center
+
+
+# How each heuristic registered as incremental is scored from the running totals, by name
+incremental_scores = dict([("simple", simple_score),
+                           ("aggressive", aggressive_score),
+                           ("defensive", defensive_score),
+                           ("stay_in_center", stay_in_the_center_score)])
+
+
+class IncrementalEvaluator:
+    """Running totals of the heuristic terms of a board, for one player"""
+
+    __slots__ = ('player', 'opponent', 'heuristic_method', 'score_function', 'function', 'check', 'pieces',
+                 'opponent_pieces', 'structure', 'contact', 'center', 'undo_stack')
+
+    # Scores board for player with the heuristic named heuristic_method, which must be
+    # registered as incremental. With check=True every score is checked against the full heuristic
+    def __init__(self, board, player, heuristic_method, check=False):
+        info = heurisitcs.get_heuristic(heuristic_method)
+        if not info.incremental or heuristic_method not in incremental_scores:
+            raise ValueError('Heuristic {0!r} cannot be evaluated incrementally'.format(heuristic_method))
+
+        self.player = player
+        self.opponent = 'W' if player == 'B' else 'B'
+        self.heuristic_method = heuristic_method
+        self.score_function = incremental_scores[heuristic_method]
+        self.function = info.function
+        self.check = check
+        self.undo_stack = []
+
+        self.pieces = 0  # Number of player's pieces
+        self.opponent_pieces = 0  # Number of opponent pieces
+        self.structure = 0  # Edge, crowding and diagonal terms of the defensive heuristic
+        self.contact = 0  # Pairs of player's and opponent pieces right next to each other
+        self.center = 0  # Number of player's pieces in the center
+
+        # Add every piece as if it was placed on an empty board one at a time
+        placed = dict((square, ' ') for square in range(0, 64, 1))
+        for square in range(0, 64, 1):
+            del placed[square]
+            self._add(board, square, board[square >> 3][square & 7], placed, 1)
+
+    # Adds (sign=1) or removes (sign=-1) the terms of a piece on square. value is the
+    # piece on the square, and the other squares are read from changed if they are in
+    # it and from board otherwise
+    def _add(self, board, square, value, changed, sign):
+        if value == self.player:
+            player = self.player
+            structure = EDGES[square]
+            for other in CROWDING[square]:
+                if changed.get(other, board[other >> 3][other & 7]) == player:
+                    structure -= 1
+            for other in DIAGONALS[square]:
+                if changed.get(other, board[other >> 3][other & 7]) == player:
+                    structure += 1
+
+            contact = 0
+            for other in CONTACT[square]:
+                if changed.get(other, board[other >> 3][other & 7]) == self.opponent:
+                    contact += 1
+
+            self.pieces += sign
+            self.structure += sign * structure
+            self.contact += sign * contact
+            self.center += sign * CENTER[square]
+        elif value == self.opponent:
+            contact = 0
+            for other in CONTACT[square]:
+                if changed.get(other, board[other >> 3][other & 7]) == self.player:
+                    contact += 1
+
+            self.opponent_pieces += sign
+            self.contact += sign * contact
+
+    # Updates the totals after player made move on board, capturing the squares in
+    # captured. board must already show the move
+    def make(self, board, player, move, captured):
+        opponent = 'W' if player == 'B' else 'B'
+        self.undo_stack.append((self.pieces, self.opponent_pieces, self.structure, self.contact, self.center))
+
+        # What the changed squares held before the move. They are changed back to what
+        # the board shows one at a time, so each pair of squares is only updated once
+        changed = dict([(move[1] * 8 + move[0], player), (move[3] * 8 + move[2], ' ')])
+        for x, y in captured:
+            changed[y * 8 + x] = opponent
+
+        for square in list(changed):
+            self._add(board, square, changed.pop(square), changed, -1)
+            self._add(board, square, board[square >> 3][square & 7], changed, 1)
+
+    # Restores the totals from before the last move
+    def unmake(self):
+        self.pieces, self.opponent_pieces, self.structure, self.contact, self.center = self.undo_stack.pop()
+
+    # The heuristic's score of the board from the evaluator's player's point of view.
+    # Takes the same arguments as the heuristic so it can be used in its place
+    def evaluate(self, board, player):
+        score = self.score_function(self)
+
+        if self.check:
+            expected = self.function(board, player)
+            if score != expected:
+                raise EvaluationMismatch('{0} heuristic gives {1} incrementally but {2} from the board'.format(
+                    self.heuristic_method, score, expected))
+
+        return score
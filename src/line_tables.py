@@ -0,0 +1,181 @@
+"""
+    line_tables.py
+
+    Description:
+    Lookup tables for the heuristics' features (see features.py). Apart from the
+    diagonals and the center, every feature only looks at one row or one column
+    (pieces, pieces next to or one apart from each other, the edges and pieces next
+    to the opponent). A row or column of 8 squares has 3^8 = 6561 possible states,
+    so the features of every state are worked out ahead of time and a board's
+    features are read with one lookup per row and per column. The counts of a line
+    are packed into a single number, FIELD_BITS bits per count, so the lines of a
+    board can simply be added up.
+
+    A line is packed into its index in the tables by reading its squares as the
+    digits of a base 3 number, where the first square is the lowest digit and an
+    empty square is 0, a white piece 1 and a black piece 2 (see pack_line).
+
+    The tables are built when this file is first imported and cached in
+    line_tables.bin next to it, which later imports load instead of rebuilding
+"""
+
+import array
+import itertools
+import os
+
+LINE_LENGTH = 8
+LINE_STATES = 3 ** LINE_LENGTH
+
+# The value of each square in a packed line
+DIGITS = dict([(' ', 0), ('W', 1), ('B', 2)])
+
+# Bump this whenever the way the tables are built changes, so old caches are rebuilt
+TABLE_VERSION = 2
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'line_tables.bin')
+
+# The tables for each player, in the order they are stored in the cache. features
+# holds the packed counts of a line and pieces a bit mask of the player's pieces
+TABLE_NAMES = ['features', 'pieces']
+
+# The counts packed into each entry of the features table, in order
+LINE_PIECES = 0  # The player's pieces
+LINE_OPPONENT_PIECES = 1  # The opponent's pieces
+LINE_ADJACENT = 2  # Pairs of the player's pieces right next to each other
+LINE_GAPS = 3  # Pairs of the player's pieces with one square between them
+LINE_ENDS = 4  # The player's pieces on either end of the line
+LINE_CONTACT = 5  # Pairs of a player's piece and an opponent piece right next to each other
+LINE_FIELDS = 6
+
+# Bits per packed count. A count can be at most 8 per line and 2 * 8 * 8 for a whole board
+FIELD_BITS = 8
+FIELD_MASK = (1 << FIELD_BITS) - 1
+
+# Every possible line, in the order of their packed index
+LINES = [line[::-1] for line in itertools.product(' WB', repeat=LINE_LENGTH)]
+
+# The packed index of every possible line, by the line as a tuple
+LINE_INDEX = dict((line, index) for index, line in enumerate(LINES))
+
+# Number of set bits in every 8 bit number
+BIT_COUNTS = [bin(bits).count('1') for bits in range(0, 256, 1)]
+
+
+# Packs a row or column (any sequence of 8 squares) into its index in the tables
+def pack_line(line):
+    index = 0
+    for square in reversed(line):
+        index = index * 3 + DIGITS[square]
+    return index
+
+
+# Packs every row and every column of a board
+def pack_board(board):
+    return [LINE_INDEX[tuple(row)] for row in board], [LINE_INDEX[column] for column in zip(*board)]
+
+
+# Packs counts into one number, FIELD_BITS bits each, the first count lowest
+def pack_counts(counts):
+    packed = 0
+    for count in reversed(counts):
+        packed = (packed << FIELD_BITS) | count
+    return packed
+
+
+# Works out the features of a single line for player. Returns one value for each of TABLE_NAMES
+def line_features(line, player):
+    opponent = 'W' if player == 'B' else 'B'
+
+    # Pieces right next to each other and one space apart
+    adjacent = 0
+    for i in range(0, LINE_LENGTH - 1, 1):
+        if line[i] == player and line[i + 1] == player:
+            adjacent += 1
+    gaps = 0
+    for i in range(0, LINE_LENGTH - 2, 1):
+        if line[i] == player and line[i + 2] == player:
+            gaps += 1
+
+    # Pieces next to an opponent piece, on either side
+    contact = 0
+    for i in range(0, LINE_LENGTH - 1, 1):
+        if (line[i] == player and line[i + 1] == opponent) or (line[i] == opponent and line[i + 1] == player):
+            contact += 1
+
+    counts = [0] * LINE_FIELDS
+    counts[LINE_PIECES] = line.count(player)
+    counts[LINE_OPPONENT_PIECES] = line.count(opponent)
+    counts[LINE_ADJACENT] = adjacent
+    counts[LINE_GAPS] = gaps
+    counts[LINE_ENDS] = (line[0] == player) + (line[LINE_LENGTH - 1] == player)
+    counts[LINE_CONTACT] = contact
+
+    pieces_mask = sum(1 << i for i in range(0, LINE_LENGTH, 1) if line[i] == player)
+    return pack_counts(counts), pieces_mask
+
+
+# Builds every table for both players. Returns a dict of player to a dict of table name to table
+def build_tables():
+    tables = dict()
+    for player in ('W', 'B'):
+        features = [line_features(line, player) for line in LINES]
+        tables[player] = dict((name, [feature[i] for feature in features]) for i, name in enumerate(TABLE_NAMES))
+    return tables
+
+
+# Writes the tables to path, replacing any cache already there in one step
+def save_tables(tables, path=CACHE_PATH):
+    values = array.array('q', [TABLE_VERSION, LINE_STATES])
+    for player in ('W', 'B'):
+        for name in TABLE_NAMES:
+            values.extend(tables[player][name])
+
+    # Written to a file of our own and then moved into place in one step, so a write that is cut short or
+    # another process building the tables at the same time never leaves a half written cache to be loaded
+    temporary_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    try:
+        with open(temporary_path, 'wb') as cache_file:
+            values.tofile(cache_file)
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+# Reads the tables back from path. Returns None if the file is missing or out of date
+def load_tables(path=CACHE_PATH):
+    values = array.array('q')
+    expected = 2 + 2 * len(TABLE_NAMES) * LINE_STATES
+
+    try:
+        with open(path, 'rb') as cache_file:
+            values.fromfile(cache_file, expected)
+    except (OSError, EOFError, ValueError):
+        return None
+
+    if values[0] != TABLE_VERSION or values[1] != LINE_STATES:
+        return None
+
+    tables = dict()
+    offset = 2
+    for player in ('W', 'B'):
+        tables[player] = dict()
+        for name in TABLE_NAMES:
+            tables[player][name] = values[offset:offset + LINE_STATES].tolist()
+            offset += LINE_STATES
+    return tables
+
+
+# Loads the tables from the cache, building and caching them if needed
+def get_tables(path=CACHE_PATH):
+    tables = load_tables(path)
+    if tables is None:
+        tables = build_tables()
+        try:
+            save_tables(tables, path)
+        except OSError:
+            # The cache is only there to save time, so carry on without it
+            pass
+    return tables
+
+
+tables = get_tables()
@@ -12,211 +12,913 @@
 # where (x, y) is the location of the piece to be moved, and (a, b) 
 # is the new location
 
-from copy import deepcopy
-import datetime
+import concurrent.futures
+import multiprocessing
+import time
 import heurisitcs
-import func
+import movegen
+import zobrist
+import transposition
+import search_metrics
+from tablebase import DRAW, LOSS, DECIDED_SCORE, tablebase_score, open_tablebase
+from position import Position
+from incremental import IncrementalEvaluator
 
+try:
+    # Only needed to evaluate leaves in batches
+    import batch_heuristics
+except ImportError:
+    batch_heuristics = None
 
-# Custom exception to escape out of nested loops when we prune a branch
-class PruneBranch(Exception):
-    pass
+# How deep get_next_move searches when it is not given a time limit or max depth
+DEFAULT_DEPTH = 3
+
+# Deepest get_next_move will go when it is only given a time or node limit
+MAX_DEPTH = 64
+
+# Higher than any score a position can have, including a tablebase win (see tablebase.WIN_SCORE)
+INFINITE_SCORE = 10000
+
+# How many nodes we visit between checks of the clock
+TIME_CHECK_INTERVAL = 64
+
+# Width of the null window principal variation search tests moves with. Scores
+# are whole numbers, so a score above alpha is at least alpha + 1
+NULL_WINDOW = 1
 
+# How far either side of the last depth's score get_next_move looks at first (see get_next_move)
+DEFAULT_ASPIRATION = 10
 
-def get_next_move(board, player, heuristic_method):
-    # Set how deep we want to go
-    depth = 3
+# Size of the transposition tables get_next_move creates when it is not given one
+DEFAULT_TABLE_SIZE = transposition.DEFAULT_SIZE
 
-    # Flag for if we want a debug output file. Including the file increases runtime a bit,
-    # but it allows us to see how the AI is making decisions
-    debug_flag = True
+# Size of the transposition tables each parallel worker keeps
+WORKER_TABLE_SIZE = 1 << 16
 
-    # Initialize debug File
-    if debug_flag:
-        date = datetime.datetime.now()
-        debug_file_name = '{0}debug.txt'.format(date.strftime("%d%m%Y"))
-        debug_file = open(debug_file_name, 'w+')
-        debug_file.write(datetime.datetime.fromtimestamp(datetime.datetime.now().timestamp()).isoformat())
-        debug_file.write('\n\n')
+# Process pools for parallel searches, by worker count, along with the value the
+# workers share the best score found so far through
+worker_pools = dict()
 
-    # Get the move
-    result = minimax(board, player, depth, 1, -99, 99, heuristic_method, debug_flag, debug_file)
+# In a worker process, the best score any worker has found for the root move it was given
+worker_alpha = None
 
-    if debug_flag:
-        debug_file.close()
+# In a worker process, its transposition tables by (player, heuristic), like
+# default_tables. They are kept for as long as the process runs, so each batch
+# of root moves starts with what the worker found at the last depth and move
+worker_tables = dict()
+
+# Transposition tables kept between calls to get_next_move, one for each
+# (player, heuristic) pair since scores are from the point of view of the
+# player being searched for and depend on the heuristic
+default_tables = dict()
+
+
+# Custom exception to escape out of the search when we run out of time or nodes
+class SearchTimeout(Exception):
+    pass
+
+
+# State shared by every node of a single search
+class SearchContext:
+    __slots__ = ('player', 'depth', 'heuristic_method', 'evaluate', 'evaluate_batch', 'tracer', 'table', 'nodes',
+                 'deadline', 'node_limit', 'stop', 'live_stats', 'killers', 'history', 'cutoffs', 'first_move_cutoffs',
+                 'leaves', 'level_cutoffs', 'metrics', 'tablebase', 'tablebase_hits', 'quiescence_depth',
+                 'quiescence_nodes', 'pvs', 'researches', 'root_score', 'settings_key')
+
+    def __init__(self, player, depth, heuristic_method, evaluate, tracer, table, evaluate_batch=None):
+        self.player = player
+        self.depth = depth
+        self.heuristic_method = heuristic_method
+        self.evaluate = evaluate  # The heuristic's function, looked up once so leaves can call it directly
+        self.evaluate_batch = evaluate_batch  # Batch version of the heuristic if leaves are scored in batches
+        self.tracer = tracer  # search_trace.SearchTracer recording the search, or None
+        self.table = table
+        self.nodes = 0
+        self.deadline = None  # perf_counter() value to stop searching at, if any
+        self.node_limit = None  # Number of nodes to stop searching at, if any
+        self.stop = None  # threading.Event (or anything with is_set()) that stops the search when set, if any
+        self.live_stats = None  # Stats dict to keep the node count of up to date while searching, if any
+
+        # Move ordering. killers[level] holds the last two quiet moves that caused a cutoff at that level and
+        # history[player][move] grows every time move causes a cutoff, by more the deeper the cutoff was
+        self.killers = [[None, None] for _ in range(0, MAX_DEPTH + 2, 1)]
+        self.history = dict([("W", dict()), ("B", dict())])
+
+        # How often we pruned, and how often it was the first move we tried that let us prune
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+        # Nodes scored with the heuristic and cutoffs at each level (indexed by level)
+        self.leaves = 0
+        self.level_cutoffs = [0] * (MAX_DEPTH + 2)
+
+        # search_metrics.SearchMetrics to add the time spent generating moves to, if the search is being timed
+        self.metrics = None
+
+        # tablebase.Tablebase to look endgames up in, if any, and how many nodes it decided
+        self.tablebase = None
+        self.tablebase_hits = 0
+
+        # How many captures past the bottom of the tree quiescence() follows, and how many nodes it visited
+        self.quiescence_depth = 0
+        self.quiescence_nodes = 0
+
+        # Whether moves after the first are tested with a null window (principal variation search), and how
+        # many of them had to be searched again with the full window
+        self.pvs = False
+        self.researches = 0
+
+        # Score of the best move at the top of the tree, from the last search to finish
+        self.root_score = 0
+
+        # Mixed into every key we look up or store, so entries from searches with a different quiescence or
+        # tablebase setting are never used (see zobrist.settings_key)
+        self.settings_key = 0
+
+
+# Generates moves in the order most likely to cause a cutoff: the move from the
+# transposition table, then captures, then killer moves, then everything else by
+# history score. Moves that tie keep their generated order. The table move is
+# tried before any other move is generated, since it often causes a cutoff on its own
+def ordered_moves(board, player, table_move, killers, history):
+    if table_move is not None and movegen.is_legal_move(board, player, table_move):
+        yield table_move
+
+    # Only moves landing on one of these squares can be captures
+    landings = movegen.capture_landings(board, player)
+
+    def priority(move):
+        if (move[2], move[3]) in landings and movegen.is_capture(board, player, move):
+            return 2, 0
+        elif move == killers[0] or move == killers[1]:
+            return 1, 0
+        return 0, history.get(move, 0)
+
+    moves = movegen.legal_moves(board, player)
+    moves.sort(key=priority, reverse=True)
+
+    for move in moves:
+        if move != table_move:
+            yield move
+
+
+# Counts a node, and stops the search if we have run out of time or nodes, or
+# have been told to stop
+def visit_node(context):
+    context.nodes += 1
+    if context.node_limit is not None and context.nodes > context.node_limit:
+        raise SearchTimeout
+    if context.nodes % TIME_CHECK_INTERVAL == 0:
+        if context.deadline is not None and time.perf_counter() >= context.deadline:
+            raise SearchTimeout
+        if context.stop is not None and context.stop.is_set():
+            raise SearchTimeout
+        if context.live_stats is not None:
+            context.live_stats["nodes"] = context.nodes
+
+
+# Fraction of cutoffs that happened on the first move tried at a node. The
+# closer this is to 1, the better the move ordering is
+def first_move_cutoff_rate(context):
+    return context.first_move_cutoffs / context.cutoffs if context.cutoffs else 0.0
+
+
+# Returns the batch version of a heuristic, for scoring leaves in batches
+def get_batch_evaluator(heuristic_method):
+    if batch_heuristics is None:
+        raise ImportError('Scoring leaves in batches requires NumPy')
+    return batch_heuristics.get_batch_heuristic(heuristic_method)
+
+
+# Scores every child of a node whose children are all leaves in one call to the
+# batch heuristic and returns the best move and its score, like the loop in
+# minimax() would. The board is encoded once and each child is a copy of it with
+# the squares its move changed (including captures) updated. Every child is
+# scored, so there is no pruning between them
+def evaluate_frontier(position, current_level, current_player, context, tracer):
+    board = position.board
+    maximizing = current_level % 2 != 0
+    moves = movegen.legal_moves(board, current_player)
+
+    if not moves:
+        # The side to move has lost, scored like a tablebase loss
+        return (), tablebase_score(LOSS, 0, current_level - 1, current_player, context.player)
+
+    moved_piece = batch_heuristics.PLAYER if current_player == context.player else batch_heuristics.OPPONENT
+    children = batch_heuristics.repeat_board(batch_heuristics.encode_board(board, context.player), len(moves))
+    child_keys = []  # Only kept for the tracer
+
+    for index, move in enumerate(moves):
+        captured = position.make(current_player, move)
+        if tracer is not None:
+            child_keys.append(position.key)
+        position.unmake()
+
+        child = children[index]
+        child[move[1], move[0]] = batch_heuristics.EMPTY
+        child[move[3], move[2]] = moved_piece
+        for x, y in captured:
+            child[y, x] = batch_heuristics.EMPTY
+
+    context.nodes += len(moves)
+    context.leaves += len(moves)
+    scores = context.evaluate_batch(children).tolist()
+    best_heuristic = max(scores) if maximizing else min(scores)
+
+    if tracer is not None:
+        for move, score, key in zip(moves, scores, child_keys):
+            if tracer.records(current_level + 1, key):
+                tracer.event('consider', l=current_level, m=move)
+                tracer.event('eval', l=current_level + 1, h=context.heuristic_method, v=score)
+
+    # The first of the best moves, as the loop would have found
+    return moves[scores.index(best_heuristic)], best_heuristic
+
+
+# Wins and losses are scored by how many plies they are from the top of the tree
+# (see tablebase_score), which depends on where the search started. The table keeps
+# them counted from the node instead, so an entry is right whichever search finds
+# it at whatever depth. Turns a score plies below the top of the tree into one for the table
+def to_table_score(score, plies):
+    if score > DECIDED_SCORE:
+        return score + plies
+    elif score < -DECIDED_SCORE:
+        return score - plies
+    return score
+
+
+# Turns a score from the table back into one for a node plies below the top of the tree
+def from_table_score(score, plies):
+    if score > DECIDED_SCORE:
+        return score - plies
+    elif score < -DECIDED_SCORE:
+        return score + plies
+    return score
+
+
+# Returns the transposition table get_next_move uses for player and heuristic_method
+# when it is not given one
+def default_table(player, heuristic_method):
+    if (player, heuristic_method) not in default_tables:
+        default_tables[(player, heuristic_method)] = transposition.TranspositionTable(DEFAULT_TABLE_SIZE)
+    return default_tables[(player, heuristic_method)]
+
+
+# Searches depth 1, 2, 3, ... and returns the best move from the deepest search
+# that finished. Each search stores its results in the transposition table, so
+# the next one tries the best moves it found first.
+#
+# time_limit is the number of seconds to search for, node_limit the number of
+# nodes to visit across all depths and max_depth the deepest search to start.
+# With none of them, we search to DEFAULT_DEPTH. The depth 1 search is always
+# finished, so there is always a move to return.
+#
+# table is the transposition table to use. Scores in it are only valid for one
+# player and heuristic, so the same table should not be shared between them.
+# Searches with different quiescence and tablebase settings can share one, as
+# their keys differ (see zobrist.settings_key).
+#
+# If stats is a dict, it is filled in with how the search went: the depth
+# reached, nodes visited, leaves scored, cutoffs, first move cutoff rate, table
+# hit rate and the seconds from the start of the search until each depth was
+# finished (depth_times).
+#
+# metrics is a sink (see search_metrics.py) that is given a
+# search_metrics.SearchMetrics once the search finishes, which is also put in
+# stats["metrics"]. Only then is the time spent generating moves, making moves and
+# evaluating timed. With workers, the phase times are added up over the workers.
+#
+# workers is the number of processes to split the moves at the top of the tree
+# between (see parallel_root_search). When it is not given, everything is searched
+# in this process.
+#
+# tracer is a search_trace.SearchTracer to record how the search made its
+# decisions. Tracing is off when it is not given.
+#
+# If batch_leaves is True, the leaves under each node just above the bottom of the
+# tree are scored all at once with the heuristic's NumPy version (see
+# batch_heuristics.py and evaluate_frontier).
+#
+# If incremental is True, the heuristic's terms are kept up to date as moves are
+# made and unmade instead of rescanning the board at every leaf (see
+# incremental.py). check_incremental also rescans every leaf and raises
+# incremental.EvaluationMismatch if the scores ever differ.
+#
+# book is an opening_book.OpeningBook. If it has a move for the position, that
+# move is returned without searching.
+#
+# tablebase is a tablebase.Tablebase. If the position is in it and is won or
+# lost, the fastest win (or slowest loss) is returned without searching. Below
+# the top of the tree, won and lost positions in it are scored without
+# searching them, and stats["tablebase_hits"] counts how many were. Drawn
+# positions are searched as usual, so the heuristic can still aim for the
+# player with more pieces at the turn limit.
+#
+# quiescence is the most captures to keep searching past the bottom of the tree
+# before scoring a position (see quiescence). stats["quiescence_nodes"] counts the
+# nodes visited there. With 0, positions at the bottom of the tree are scored
+# as they are.
+#
+# If pvs is True, the first move at each node is searched with the full window
+# and the rest only with a null window, which is enough to show they are no
+# better. A move that turns out better is searched again with the full window
+# (see minimax). stats["researches"] counts how many were. With aspiration, each
+# depth after the first starts with a window aspiration either side of the last
+# depth's score, and searches again with that side opened up if the score falls
+# outside it. stats["aspiration_failures"] counts how many times it did. Neither
+# changes the score of the move returned, only how many nodes it takes to find.
+# The depths searched with workers always use the full window.
+#
+# stop is a threading.Event (or anything with an is_set() method) for stopping
+# the search from another thread, which is checked as often as the time limit.
+# Once it is set, the best move of the last finished depth is returned, which is
+# () if the first depth was not finished. While a search with a stop event runs,
+# stats["nodes"], stats["depth"] and stats["move"] are kept up to date so the
+# other thread can show its progress. With workers, it is only checked between depths
+def get_next_move(board, player, heuristic_method, table=None, time_limit=None, max_depth=None, node_limit=None,
+                  stats=None, workers=None, tracer=None, batch_leaves=False, incremental=False,
+                  check_incremental=False, stop=None, metrics=None, book=None, tablebase=None, quiescence=0, pvs=True,
+                  aspiration=DEFAULT_ASPIRATION):
+    start_time = time.perf_counter()
+    start_ns = time.perf_counter_ns()
+    record = search_metrics.SearchMetrics(heuristic_method, player) if metrics is not None else None
+
+    # Look up the heuristic once, rather than at every leaf
+    evaluate = heurisitcs.get_heuristic(heuristic_method).function
+    evaluate_batch = get_batch_evaluator(heuristic_method) if batch_leaves else None
+    if record is not None and evaluate_batch is not None:
+        evaluate_batch = search_metrics.timed_evaluator(evaluate_batch, record)
+
+    # Set how deep we can go
+    if max_depth is None:
+        max_depth = DEFAULT_DEPTH if time_limit is None and node_limit is None else MAX_DEPTH
+
+    if tracer is not None:
+        tracer.start_search(player, heuristic_method)
+
+    if table is None:
+        table = default_table(player, heuristic_method)
+    table.new_search()
+    table.reset_counters()
+
+    # The search makes and unmakes moves on a single copy of the board
+    position = Position(board) if record is None else search_metrics.TimedPosition(board, record)
+    if incremental or check_incremental:
+        position.evaluator = IncrementalEvaluator(position.board, player, heuristic_method, check_incremental)
+        evaluate = position.evaluator.evaluate
+    if record is not None:
+        evaluate = search_metrics.timed_evaluator(evaluate, record)
+
+    context = SearchContext(player, 0, heuristic_method, evaluate, tracer, table, evaluate_batch)
+    context.metrics = record
+    context.tablebase = tablebase
+    context.quiescence_depth = quiescence
+    context.pvs = pvs
+    context.settings_key = zobrist.settings_key(quiescence, tablebase)
+    context.stop = stop
+    if stats is not None and stop is not None:
+        context.live_stats = stats
+    result = ()
+    depth_reached = 0
+    depth_times = []
+    depth_nodes = []  # Nodes visited by each depth
+    aspiration_failures = 0
+
+    # If the book knows the move, there is nothing to search
+    book_move = book.lookup(position.board, player) if book is not None else None
+    if book_move is not None:
+        result = book_move
+        max_depth = 0
+
+    # Likewise if the tablebase knows who wins
+    tablebase_move = None
+    if book_move is None and tablebase is not None \
+            and tablebase.covers(position.piece_counts['W'], position.piece_counts['B']):
+        best = tablebase.best_move(position.board, player)
+        if best is not None and best[1] != DRAW:
+            tablebase_move = best[0]
+            result = tablebase_move
+            max_depth = 0
+
+    for depth in range(1, max_depth + 1, 1):
+        context.depth = depth
+        if tracer is not None:
+            tracer.event('depth', depth=depth)
+
+        # Get the move
+        try:
+            if workers and depth > 1:
+                result = parallel_root_search(position.board, result, workers, context, batch_leaves,
+                                              incremental or check_incremental, check_incremental)
+            elif aspiration and depth > 1:
+                # The score is usually close to the last depth's, and a narrower window prunes more
+                alpha = max(context.root_score - aspiration, -INFINITE_SCORE)
+                beta = min(context.root_score + aspiration, INFINITE_SCORE)
+                while True:
+                    move = minimax(position, 1, alpha, beta, context)
+                    if context.root_score <= alpha and alpha > -INFINITE_SCORE:
+                        alpha = -INFINITE_SCORE
+                    elif context.root_score >= beta and beta < INFINITE_SCORE:
+                        beta = INFINITE_SCORE
+                    else:
+                        break
+
+                    # The score is only a bound, so search again with that side open
+                    aspiration_failures += 1
+                    if tracer is not None:
+                        tracer.event('aspiration', depth=depth, v=context.root_score, a=alpha, b=beta)
+                result = move
+            else:
+                result = minimax(position, 1, -INFINITE_SCORE, INFINITE_SCORE, context)
+        except SearchTimeout:
+            if tracer is not None:
+                tracer.event('timeout', depth=depth)
+            break
+
+        if tracer is not None:
+            tracer.event('depth_done', depth=depth, nodes=context.nodes)
+        depth_reached = depth
+        depth_times.append(time.perf_counter() - start_time)
+        depth_nodes.append(context.nodes - sum(depth_nodes))
+
+        if context.live_stats is not None:
+            context.live_stats["depth"] = depth
+            context.live_stats["move"] = result
+
+        if not result:
+            # No legal moves, so searching deeper will not help
+            break
+        if stop is not None and stop.is_set():
+            break
+
+        # Now that we have a move, start enforcing the limits
+        if time_limit is not None:
+            context.deadline = start_time + time_limit
+            if time.perf_counter() >= context.deadline:
+                break
+        if node_limit is not None:
+            context.node_limit = node_limit
+            if context.nodes >= node_limit:
+                break
+
+    if tracer is not None:
+        tracer.event('done', table_hit_rate=table.hit_rate(), first_move_cutoff_rate=first_move_cutoff_rate(context))
+
+    if stats is not None:
+        stats["depth"] = depth_reached
+        stats["nodes"] = context.nodes
+        stats["leaves"] = context.leaves
+        stats["cutoffs"] = context.cutoffs
+        stats["first_move_cutoff_rate"] = first_move_cutoff_rate(context)
+        stats["table_hit_rate"] = table.hit_rate()
+        stats["depth_times"] = depth_times
+        stats["book"] = book_move is not None
+        stats["tablebase"] = tablebase_move is not None
+        stats["tablebase_hits"] = context.tablebase_hits
+        stats["quiescence_nodes"] = context.quiescence_nodes
+        stats["researches"] = context.researches
+        stats["aspiration_failures"] = aspiration_failures
+
+    if record is not None:
+        record.total_ns = time.perf_counter_ns() - start_ns
+        record.move = result
+        record.depth = depth_reached
+        record.nodes = context.nodes
+        record.leaves = context.leaves
+        record.cutoffs = context.level_cutoffs[1:max(depth_reached, 1) + 1]
+        record.table_hit_rate = table.hit_rate()
+        record.book_hit = book_move is not None
+        if len(depth_nodes) > 1 and depth_nodes[-2]:
+            record.branching_factor = depth_nodes[-1] / depth_nodes[-2]
+        elif depth_nodes:
+            record.branching_factor = float(depth_nodes[-1])
+        if stats is not None:
+            stats["metrics"] = record
+        metrics.emit(record)
 
     return result
 
 
-def minimax(board, player, depth, current_level, a, b, heuristic_method, debug_flag, debug_file):
+def minimax(position, current_level, a, b, context):
+    board = position.board
+    player = context.player
+
+    # Only record this node if we are tracing and it is one of the nodes we record
+    tracer = context.tracer
+    if tracer is not None and not tracer.records(current_level, position.key):
+        tracer = None
+
+    # Stop if we have run out of time or nodes, or have been told to stop
+    visit_node(context)
+
+    # Won and lost endgames in the tablebase are scored without searching them
+    if context.tablebase is not None and current_level != 1:
+        counts = position.piece_counts
+        if context.tablebase.covers(counts['W'], counts['B']):
+            side_to_move = player if current_level % 2 != 0 else ('W' if player == 'B' else 'B')
+            entry = context.tablebase.probe(board, side_to_move)
+            if entry is not None and entry[0] != DRAW:
+                context.tablebase_hits += 1
+                score = tablebase_score(entry[0], entry[1], current_level - 1, side_to_move, player)
+                if tracer is not None:
+                    tracer.event('eval', l=current_level, h='tablebase', v=score)
+                return score
+
     # Copy alpha and beta
     alpha = a
     beta = b
 
-    # Modifier for debug file to indent farther as the depth gets greater
-    debug_modifer = ''
-    for i in range(0, current_level - 1, 1):
-        debug_modifer += '\t'
-    debug_modifer += str(current_level) + ' - '
-
-    if depth < current_level:
+    if context.depth < current_level and context.quiescence_depth:
+        # We are at the bottom of the tree, but the position may be in the middle of an exchange
+        return quiescence(position, current_level, alpha, beta, context, 0)
+    elif context.depth < current_level:
         # We are at the bottom of the tree, time to get the value of the state and propagate back up
-        heuristic_value = 0
+        context.leaves += 1
+        heuristic_value = context.evaluate(board, player)
 
-        if heuristic_method == 'simple':
-            heuristic_value = heurisitcs.simple_heuristic(board, player)
-        elif heuristic_method == 'aggressive':
-            heuristic_value = heurisitcs.aggressive_heuristic(board, player)
-        elif heuristic_method == 'defensive':
-            heuristic_value = heurisitcs.defensive_heuristic(board, player)
-        elif heuristic_method == 'stay_in_center':
-            heuristic_value = heurisitcs.stay_in_the_center_heuristic(board, player)
-
-        # Record the value of the state if we are outputting
-        if debug_flag: debug_file.write(
-            debug_modifer + f'{heuristic_method} heuristic gives value of {heuristic_value}\n')
+        # Record the value of the state if we are tracing
+        if tracer is not None:
+            tracer.event('eval', l=current_level, h=context.heuristic_method, v=heuristic_value)
 
         return heuristic_value
     else:
         # Initialize containers for best moves
-        # If we are minimizing, use 99. If maximizing, use -99 (i.e., no matter what, the heuristic will be
-        # replaced on the first move we look at)
+        # If we are minimizing, use INFINITE_SCORE. If maximizing, use -INFINITE_SCORE (i.e., no matter what, the
+        # heuristic will be replaced on the first move we look at)
         best_move = ()
-        best_heuristic = -99 if current_level % 2 != 0 else 99
+        best_heuristic = -INFINITE_SCORE if current_level % 2 != 0 else INFINITE_SCORE
         opponent = 'W' if player == 'B' else 'B'
         current_player = player if current_level % 2 != 0 else opponent
 
-        try:
-            # For each player piece, for each possible move, recursively call minimax() with current_level + 1
-            for x in range(0, 8, 1):
-                for y in range(0, 8, 1):
-                    # When odd, consider your moves. When even, consider opponent moves
-                    if board[y][x] == current_player:
-                        # Generate every possible move this piece can do (limit search to just row and column)
-
-                        # Check vertical moves
-                        for newY in range(0, 8, 1):
-                            # Make a new move
-                            current_move = (x, y, x, newY)
-
-                            if debug_flag:
-                                debug_file.write(
-                                    '{0} Considering {1}\n'.format(debug_modifer, str(current_move)))
-
-                            # If it is a valid move, 
-                            if func.is_valid_move(board, current_player, current_move):
-                                current_heuristic = minimax(func.make_move(board, current_player, current_move), player,
-                                                            depth, current_level + 1, alpha, beta, heuristic_method,
-                                                            debug_flag, debug_file)
-
-                                if current_level % 2 != 0:
-                                    # Odd level, so maximize
-
-                                    # Get max we have seen at this node and what we just saw
-                                    if current_heuristic > best_heuristic:
-                                        if debug_flag: debug_file.write(
-                                            debug_modifer + str(current_move) + ' is better than ' + str(
-                                                best_move) + f'({str(current_heuristic)} > {str(best_heuristic)})\n')
-                                        best_move = current_move
-                                        best_heuristic = current_heuristic
-
-                                    # See if best we have seen at this node is better than alpha
-                                    if best_heuristic > alpha:
-                                        alpha = best_heuristic
-
-                                    # If alpha >= beta, we can prune
-                                    if alpha >= beta:
-                                        if debug_flag: debug_file.write(
-                                            debug_modifer + f'{alpha} >= {beta} PRUNING BRANCH\n')
-                                        raise PruneBranch
-                                else:
-                                    # Even level, so minimize
-                                    if current_heuristic < best_heuristic:
-                                        if debug_flag: debug_file.write(
-                                            debug_modifer + str(current_move) + ' is better than ' + str(
-                                                best_move) + f'({str(current_heuristic)} < {str(best_heuristic)})\n')
-                                        best_move = current_move
-                                        best_heuristic = current_heuristic
-
-                                    # See if worse we have seen at this node is worse than beta
-                                    if best_heuristic < beta:
-                                        beta = best_heuristic
-
-                                    # If alpha >= beta, we can prune
-                                    if alpha >= beta:
-                                        if debug_flag: debug_file.write(
-                                            f'{0}{alpha} >= {beta} PRUNING BRANCH\n'.format(debug_modifer))
-                                        raise PruneBranch
-                            else:
-                                if debug_flag: debug_file.write(
-                                    '{0}{1} is not a valid move\n'.format(debug_modifer, str(current_move)))
-
-                                # Check horizontal moves
-                        for newX in range(0, 8, 1):
-                            # Make a new move
-                            current_move = (x, y, newX, y)
-
-                            if debug_flag: debug_file.write(debug_modifer + ' Considering ' + str(current_move) + '\n')
-
-                            # If it is a valid move
-                            if func.is_valid_move(board, current_player, current_move):
-                                current_heuristic = minimax(func.make_move(board, current_player, current_move), player,
-                                                            depth, current_level + 1, alpha, beta, heuristic_method,
-                                                            debug_flag, debug_file)
-
-                                if current_level % 2 != 0:
-                                    # Odd level, so maximize
-
-                                    # Get max we have seen at this node and what we just saw
-                                    if current_heuristic > best_heuristic:
-                                        if debug_flag: debug_file.write(
-                                            debug_modifer + str(current_move) + ' is better than ' + str(
-                                                best_move) + f'({str(current_heuristic)} > {str(best_heuristic)})\n')
-                                        best_move = current_move
-                                        best_heuristic = current_heuristic
-
-                                    # See if best we have seen at this node is better than alpha
-                                    if best_heuristic > alpha:
-                                        alpha = best_heuristic
-
-                                    # If alpha >= beta, we can prune
-                                    if alpha >= beta:
-                                        if debug_flag: debug_file.write(
-                                            debug_modifer + f'{alpha} >= {beta} PRUNING BRANCH\n')
-                                        raise PruneBranch
-                                else:
-                                    # Even level, so minimize
-                                    if current_heuristic < best_heuristic:
-                                        if debug_flag: debug_file.write(
-                                            debug_modifer + str(current_move) + ' is better than ' + str(
-                                                best_move) + f'({str(current_heuristic)} < {str(best_heuristic)})\n')
-                                        best_move = current_move
-                                        best_heuristic = current_heuristic
-
-                                    # See if worst we have seen at this node is worse than beta
-                                    if best_heuristic < beta:
-                                        beta = best_heuristic
-
-                                    # If alpha >= beta, we can prune
-                                    if alpha >= beta:
-                                        if debug_flag: debug_file.write(
-                                            debug_modifer + f'{alpha} >= {beta} PRUNING BRANCH\n')
-                                        raise PruneBranch
-                            else:
-                                if debug_flag: debug_file.write(
-                                    debug_modifer + str(current_move) + 'is not a valid move\n')
-        except PruneBranch:
-            # Used to jump out of all of the loops if we are pruning a branch
-            pass
-
-            # If we are propagating, return the best heuristic
+        # See if we have already searched this position at least as deep as we are about to
+        remaining_depth = context.depth - current_level + 1
+        key = zobrist.with_side_to_move(position.key, current_player) ^ context.settings_key
+        entry = context.table.probe(key)
+        table_move = None
+
+        if entry is not None:
+            table_move = entry[transposition.MOVE]
+
+            # At the top of the tree we need a move rather than a score, so only use the entry for ordering
+            if current_level != 1 and entry[transposition.DEPTH] >= remaining_depth:
+                table_score = from_table_score(entry[transposition.SCORE], current_level - 1)
+                table_flag = entry[transposition.FLAG]
+
+                if table_flag == transposition.EXACT:
+                    return table_score
+                elif table_flag == transposition.LOWER_BOUND and table_score > alpha:
+                    alpha = table_score
+                elif table_flag == transposition.UPPER_BOUND and table_score < beta:
+                    beta = table_score
+
+                if alpha >= beta:
+                    if tracer is not None:
+                        tracer.event('prune', l=current_level, a=alpha, b=beta, tt=True)
+                    return table_score
+
+        # The window we actually search with, used to tell if the result is exact
+        search_alpha = alpha
+        search_beta = beta
+
+        if context.evaluate_batch is not None and remaining_depth == 1 and context.tablebase is None \
+                and not context.quiescence_depth:
+            # Every child is a leaf, so score them all at once instead of searching them one at a time below.
+            # Not with a tablebase or quiescence, since their leaves are looked at one at a time
+            best_move, best_heuristic = evaluate_frontier(position, current_level, current_player, context, tracer)
+            moves = ()
+        else:
+            # Try the moves most likely to be good first, so we can prune sooner
+            killers = context.killers[current_level]
+            history = context.history[current_player]
+            moves = ordered_moves(board, current_player, table_move, killers, history)
+            if context.metrics is not None:
+                moves = search_metrics.timed_moves(moves, context.metrics)
+
+        # For each legal move, recursively call minimax() with current_level + 1
+        # When odd, consider your moves. When even, consider opponent moves
+        for move_number, current_move in enumerate(moves):
+            if tracer is not None:
+                tracer.event('consider', l=current_level, m=current_move)
+
+            position.make(current_player, current_move)
+            if context.pvs and move_number > 0 and beta - alpha > NULL_WINDOW:
+                # Only check the move is no better than the best so far, and search it properly if it is
+                if current_level % 2 != 0:
+                    current_heuristic = minimax(position, current_level + 1, alpha, alpha + NULL_WINDOW, context)
+                else:
+                    current_heuristic = minimax(position, current_level + 1, beta - NULL_WINDOW, beta, context)
+                if alpha < current_heuristic < beta:
+                    context.researches += 1
+                    if tracer is not None:
+                        tracer.event('research', l=current_level, m=current_move, v=current_heuristic)
+                    current_heuristic = minimax(position, current_level + 1, alpha, beta, context)
+            else:
+                current_heuristic = minimax(position, current_level + 1, alpha, beta, context)
+            position.unmake()
+
+            if current_level % 2 != 0:
+                # Odd level, so maximize
+
+                # Get max we have seen at this node and what we just saw
+                if current_heuristic > best_heuristic:
+                    if tracer is not None:
+                        tracer.event('better', l=current_level, m=current_move, old_m=best_move or None,
+                                     v=current_heuristic, old_v=best_heuristic, max=True)
+                    best_move = current_move
+                    best_heuristic = current_heuristic
+
+                # See if best we have seen at this node is better than alpha
+                if best_heuristic > alpha:
+                    alpha = best_heuristic
+            else:
+                # Even level, so minimize
+                if current_heuristic < best_heuristic:
+                    if tracer is not None:
+                        tracer.event('better', l=current_level, m=current_move, old_m=best_move or None,
+                                     v=current_heuristic, old_v=best_heuristic, max=False)
+                    best_move = current_move
+                    best_heuristic = current_heuristic
+
+                # See if worst we have seen at this node is worse than beta
+                if best_heuristic < beta:
+                    beta = best_heuristic
+
+            # If alpha >= beta, we can prune
+            if alpha >= beta:
+                if tracer is not None:
+                    tracer.event('prune', l=current_level, a=alpha, b=beta)
+
+                # Remember the move that let us prune, so we try it early in similar positions
+                context.cutoffs += 1
+                context.level_cutoffs[current_level] += 1
+                if move_number == 0:
+                    context.first_move_cutoffs += 1
+                if not movegen.is_capture(board, current_player, current_move):
+                    if current_move != killers[0]:
+                        killers[1] = killers[0]
+                        killers[0] = current_move
+                    history[current_move] = history.get(current_move, 0) + remaining_depth * remaining_depth
+                break
+
+        # With no legal moves the side to move has lost, scored like a tablebase loss
+        if not best_move:
+            best_heuristic = tablebase_score(LOSS, 0, current_level - 1, current_player, player)
+
+        # Remember what we found. If we went outside of the window the score is only a bound
+        if best_heuristic <= search_alpha:
+            table_flag = transposition.UPPER_BOUND
+        elif best_heuristic >= search_beta:
+            table_flag = transposition.LOWER_BOUND
+        else:
+            table_flag = transposition.EXACT
+        context.table.store(key, remaining_depth, to_table_score(best_heuristic, current_level - 1), table_flag,
+                            best_move or None)
+
+        # If we are propagating, return the best heuristic
         # If we are done propagating, return the best move we found
         if current_level == 1:
-            if debug_flag: debug_file.write(
-                debug_modifer + 'Best move: ' + str(best_move) + ' with Heuristic ' + str(best_heuristic) + '\n')
+            if tracer is not None:
+                tracer.event('best', l=current_level, m=best_move or None, v=best_heuristic)
+            context.root_score = best_heuristic
             return best_move
 
         else:
-            if debug_flag: debug_file.write(
-                debug_modifer + 'Best Heuristic at level ' + str(current_level) + ': ' + str(best_heuristic) + '\n')
+            if tracer is not None:
+                tracer.event('best', l=current_level, v=best_heuristic)
             return best_heuristic
+
+
+# Carries on below the bottom of the tree with captures only, until the position
+# is quiet, so a leaf is never scored in the middle of an exchange. The side to
+# move can always decline to capture (stand pat) and take the heuristic's score
+# for the position instead, which bounds the score from its side. Stops after
+# context.quiescence_depth captures. quiescence_level is how many captures deep we are
+def quiescence(position, current_level, a, b, context, quiescence_level):
+    board = position.board
+    player = context.player
+    if quiescence_level > 0:
+        visit_node(context)
+        context.quiescence_nodes += 1
+
+    alpha = a
+    beta = b
+    maximizing = current_level % 2 != 0
+
+    context.leaves += 1
+    stand_pat = context.evaluate(board, player)
+    if context.tracer is not None and context.tracer.records(current_level, position.key):
+        context.tracer.event('eval', l=current_level, h=context.heuristic_method, v=stand_pat)
+    if quiescence_level >= context.quiescence_depth:
+        return stand_pat
+
+    # Standing pat is already good enough for the side to move to prune
+    if maximizing:
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+    else:
+        if stand_pat <= alpha:
+            return stand_pat
+        beta = min(beta, stand_pat)
+
+    current_player = player if maximizing else ('W' if player == 'B' else 'B')
+
+    # If the opponent's last move left us a capture, every move takes it
+    last_move = position.last_move()
+    if last_move is not None and movegen.has_waiting_capture(board, current_player, last_move[2], last_move[3]):
+        moves = movegen.legal_moves(board, current_player)
+    else:
+        moves = movegen.capture_moves(board, current_player)
+
+    best_heuristic = stand_pat
+    for current_move in moves:
+        position.make(current_player, current_move)
+        current_heuristic = quiescence(position, current_level + 1, alpha, beta, context, quiescence_level + 1)
+        position.unmake()
+
+        if maximizing:
+            if current_heuristic > best_heuristic:
+                best_heuristic = current_heuristic
+            if best_heuristic > alpha:
+                alpha = best_heuristic
+        else:
+            if current_heuristic < best_heuristic:
+                best_heuristic = current_heuristic
+            if best_heuristic < beta:
+                beta = best_heuristic
+
+        if alpha >= beta:
+            break
+
+    return best_heuristic
+
+
+# Returns the process pool and shared score for a parallel search with the given number of workers
+def get_worker_pool(workers):
+    if workers not in worker_pools:
+        shared_alpha = multiprocessing.Value('i', -INFINITE_SCORE)
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                                      initargs=(shared_alpha,))
+        worker_pools[workers] = (pool, shared_alpha)
+    return worker_pools[workers]
+
+
+# Shuts down every worker pool that has been started
+def shutdown_worker_pools():
+    for pool, shared_alpha in worker_pools.values():
+        pool.shutdown()
+    worker_pools.clear()
+
+
+# Runs in each worker process when it starts
+def init_worker(shared_alpha):
+    global worker_alpha
+    worker_alpha = shared_alpha
+    worker_tables.clear()
+
+
+# In a worker process, returns its transposition table for player and heuristic_method
+def worker_table(player, heuristic_method):
+    if (player, heuristic_method) not in worker_tables:
+        worker_tables[(player, heuristic_method)] = transposition.TranspositionTable(WORKER_TABLE_SIZE)
+    return worker_tables[(player, heuristic_method)]
+
+
+# Searches the moves at the top of the tree in parallel and returns the best one.
+# The moves are dealt out in order to one batch per worker, so every worker starts
+# on one of the most promising moves, and each worker searches its batch one move
+# after another with its own transposition table. Each move starts with the best
+# score any worker has finished with so far, so later moves can be pruned against it.
+#
+# The result does not depend on timing. A worker searches with a window one below
+# the shared score, so every move that could tie the best score gets an exact
+# score, and the first of the best moves in move order wins. That order is the
+# generated order, with the best move from the last depth first
+def parallel_root_search(board, previous_best_move, workers, context, batch_leaves=False, incremental=False,
+                         check_incremental=False):
+    pool, shared_alpha = get_worker_pool(workers)
+    player = context.player
+
+    moves = movegen.legal_moves(board, player)
+    if previous_best_move in moves:
+        moves.remove(previous_best_move)
+        moves.insert(0, previous_best_move)
+
+    # Workers use the wall clock for the deadline, since perf_counter() values are only meaningful in this process
+    deadline = None
+    if context.deadline is not None:
+        deadline = time.time() + context.deadline - time.perf_counter()
+
+    shared_alpha.value = -INFINITE_SCORE
+    tablebase_directory = context.tablebase.directory if context.tablebase is not None else None
+    batches = [moves[first::workers] for first in range(0, min(workers, len(moves)), 1)]
+    futures = [pool.submit(search_root_moves, board, player, context.heuristic_method, batch, context.depth, deadline,
+                           batch_leaves, incremental, check_incremental, context.metrics is not None,
+                           tablebase_directory, context.quiescence_depth, context.pvs) for batch in batches]
+
+    scores = dict()
+    for batch, future in zip(batches, futures):
+        batch_scores, counts = future.result()
+        add_worker_counts(context, counts)
+
+        if batch_scores is None:
+            # This worker ran out of time, so the others will too
+            for other_future in futures:
+                other_future.cancel()
+            raise SearchTimeout
+
+        scores.update(zip(batch, batch_scores))
+
+    best_move = ()
+    best_heuristic = -INFINITE_SCORE
+    for move in moves:
+        current_heuristic = scores[move]
+        if context.tracer is not None:
+            context.tracer.event('parallel', l=1, m=move, v=current_heuristic)
+
+        if current_heuristic > best_heuristic:
+            best_move = move
+            best_heuristic = current_heuristic
+
+    return best_move
+
+
+# The counts a worker sends back with its score: nodes, cutoffs, first move
+# cutoffs, leaves, cutoffs at each level, tablebase hits, quiescence nodes,
+# re-searches and, if it was timed, its search_metrics.SearchMetrics
+def worker_counts(context):
+    return (context.nodes, context.cutoffs, context.first_move_cutoffs, context.leaves, context.level_cutoffs,
+            context.tablebase_hits, context.quiescence_nodes, context.researches, context.metrics)
+
+
+# Adds the counts sent back by a worker (see worker_counts) to our own
+def add_worker_counts(context, counts):
+    (nodes, cutoffs, first_move_cutoffs, leaves, level_cutoffs, tablebase_hits, quiescence_nodes, researches,
+     metrics) = counts
+    context.nodes += nodes
+    context.cutoffs += cutoffs
+    context.first_move_cutoffs += first_move_cutoffs
+    context.leaves += leaves
+    context.tablebase_hits += tablebase_hits
+    context.quiescence_nodes += quiescence_nodes
+    context.researches += researches
+    for level, level_count in enumerate(level_cutoffs):
+        context.level_cutoffs[level] += level_count
+    if context.metrics is not None and metrics is not None:
+        context.metrics.movegen_ns += metrics.movegen_ns
+        context.metrics.make_ns += metrics.make_ns
+        context.metrics.eval_ns += metrics.eval_ns
+
+
+# Runs in a worker process. Searches the tree under each of moves at the top of
+# the tree, one after another, and returns their scores in the same order (None
+# if we ran out of time) along with the counts of how the search went (see
+# worker_counts). If timed is set, the time spent in each phase of the search is
+# counted too. Endgames are looked up in the tablebase in tablebase_directory, if
+# it is given, and quiescence and pvs are passed on from get_next_move
+def search_root_moves(board, player, heuristic_method, moves, depth, deadline, batch_leaves=False, incremental=False,
+                      check_incremental=False, timed=False, tablebase_directory=None, quiescence=0, pvs=False):
+    record = search_metrics.SearchMetrics(heuristic_method, player) if timed else None
+    position = Position(board) if record is None else search_metrics.TimedPosition(board, record)
+    evaluate = heurisitcs.get_heuristic(heuristic_method).function
+    evaluate_batch = get_batch_evaluator(heuristic_method) if batch_leaves else None
+    if incremental:
+        position.evaluator = IncrementalEvaluator(position.board, player, heuristic_method, check_incremental)
+        evaluate = position.evaluator.evaluate
+    if record is not None:
+        evaluate = search_metrics.timed_evaluator(evaluate, record)
+        if evaluate_batch is not None:
+            evaluate_batch = search_metrics.timed_evaluator(evaluate_batch, record)
+    table = worker_table(player, heuristic_method)
+    table.new_search()
+
+    context = SearchContext(player, depth, heuristic_method, evaluate, None, table, evaluate_batch)
+    context.metrics = record
+    if tablebase_directory is not None:
+        context.tablebase = open_tablebase(tablebase_directory)
+    context.quiescence_depth = quiescence
+    context.pvs = pvs
+    context.settings_key = zobrist.settings_key(quiescence, tablebase_directory)
+    if deadline is not None:
+        context.deadline = time.perf_counter() + deadline - time.time()
+
+    scores = []
+    for move in moves:
+        # One below the shared score, so a move that ties it still gets an exact score
+        alpha = worker_alpha.value - 1
+
+        position.make(player, move)
+        try:
+            score = minimax(position, 2, alpha, INFINITE_SCORE, context)
+        except SearchTimeout:
+            return None, worker_counts(context)
+        position.unmake()
+        scores.append(score)
+
+        # Only an exact score is safe to share, a score at or below alpha is just a bound
+        if score > alpha:
+            with worker_alpha.get_lock():
+                if score > worker_alpha.value:
+                    worker_alpha.value = score
+
+    return scores, worker_counts(context)
@@ -0,0 +1,187 @@
+"""
+    movegen.py
+
+    Description:
+    Legal move generation. Every piece slides in a straight line until it reaches
+    the edge of the board or another piece, so the moves of a piece are found by
+    walking outward from it in the four directions and stopping at the first
+    blocker. Only legal moves are ever produced.
+
+    Moves are produced in the same order the minimax used to try them in: column
+    by column, top to bottom, and for each piece its vertical moves (top to bottom)
+    before its horizontal moves (left to right)
+"""
+
+
+# Generates every legal move of the piece at (x, y)
+def generate_piece_moves(board, x, y):
+    column_top = y
+    while column_top > 0 and board[column_top - 1][x] == ' ':
+        column_top -= 1
+    for new_y in range(column_top, y, 1):
+        yield (x, y, x, new_y)
+
+    new_y = y + 1
+    while new_y < 8 and board[new_y][x] == ' ':
+        yield (x, y, x, new_y)
+        new_y += 1
+
+    row = board[y]
+    row_left = x
+    while row_left > 0 and row[row_left - 1] == ' ':
+        row_left -= 1
+    for new_x in range(row_left, x, 1):
+        yield (x, y, new_x, y)
+
+    new_x = x + 1
+    while new_x < 8 and row[new_x] == ' ':
+        yield (x, y, new_x, y)
+        new_x += 1
+
+
+# Generates every legal move player can make
+def generate_moves(board, player):
+    for x in range(0, 8, 1):
+        for y in range(0, 8, 1):
+            if board[y][x] == player:
+                yield from generate_piece_moves(board, x, y)
+
+
+# Returns a list of every legal move player can make
+def legal_moves(board, player):
+    return list(generate_moves(board, player))
+
+
+# Checks if player can make the given move. Equivalent to func.is_valid_move
+def is_legal_move(board, player, move):
+    if board[move[1]][move[0]] != player:
+        return False
+    return tuple(move) in generate_piece_moves(board, move[0], move[1])
+
+
+# Checks if a move would capture anything, without making it. Only captures the
+# move itself completes are found (those on the row and column through where the
+# piece lands), not captures the opponent's last move left waiting to be taken
+def is_capture(board, player, move):
+    start_x, start_y, x, y = move
+    opponent = 'W' if player == 'B' else 'B'
+
+    for step_x, step_y in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+        # Custodian: a series of opponent pieces next to us, followed by another of our pieces
+        cur_x, cur_y = x + step_x, y + step_y
+        while 0 <= cur_x < 8 and 0 <= cur_y < 8 and board[cur_y][cur_x] == opponent:
+            cur_x += step_x
+            cur_y += step_y
+        if (cur_x, cur_y) != (x + step_x, y + step_y) and 0 <= cur_x < 8 and 0 <= cur_y < 8 \
+                and board[cur_y][cur_x] == player and (cur_x, cur_y) != (start_x, start_y):
+            return True
+
+    for step_x, step_y in ((0, 1), (1, 0)):
+        # Intervention: a series of our pieces through where we land, with an opponent piece at both ends.
+        # The square we moved from is empty after the move, so it ends the series
+        ends = []
+        for direction in (-1, 1):
+            cur_x, cur_y = x + step_x * direction, y + step_y * direction
+            while 0 <= cur_x < 8 and 0 <= cur_y < 8 and board[cur_y][cur_x] == player \
+                    and (cur_x, cur_y) != (start_x, start_y):
+                cur_x += step_x * direction
+                cur_y += step_y * direction
+            ends.append(0 <= cur_x < 8 and 0 <= cur_y < 8 and board[cur_y][cur_x] == opponent)
+        if ends[0] and ends[1]:
+            return True
+
+    return False
+
+
+# Returns every empty square where one of player's pieces would complete a
+# capture by landing there, ignoring the square it came from. Leaving a square can
+# only break a capture, so a move landing anywhere else is not a capture
+def capture_landings(board, player):
+    opponent = 'W' if player == 'B' else 'B'
+    landings = set()
+
+    for y in range(0, 8, 1):
+        for x in range(0, 8, 1):
+            piece = board[y][x]
+            if piece == ' ':
+                continue
+
+            # From one of our pieces, a custodian capture lands just past a series of opponent pieces.
+            # From an opponent piece, an intervention capture lands in a series of our pieces ending
+            # in another opponent piece
+            run_piece = opponent if piece == player else player
+            for step_x, step_y in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+                cur_x, cur_y = x + step_x, y + step_y
+                while 0 <= cur_x < 8 and 0 <= cur_y < 8 and board[cur_y][cur_x] == run_piece:
+                    cur_x += step_x
+                    cur_y += step_y
+                if not (0 <= cur_x < 8 and 0 <= cur_y < 8) or board[cur_y][cur_x] != ' ':
+                    continue
+
+                if piece == player:
+                    if (cur_x, cur_y) != (x + step_x, y + step_y):
+                        landings.add((cur_x, cur_y))
+                else:
+                    end_x, end_y = cur_x + step_x, cur_y + step_y
+                    while 0 <= end_x < 8 and 0 <= end_y < 8 and board[end_y][end_x] == player:
+                        end_x += step_x
+                        end_y += step_y
+                    if 0 <= end_x < 8 and 0 <= end_y < 8 and board[end_y][end_x] == opponent:
+                        landings.add((cur_x, cur_y))
+
+    return landings
+
+
+# Returns every legal move of player that captures something (see is_capture),
+# in sorted order. Only the squares a capture can land on are looked at, by
+# walking out from each of them to the first piece in every direction, so the
+# rest of the moves are never generated
+def capture_moves(board, player):
+    moves = []
+
+    for x, y in capture_landings(board, player):
+        for step_x, step_y in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+            cur_x, cur_y = x + step_x, y + step_y
+            while 0 <= cur_x < 8 and 0 <= cur_y < 8 and board[cur_y][cur_x] == ' ':
+                cur_x += step_x
+                cur_y += step_y
+            if 0 <= cur_x < 8 and 0 <= cur_y < 8 and board[cur_y][cur_x] == player:
+                move = (cur_x, cur_y, x, y)
+                if is_capture(board, player, move):
+                    moves.append(move)
+
+    moves.sort()
+    return moves
+
+
+# Checks if the opponent's piece that just landed on (x, y) left player a capture
+# to take, in which case every move player makes captures it. The landing piece is
+# either in a series of opponent pieces with one of player's pieces at both ends,
+# or at one end of a series of player's pieces with another opponent piece at the
+# other end. Vacating a square never leaves a capture, so no other piece can
+def has_waiting_capture(board, player, x, y):
+    opponent = board[y][x]
+
+    for step_x, step_y in ((0, 1), (1, 0)):
+        # Custodian: the series of opponent pieces through the landing square, with our pieces at both ends
+        ends = []
+        for direction in (-1, 1):
+            cur_x, cur_y = x + step_x * direction, y + step_y * direction
+            while 0 <= cur_x < 8 and 0 <= cur_y < 8 and board[cur_y][cur_x] == opponent:
+                cur_x += step_x * direction
+                cur_y += step_y * direction
+            ends.append(0 <= cur_x < 8 and 0 <= cur_y < 8 and board[cur_y][cur_x] == player)
+        if ends[0] and ends[1]:
+            return True
+
+    for step_x, step_y in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+        # Intervention: a series of our pieces next to the landing square, followed by another opponent piece
+        cur_x, cur_y = x + step_x, y + step_y
+        while 0 <= cur_x < 8 and 0 <= cur_y < 8 and board[cur_y][cur_x] == player:
+            cur_x += step_x
+            cur_y += step_y
+        if (cur_x, cur_y) != (x + step_x, y + step_y) and 0 <= cur_x < 8 and 0 <= cur_y < 8 \
+                and board[cur_y][cur_x] == opponent:
+            return True
+
+    return False
@@ -0,0 +1,225 @@
+"""
+    opening_book.py
+
+    Description:
+    Opening books, so the engine does not spend its whole search budget on the
+    same first few moves game after game. A book is built offline for one
+    heuristic by playing games against itself over the first few plies and
+    searching every position they reach much deeper than a game would. The first
+    few moves of every game but the first are random, like the tournament runner's
+    openings, so the book covers more than a single line.
+
+    A book file is a header followed by one fixed size entry per position,
+    sorted by the position's Zobrist key (with the side to move, see zobrist.py).
+    It is opened with mmap, so looking a position up is a binary search over the
+    file that only reads the entries it visits, and nothing is loaded up front.
+
+    Pass an OpeningBook as the book argument of minimax.get_next_move and it plays
+    the book move, when there is one, instead of searching. default_book finds the
+    book built for a heuristic in the books folder next to this file. To build one:
+    > `python3 opening_book.py simple --plies 8 --depth 5 --games 50`
+"""
+
+import argparse
+import concurrent.futures
+import mmap
+import os
+import random
+import struct
+import time
+import heurisitcs
+import minimax
+import movegen
+import zobrist
+from game_state import GameState
+
+MAGIC = b'SQZBOOK1'
+
+# Header: magic and number of entries
+HEADER = struct.Struct('<8sQ')
+
+# Entry: key, packed move (see pack_move) and the depth it was searched to
+ENTRY = struct.Struct('<QHH')
+
+# Books made by default_book live here, one per heuristic
+BOOK_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'books')
+
+# Books default_book has opened, by heuristic. None if the heuristic has no book
+default_books = dict()
+
+
+# Packs a move into 12 bits, 3 per coordinate
+def pack_move(move):
+    return move[0] | (move[1] << 3) | (move[2] << 6) | (move[3] << 9)
+
+
+def unpack_move(packed):
+    return packed & 7, (packed >> 3) & 7, (packed >> 6) & 7, (packed >> 9) & 7
+
+
+# The key a position is stored under
+def position_key(board, player):
+    return zobrist.with_side_to_move(zobrist.hash_board(board), player)
+
+
+class OpeningBook:
+    """A book file opened with mmap"""
+
+    __slots__ = ('path', 'file', 'map', 'count', 'lookups', 'hits')
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped
+            self.file.close()
+            raise ValueError('{0} is not an opening book'.format(path))
+
+        magic, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or len(self.map) != HEADER.size + self.count * ENTRY.size:
+            self.close()
+            raise ValueError('{0} is not an opening book'.format(path))
+
+        self.lookups = 0
+        self.hits = 0
+
+    # Returns the (move, depth) stored for key, or None if it is not in the book
+    def probe(self, key):
+        low = 0
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry_key, move, depth = ENTRY.unpack_from(self.map, HEADER.size + middle * ENTRY.size)
+            if entry_key < key:
+                low = middle + 1
+            elif entry_key > key:
+                high = middle
+            else:
+                return unpack_move(move), depth
+        return None
+
+    # Returns the book move for player on board, or None if there is none. The
+    # move is checked to be legal, in case two positions share a key
+    def lookup(self, board, player):
+        self.lookups += 1
+        entry = self.probe(position_key(board, player))
+        if entry is None or not movegen.is_legal_move(board, player, entry[0]):
+            return None
+        self.hits += 1
+        return entry[0]
+
+    # Fraction of lookups that found a move
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    # Every (key, move, depth) in the book, in key order
+    def entries(self):
+        for index in range(0, self.count, 1):
+            key, move, depth = ENTRY.unpack_from(self.map, HEADER.size + index * ENTRY.size)
+            yield key, unpack_move(move), depth
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# Writes a book holding entries, a dict of (move, depth) by key. The file is
+# replaced in one step, so a book that is open elsewhere is never half written
+def write_book(path, entries):
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as book_file:
+        book_file.write(HEADER.pack(MAGIC, len(entries)))
+        for key in sorted(entries):
+            move, depth = entries[key]
+            book_file.write(ENTRY.pack(key, pack_move(move), depth))
+    os.replace(temporary_path, path)
+
+
+def book_path(heuristic_method, directory=BOOK_DIRECTORY):
+    return os.path.join(directory, heuristic_method + '.book')
+
+
+# Returns the book built for heuristic_method in the books folder, or None if it has not been built
+def default_book(heuristic_method):
+    if heuristic_method not in default_books:
+        path = book_path(heuristic_method)
+        default_books[heuristic_method] = OpeningBook(path) if os.path.exists(path) else None
+    return default_books[heuristic_method]
+
+
+# Runs in a worker process. Searches one book position
+def search_position(board, player, heuristic_method, depth):
+    return minimax.get_next_move(board, player, heuristic_method, max_depth=depth)
+
+
+# Plays games games of heuristic_method against itself over the first plies
+# plies, searching every position reached to depth, and returns the entries of
+# the book. The first random_plies moves of every game but the first are random,
+# picked with seed. The positions of each ply are searched across workers processes
+def build_book(heuristic_method, plies=8, depth=5, games=50, random_plies=4, seed=5368, workers=None,
+               progress=None):
+    entries = dict()
+    # (game number, state, random moves) of every game still being played
+    playing = [(game, GameState(), random.Random(seed + game)) for game in range(0, games, 1)]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        for ply in range(0, plies, 1):
+            playing = [game for game in playing if not game[1].game_over()]
+
+            # Search every position we have not seen yet, once
+            searches = dict()
+            for game, state, game_random in playing:
+                key = position_key(state.board, state.current_player)
+                if key not in entries and key not in searches:
+                    searches[key] = pool.submit(search_position, state.board, state.current_player,
+                                                heuristic_method, depth)
+            for key, future in searches.items():
+                move = future.result()
+                if move:
+                    entries[key] = (move, depth)
+
+            if progress is not None:
+                progress(ply + 1, plies, len(entries))
+
+            # Move every game on, randomly at first and then with the book move
+            for game, state, game_random in playing:
+                key = position_key(state.board, state.current_player)
+                if game > 0 and ply < random_plies:
+                    state.make_move(game_random.choice(state.legal_moves()))
+                elif key in entries:
+                    state.make_move(entries[key][0])
+
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Builds an opening book for a heuristic from self-play')
+    parser.add_argument('heuristic', help='heuristic to build the book for')
+    parser.add_argument('--plies', type=int, default=8, help='plies from the start to cover (default 8)')
+    parser.add_argument('--depth', type=int, default=5, help='depth to search each position to (default 5)')
+    parser.add_argument('--games', type=int, default=50, help='self-play games (default 50)')
+    parser.add_argument('--random-plies', type=int, default=4,
+                        help='random moves at the start of every game but the first (default 4)')
+    parser.add_argument('--seed', type=int, default=5368, help='seed for the random moves (default 5368)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default one per CPU)')
+    parser.add_argument('--out', default=None, help='book file to write (default books/<heuristic>.book)')
+    args = parser.parse_args()
+
+    heurisitcs.get_heuristic(args.heuristic)
+    path = args.out if args.out is not None else book_path(args.heuristic)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def progress(ply, plies, positions):
+        print('\rPly {0}/{1}: {2} positions'.format(ply, plies, positions), end='', flush=True)
+
+    start = time.perf_counter()
+    entries = build_book(args.heuristic, args.plies, args.depth, args.games, args.random_plies, args.seed,
+                         args.workers, progress)
+    write_book(path, entries)
+    print('\nWrote {0} positions to {1} in {2:.1f} seconds'.format(len(entries), path, time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+    position.py
+
+    Description:
+    A mutable Squeeze-It position used by the minimax. Moves are applied to the
+    board in place and every captured piece is recorded on an undo stack, so the
+    search can walk the whole tree with a single board instead of copying it for
+    every node.
+
+    A Position can also keep an incremental.IncrementalEvaluator up to date as
+    moves are made and unmade
+"""
+
+import func
+import zobrist
+
+
+class Position:
+    """A board that can make and unmake moves in place"""
+
+    __slots__ = ('board', 'previous_move', 'undo_stack', 'key', 'evaluator', 'piece_counts')
+
+    # board is copied, so the caller's board is never changed. previous_move is the
+    # move that led to this board, if it is known (see func.make_move). evaluator is
+    # an incremental.IncrementalEvaluator for board, if there is one
+    def __init__(self, board, previous_move=None, evaluator=None):
+        self.board = [row[:] for row in board]
+        self.previous_move = previous_move
+        self.undo_stack = []
+        self.evaluator = evaluator
+
+        # Zobrist key of the board (without the side to move), kept up to date by make and unmake
+        self.key = zobrist.hash_board(self.board)
+
+        # Number of pieces each player has, kept up to date by make and unmake
+        self.piece_counts = dict([('W', sum(row.count('W') for row in self.board)),
+                                  ('B', sum(row.count('B') for row in self.board))])
+
+    # The move that led to the current board
+    def last_move(self):
+        if self.undo_stack:
+            return self.undo_stack[-1][1]
+        return self.previous_move
+
+    # Applies a move for player, resolving any captures. The move is assumed to be
+    # valid (see func.is_valid_move). Returns the list of captured squares
+    def make(self, player, move):
+        board = self.board
+        last_move = self.last_move()
+
+        board[move[1]][move[0]] = ' '
+        board[move[3]][move[2]] = player
+
+        if last_move is None:
+            captured = func.resolve_captures(board, player, func.ALL_LINES, func.ALL_LINES)
+        else:
+            captured = func.resolve_captures(board, player, {move[2], last_move[2]}, {move[3], last_move[3]})
+
+        # Update the key with the moved piece and every captured piece
+        player_keys = zobrist.PIECE_KEYS[player]
+        opponent_keys = zobrist.PIECE_KEYS['W' if player == 'B' else 'B']
+        key = self.key ^ player_keys[move[1] * 8 + move[0]] ^ player_keys[move[3] * 8 + move[2]]
+        if captured:
+            for x, y in captured:
+                key ^= opponent_keys[y * 8 + x]
+            self.piece_counts['W' if player == 'B' else 'B'] -= len(captured)
+
+        self.undo_stack.append((player, move, captured, self.key))
+        self.key = key
+
+        if self.evaluator is not None:
+            self.evaluator.make(board, player, move, captured)
+
+        return captured
+
+    # Takes back the last move made, restoring the board exactly
+    def unmake(self):
+        player, move, captured, self.key = self.undo_stack.pop()
+        board = self.board
+        opponent = 'W' if player == 'B' else 'B'
+
+        for x, y in captured:
+            board[y][x] = opponent
+        if captured:
+            self.piece_counts[opponent] += len(captured)
+
+        board[move[3]][move[2]] = ' '
+        board[move[1]][move[0]] = player
+
+        if self.evaluator is not None:
+            self.evaluator.unmake()
+
+        return move
@@ -0,0 +1,305 @@
+"""
+    search_metrics.py
+
+    Description:
+    A record of how each search went, for finding out where the time goes. Pass a
+    sink as the metrics argument of minimax.get_next_move and it is given a
+    SearchMetrics once the search finishes: the nodes visited, leaves evaluated,
+    cutoffs at each level, effective branching factor, depth reached and whether
+    the move came from the opening book (see opening_book.py), along with the
+    nanoseconds (from time.perf_counter_ns) spent on the whole search, on
+    generating moves, on making and unmaking moves and on the heuristic. The
+    phases are only timed when a sink is given, so searches without one cost
+    nothing extra.
+
+    A sink is anything with an emit(record) method. There are three here: a
+    RingBuffer keeping the latest records in memory, a JsonlWriter appending one
+    JSON object per record to a file, and a PrometheusExporter keeping totals per
+    heuristic that can be dumped in the Prometheus text format.
+
+    Running this file prints the p50/p95/p99 latency of each heuristic in one or
+    more JSONL files, or dumps them for Prometheus:
+    > `python3 search_metrics.py search_metrics.jsonl`
+    > `python3 search_metrics.py search_metrics.jsonl --prometheus`
+"""
+
+import argparse
+import collections
+import json
+import math
+import sys
+import threading
+import time
+from position import Position
+
+# Upper bounds of the latency histogram buckets the PrometheusExporter keeps, in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+# Start of the name of every metric the PrometheusExporter writes
+METRIC_PREFIX = 'squeeze_it_search'
+
+
+class SearchMetrics:
+    """How one call to minimax.get_next_move went"""
+
+    __slots__ = ('timestamp', 'heuristic', 'player', 'move', 'depth', 'nodes', 'leaves', 'cutoffs',
+                 'branching_factor', 'table_hit_rate', 'book_hit', 'total_ns', 'movegen_ns', 'make_ns', 'eval_ns')
+
+    def __init__(self, heuristic, player):
+        self.timestamp = time.time()  # When the search started, in seconds since the epoch
+        self.heuristic = heuristic
+        self.player = player
+        self.move = ()
+        self.depth = 0  # Deepest depth finished
+        self.nodes = 0
+        self.leaves = 0  # Nodes scored with the heuristic
+        self.cutoffs = []  # Cutoffs at each level, starting with the top of the tree
+        self.branching_factor = 0.0  # Nodes of the deepest depth finished over the nodes of the one before it
+        self.table_hit_rate = 0.0
+        self.book_hit = False  # Whether the move came from the opening book instead of a search
+        self.total_ns = 0
+        self.movegen_ns = 0  # Generating and ordering moves
+        self.make_ns = 0  # Making and unmaking moves, including keeping an incremental evaluator up to date
+        self.eval_ns = 0  # Running the heuristic at the leaves
+
+    def as_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    @classmethod
+    def from_dict(cls, values):
+        record = cls(values['heuristic'], values['player'])
+        for name in cls.__slots__:
+            if name in values:
+                setattr(record, name, values[name])
+        record.move = tuple(record.move)
+        return record
+
+
+# A Position (position.py) that adds the time spent making and unmaking moves to a SearchMetrics
+class TimedPosition(Position):
+    """A Position that times its moves"""
+
+    __slots__ = ('metrics',)
+
+    def __init__(self, board, metrics, previous_move=None, evaluator=None):
+        super().__init__(board, previous_move, evaluator)
+        self.metrics = metrics
+
+    def make(self, player, move):
+        start = time.perf_counter_ns()
+        captured = Position.make(self, player, move)
+        self.metrics.make_ns += time.perf_counter_ns() - start
+        return captured
+
+    def unmake(self):
+        start = time.perf_counter_ns()
+        move = Position.unmake(self)
+        self.metrics.make_ns += time.perf_counter_ns() - start
+        return move
+
+
+# Wraps a heuristic (or batch heuristic) so the time spent in it is added to metrics.eval_ns
+def timed_evaluator(evaluate, metrics):
+    def timed(*arguments):
+        start = time.perf_counter_ns()
+        value = evaluate(*arguments)
+        metrics.eval_ns += time.perf_counter_ns() - start
+        return value
+
+    return timed
+
+
+# Yields the moves from a move generator, adding the time spent generating them to metrics.movegen_ns
+def timed_moves(moves, metrics):
+    moves = iter(moves)
+    while True:
+        start = time.perf_counter_ns()
+        try:
+            move = next(moves)
+        except StopIteration:
+            metrics.movegen_ns += time.perf_counter_ns() - start
+            return
+        metrics.movegen_ns += time.perf_counter_ns() - start
+        yield move
+
+
+class RingBuffer:
+    """Keeps the latest size records in memory"""
+
+    __slots__ = ('records',)
+
+    def __init__(self, size=1000):
+        self.records = collections.deque(maxlen=size)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    # The latest record, or None if there has not been one
+    def last(self):
+        return self.records[-1] if self.records else None
+
+
+class JsonlWriter:
+    """Appends each record to a JSON lines file, buffered so searches are not held up writing"""
+
+    __slots__ = ('file', 'lock')
+
+    def __init__(self, path, buffer_size=1 << 16):
+        self.file = open(path, 'a', buffering=buffer_size)
+
+        # Searches can finish on other threads (see background_search.py)
+        self.lock = threading.Lock()
+
+    # Records emitted after close() are dropped, as a search that was cancelled may still finish afterwards
+    def emit(self, record):
+        line = json.dumps(record.as_dict(), separators=(',', ':')) + '\n'
+        with self.lock:
+            if not self.file.closed:
+                self.file.write(line)
+
+    def flush(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class PrometheusExporter:
+    """Keeps totals for each heuristic and writes them in the Prometheus text format"""
+
+    __slots__ = ('totals', 'lock')
+
+    def __init__(self):
+        # Totals by heuristic: searches, book hits, nodes, leaves, cutoffs, seconds in each phase and the latency
+        # histogram
+        self.totals = dict()
+        self.lock = threading.Lock()
+
+    def emit(self, record):
+        with self.lock:
+            if record.heuristic not in self.totals:
+                self.totals[record.heuristic] = dict([("searches", 0), ("book_hits", 0), ("nodes", 0),
+                                                      ("leaves", 0), ("cutoffs", 0), ("seconds", 0.0),
+                                                      ("movegen_seconds", 0.0), ("make_seconds", 0.0),
+                                                      ("eval_seconds", 0.0),
+                                                      ("buckets", [0] * len(LATENCY_BUCKETS))])
+            totals = self.totals[record.heuristic]
+            seconds = record.total_ns / 1e9
+
+            totals["searches"] += 1
+            totals["book_hits"] += int(record.book_hit)
+            totals["nodes"] += record.nodes
+            totals["leaves"] += record.leaves
+            totals["cutoffs"] += sum(record.cutoffs)
+            totals["seconds"] += seconds
+            totals["movegen_seconds"] += record.movegen_ns / 1e9
+            totals["make_seconds"] += record.make_ns / 1e9
+            totals["eval_seconds"] += record.eval_ns / 1e9
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    totals["buckets"][index] += 1
+
+    # The totals in the Prometheus text exposition format
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, kind, help_text in (('searches', 'counter', 'Searches run'),
+                                          ('book_hits', 'counter', 'Moves played from the opening book'),
+                                          ('nodes', 'counter', 'Nodes visited'),
+                                          ('leaves', 'counter', 'Leaves scored with the heuristic'),
+                                          ('cutoffs', 'counter', 'Alpha-beta cutoffs'),
+                                          ('movegen_seconds', 'counter', 'Seconds generating and ordering moves'),
+                                          ('make_seconds', 'counter', 'Seconds making and unmaking moves'),
+                                          ('eval_seconds', 'counter', 'Seconds in the heuristic')):
+                lines.append('# HELP {0}_{1}_total {2}'.format(METRIC_PREFIX, name, help_text))
+                lines.append('# TYPE {0}_{1}_total {2}'.format(METRIC_PREFIX, name, kind))
+                for heuristic, totals in sorted(self.totals.items()):
+                    lines.append('{0}_{1}_total{{heuristic="{2}"}} {3}'.format(METRIC_PREFIX, name, heuristic,
+                                                                              totals[name]))
+
+            lines.append('# HELP {0}_seconds Time taken by each search'.format(METRIC_PREFIX))
+            lines.append('# TYPE {0}_seconds histogram'.format(METRIC_PREFIX))
+            for heuristic, totals in sorted(self.totals.items()):
+                for bound, count in zip(LATENCY_BUCKETS, totals["buckets"]):
+                    lines.append('{0}_seconds_bucket{{heuristic="{1}",le="{2}"}} {3}'.format(
+                        METRIC_PREFIX, heuristic, bound, count))
+                lines.append('{0}_seconds_bucket{{heuristic="{1}",le="+Inf"}} {2}'.format(
+                    METRIC_PREFIX, heuristic, totals["searches"]))
+                lines.append('{0}_seconds_sum{{heuristic="{1}"}} {2}'.format(METRIC_PREFIX, heuristic,
+                                                                            totals["seconds"]))
+                lines.append('{0}_seconds_count{{heuristic="{1}"}} {2}'.format(METRIC_PREFIX, heuristic,
+                                                                              totals["searches"]))
+        return '\n'.join(lines) + '\n'
+
+    # Writes the totals to path, for a node exporter's textfile collector to pick up
+    def write(self, path):
+        with open(path, 'w') as metrics_file:
+            metrics_file.write(self.render())
+
+
+# Reads every record from JSON lines files
+def read_records(paths):
+    for path in paths:
+        with open(path) as metrics_file:
+            for line in metrics_file:
+                if line.strip():
+                    yield SearchMetrics.from_dict(json.loads(line))
+
+
+# Value at the given percentile (0 to 100) of a sorted list, by the nearest rank
+def percentile(values, percent):
+    if not values:
+        return math.nan
+    rank = max(int(math.ceil(percent / 100 * len(values))), 1)
+    return values[rank - 1]
+
+
+# Groups records by heuristic. Returns, for each heuristic, the number of
+# searches, p50, p95 and p99 latency in milliseconds, average nodes, average
+# depth reached and the fraction of moves that came from the opening book
+def summarize(records):
+    by_heuristic = dict()
+    for record in records:
+        by_heuristic.setdefault(record.heuristic, []).append(record)
+
+    summary = dict()
+    for heuristic, heuristic_records in by_heuristic.items():
+        latencies = sorted(record.total_ns / 1e6 for record in heuristic_records)
+        count = len(heuristic_records)
+        summary[heuristic] = (count, percentile(latencies, 50), percentile(latencies, 95), percentile(latencies, 99),
+                              sum(record.nodes for record in heuristic_records) / count,
+                              sum(record.depth for record in heuristic_records) / count,
+                              sum(1 for record in heuristic_records if record.book_hit) / count)
+    return summary
+
+
+def print_summary(summary, out=sys.stdout):
+    width = max([len(heuristic) for heuristic in summary] + [len('heuristic')]) + 2
+    out.write('{0}{1:>9} {2:>10} {3:>10} {4:>10} {5:>11} {6:>7} {7:>7}\n'.format(
+        'heuristic'.ljust(width), 'searches', 'p50 ms', 'p95 ms', 'p99 ms', 'avg nodes', 'depth', 'book'))
+    for heuristic in sorted(summary):
+        count, p50, p95, p99, nodes, depth, book_rate = summary[heuristic]
+        out.write('{0}{1:>9} {2:>10.2f} {3:>10.2f} {4:>10.2f} {5:>11.0f} {6:>7.1f} {7:>7.1%}\n'.format(
+            heuristic.ljust(width), count, p50, p95, p99, nodes, depth, book_rate))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarizes search metrics written by a JsonlWriter')
+    parser.add_argument('paths', nargs='+', help='JSON lines files of search metrics')
+    parser.add_argument('--prometheus', action='store_true', help='print the totals in the Prometheus text format')
+    args = parser.parse_args()
+
+    if args.prometheus:
+        exporter = PrometheusExporter()
+        for record in read_records(args.paths):
+            exporter.emit(record)
+        sys.stdout.write(exporter.render())
+    else:
+        print_summary(summarize(read_records(args.paths)))
+
+
+if __name__ == '__main__':
+    main()
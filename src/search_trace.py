@@ -0,0 +1,146 @@
+"""
+    search_trace.py
+
+    Description:
+    Optional tracing of how the minimax makes its decisions. A SearchTracer passed
+    to minimax.get_next_move writes one JSON object per line for every event in
+    the search (moves considered, heuristic values, better moves found, pruned
+    branches, ...). When no tracer is given, the search does no tracing work at all.
+
+    The amount written can be limited by only recording the subtrees under a
+    random sample of the moves at the top of the tree, by not recording nodes
+    below a certain level, and by stopping once the file reaches a certain size.
+
+    Running this file renders a trace as the indented tree the minimax used to
+    write to its debug file:
+    > `python3 search_trace.py trace.jsonl`
+"""
+
+import datetime
+import json
+import random
+import sys
+
+
+class SearchTracer:
+    """Writes search events to a JSON lines file"""
+
+    __slots__ = ('file', 'sample_rate', 'max_level', 'max_bytes', 'bytes_written', 'truncated', 'sampled', 'salt')
+
+    # sample_rate is the fraction of moves at the top of the tree whose subtrees are
+    # recorded, max_level the deepest level recorded (the top of the tree is level
+    # 1) and max_bytes the size the file stops growing at. seed picks which moves
+    # are sampled, so the same seed always samples the same ones
+    def __init__(self, path, sample_rate=1.0, max_level=None, max_bytes=None, seed=None):
+        self.file = open(path, 'w', buffering=1 << 16)
+        self.sample_rate = sample_rate
+        self.max_level = max_level
+        self.max_bytes = max_bytes
+        self.bytes_written = 0
+        self.truncated = False
+        self.sampled = True
+        self.salt = random.Random(seed).getrandbits(64)
+
+    # Called on entering a node, with the Zobrist key of its board (see
+    # position.Position.key). Returns whether events at this node should be recorded
+    def records(self, level, key):
+        if self.truncated or (self.max_level is not None and level > self.max_level):
+            return False
+        if level == 2:
+            # Decide whether to record the subtree under this move at the top of the tree. The decision comes
+            # from the key, so a node that is searched again (or extended) is always in or out of the sample
+            self.sampled = self.sample_rate >= 1.0 or sample_point(key ^ self.salt) < self.sample_rate
+        return level == 1 or self.sampled
+
+    # Writes one event. kind says what happened, the rest are details
+    def event(self, kind, **fields):
+        if self.truncated:
+            return
+
+        fields['e'] = kind
+        line = json.dumps(fields, separators=(',', ':')) + '\n'
+
+        if self.max_bytes is not None and self.bytes_written + len(line) > self.max_bytes:
+            self.truncated = True
+            line = '{"e":"truncated"}\n'
+
+        self.file.write(line)
+        self.bytes_written += len(line)
+
+    # Writes the event that starts a new search
+    def start_search(self, player, heuristic_method):
+        self.event('search', time=datetime.datetime.now().isoformat(), player=player, heuristic=heuristic_method)
+
+    def close(self):
+        self.file.close()
+
+
+# Spreads a key evenly over [0, 1), so keys can be sampled by comparing against the sample rate
+def sample_point(key):
+    return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) / float(1 << 64)
+
+
+# Reads every event from a trace file
+def read_events(path):
+    with open(path) as trace_file:
+        for line in trace_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+# Turns a move read back from JSON into the tuple the minimax printed
+def _move(move):
+    return tuple(move) if move is not None else ()
+
+
+# Renders the events of a trace as the indented tree the minimax debug file used to contain
+def render_tree(events, out=sys.stdout):
+    for event in events:
+        kind = event['e']
+        level = event.get('l', 1)
+        prefix = '\t' * (level - 1) + str(level) + ' - '
+
+        if kind == 'search':
+            out.write('{0}\n{1} searching for {2}\n\n'.format(event['time'], event['heuristic'], event['player']))
+        elif kind == 'depth':
+            out.write('Searching to depth {0}\n'.format(event['depth']))
+        elif kind == 'depth_done':
+            out.write('Finished depth {0} after {1} nodes\n\n'.format(event['depth'], event['nodes']))
+        elif kind == 'timeout':
+            out.write('Ran out of time at depth {0}\n'.format(event['depth']))
+        elif kind == 'consider':
+            out.write('{0} Considering {1}\n'.format(prefix, _move(event['m'])))
+        elif kind == 'eval':
+            out.write('{0}{1} heuristic gives value of {2}\n'.format(prefix, event['h'], event['v']))
+        elif kind == 'better':
+            out.write('{0}{1} is better than {2}({3} {4} {5})\n'.format(
+                prefix, _move(event['m']), _move(event['old_m']), event['v'], '>' if event['max'] else '<',
+                event['old_v']))
+        elif kind == 'prune':
+            out.write('{0}{1} >= {2} PRUNING BRANCH{3}\n'.format(
+                prefix, event['a'], event['b'], ' (transposition)' if event.get('tt') else ''))
+        elif kind == 'research':
+            out.write('{0}{1} beat the null window with {2}, searching it again\n'.format(
+                prefix, _move(event['m']), event['v']))
+        elif kind == 'aspiration':
+            out.write('Score {0} fell outside the window at depth {1}, searching again with {2} to {3}\n'.format(
+                event['v'], event['depth'], event['a'], event['b']))
+        elif kind == 'parallel':
+            out.write('{0}{1} searched in parallel gives {2}\n'.format(prefix, _move(event['m']), event['v']))
+        elif kind == 'best':
+            if level == 1:
+                out.write('{0}Best move: {1} with Heuristic {2}\n'.format(prefix, _move(event['m']), event['v']))
+            else:
+                out.write('{0}Best Heuristic at level {1}: {2}\n'.format(prefix, level, event['v']))
+        elif kind == 'done':
+            out.write('Transposition table hit rate: {0:.1%}\n'.format(event['table_hit_rate']))
+            out.write('Cutoffs on the first move: {0:.1%}\n'.format(event['first_move_cutoff_rate']))
+        elif kind == 'truncated':
+            out.write('... trace truncated ...\n')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print('Usage: python3 search_trace.py trace.jsonl')
+        sys.exit(1)
+    render_tree(read_events(sys.argv[1]))
@@ -3,18 +3,36 @@
 
     Description:
     This file creates a user interface for the game of Squeeze-it (Mak-Yek) and
-    allows players to play against one another hotseat-style, play against the 
-    minimax AI, or pit different minimax heuristics against one another
+    allows players to play against one another hotseat-style, play against the
+    minimax AI, or pit different minimax heuristics against one another.
+    The AI searches on a background thread (see background_search.py), so the
+    window keeps responding while it thinks.
+
+    Nothing runs on a timer. Starting or resetting the game, a click that makes a
+    move and the AI's search finishing each move the game on once and redraw the
+    window once (see advance), so an idle window does no work. The only timer runs
+    while the AI is thinking, checking whether its search has finished and showing
+    its progress, so Tk is only ever used from its own thread. A redraw only sends Tk the
+    buttons and labels that have changed since the last one (usually the moved
+    piece, its captures and the highlight), which keeps the window quick over
+    slow X forwarding.
+
+    The game itself is a GameState (game_state.py), so this file only draws it and
+    turns clicks into moves. Nothing is created until main() runs, so this file can
+    be imported without a display
 """
 
+import os  # For building the paths of the images
+import time  # For spacing out the AI's search stats
 import tkinter as tk  # For GUI
-import minimax  # Minimax w/ ab-pruning implementation
-import time  # For getting the runtime of the minimax (minimax.py)
-from copy import deepcopy  # For copying game states so they may be changed
+from background_search import BackgroundSearch  # Runs the minimax (minimax.py) off the Tk thread
 from functools import \
     partial  # For dynamically creating instances of function executions to be applied to the 8x8 grid of buttons so clicks on the buttons may be resolved
-import func  # Implementation of helper functions (func.py)
 import heurisitcs  # Series of heuristics to be used by the minimax (heurisitcs.py)
+import opening_book  # Book moves for the start of the game, if a book has been built (opening_book.py)
+import search_metrics  # Records how each of the AI's searches went (search_metrics.py)
+import tablebase  # Solved endgames, if they have been built (tablebase.py)
+from game_state import GameState  # The game being played (game_state.py)
 
 """****************CONSTANTS*********************"""
 GRID_HEIGHT = 8
@@ -23,54 +41,27 @@ WC = 'W'
 BC = 'B'
 EC = ' '
 BG_COLOR = "#FFEEE5"
+NO_MOVE = (-1, -1, -1, -1)
 
-# List of heuristic options available to the user
+# How often the AI's search stats are shown while it is thinking, in milliseconds
+STATS_REFRESH_MS = 250
+
+# How often we check whether the AI has finished while it is thinking, in milliseconds
+SEARCH_POLL_MS = 20
+
+# Longest we wait for a cancelled search to stop when the window is closed, in seconds
+SEARCH_JOIN_TIMEOUT = 5
+
+# File a record of each of the AI's searches is appended to (see search_metrics.py)
+METRICS_FILE = "search_metrics.jsonl"
+
+# Folder holding the images, relative to where the game is run from
+IMAGE_DIRECTORY = "images"
+
+# List of heuristic options available to the user, filled from the heuristic registry (heurisitcs.py)
 # "player" implies the user will be making moves
-HEURISTIC_OPTIONS_LIST = [
-    ("Player Controlled", "player"),
-    ("Simple Minimax", "simple"),
-    ("Aggressive Minimax", "aggressive"),
-    ("Defensive Minimax", "defensive"),
-    ("Center Minimax", "stay_in_center")
-]
-
-# GUI Globals
-window = tk.Tk()
-window.iconbitmap("images\\squeezeit.ico")  # Add icon
-
-# Tkinter variables for heuristic radio buttons
-white_variable = tk.StringVar()
-black_variable = tk.StringVar()
-
-# Images to represent pieces on the board
-black_circle = tk.PhotoImage(file=r"images\\black_circle.png")
-white_circle = tk.PhotoImage(file=r"images\\white_circle.png")
-empty_square = tk.PhotoImage(file=r"images\\empty_square.png")
-
-"""*********************GLOBALS**************************"""
-
-# Current game state
-grid = [
-    [BC, BC, BC, BC, BC, BC, BC, BC],
-    [EC, EC, EC, EC, EC, EC, EC, EC],
-    [EC, EC, EC, EC, EC, EC, EC, EC],
-    [EC, EC, EC, EC, EC, EC, EC, EC],
-    [EC, EC, EC, EC, EC, EC, EC, EC],
-    [EC, EC, EC, EC, EC, EC, EC, EC],
-    [EC, EC, EC, EC, EC, EC, EC, EC],
-    [WC, WC, WC, WC, WC, WC, WC, WC]]
-
-cur_move = dict([("W", (-1, -1, -1, -1)),
-                 ("B", (-1, -1, -1, -1))])  # Current move selected by W or B (only used by player heuristic)
-current_player = 'W'  # Current player making a move
-turn_count = 1  # Turns elapsed
-turn_time = 0  # How long it took for the turn to be made (not calculated for player)
-player_heuristics = dict([("W", "player"), ("B", "player")])  # Chosen heuristic of W and B
-board_buttons = []  # Array for storing references to the board buttons on the GUI
-turn_label = ""  # Will be a tkinter label object that shows the current turn number
-flavor_text = ""  # Will be a tkinter label object that shows flavor text describing the game
-board_button_funcs = []  # Array for storing partial functions that control the functionality of their respective button in board_buttons
-start_game = False  # Boolean indicating whether the game has started
+HEURISTIC_OPTIONS_LIST = [("Player Controlled", "player")] + [(heuristic.label, heuristic.name) for heuristic in
+                                                              heurisitcs.registered_heuristics()]
 
 """*****************MAIN FUNCTIONS*********************"""
 
@@ -88,381 +79,396 @@ def print_grid(grid):
     print("")
 
 
-# Count the number of pieces a player has on the board
-def count_pieces(player):
-    global grid
-    counter = 0
-
-    for x in range(0, 8, 1):
-        for y in range(0, 8, 1):
-            if grid[y][x] == player:
-                counter += 1
-
-    return counter
-
-
-# Check if the game is finished
-def game_over():
-    global turn_count
-    global grid
-
-    if turn_count > 100:
-        return True
-    elif count_pieces("W") == 0:
-        return True
-    elif count_pieces("B") == 0:
-        return True
-    return False
-
-
-# Update all Tkinter objects with their respective internal values
-def update_GUI():
-    global grid
-    global board_buttons
-    global current_player
-    global cur_move
-    global turn_count
-    global turn_label
-    global turn_time_label
-    global turn_time
-
-    # Iterate through each board button and replace the image with an image that reflects the internal representation of the board
-    for i in range(8):
-        for j in range(8):
-            board_buttons[i][j]["image"] = black_circle if grid[i][j] == "B" else white_circle if grid[i][
-                                                                                                      j] == "W" else empty_square
-            board_buttons[i][j]["bg"] = '#E4D2B6'
-
-    # If the current player has selected a piece, lets highlight the piece
-    if cur_move[current_player][0] != -1 and cur_move[current_player][1] != -1:
-        board_buttons[cur_move[current_player][1]][cur_move[current_player][0]]["bg"] = 'yellow'
-
-    # If the game is over, indicate such. Otherwise, show the turn count
-    turn_label["text"] = "Turn: " + str(turn_count) if not game_over() else "Game Over!"
-
-    # Show the time it took the last turn to complete
-    turn_time_label["text"] = "Time: " + str(turn_time)
-
-    # If we have not started the game, either we need to start it or it just finished
-    if not start_game:
-        if turn_count <= 1:
-            # Need to start
-            flavor_text["text"] = "Click to Start"
-        else:
-            # Just finished. Check who won.
-            white_score = heurisitcs.simple_heuristic(grid, "W")
-            flavor_text[
-                "text"] = "White Wins!" if white_score > 0 else "Black Wins!" if white_score < 0 else "Its a Tie!"
-    else:
-        # In the middle of a game, so lets see whose turn it is
-        if current_player == "W":
-            flavor_text["text"] = "White's Turn"
+class SqueezeItGUI:
+    """The window of one game of Squeeze-It"""
+
+    __slots__ = ('window', 'state', 'cur_move', 'turn_time', 'player_heuristics', 'start_game', 'search',
+                 'search_poll', 'stats_shown', 'metrics', 'white_variable', 'black_variable', 'black_circle',
+                 'white_circle', 'empty_square', 'board_buttons', 'turn_label', 'turn_time_label', 'flavor_text',
+                 'rendered_board', 'rendered_highlight', 'rendered_text')
+
+    # Builds the GUI inside window, loading the images from image_directory. A
+    # record of each of the AI's searches is given to metrics, a search_metrics
+    # sink, if one is given
+    def __init__(self, window, image_directory=IMAGE_DIRECTORY, metrics=None):
+        self.window = window
+        self.state = GameState()  # Current game state
+        self.cur_move = dict([("W", NO_MOVE),
+                              ("B", NO_MOVE)])  # Current move selected by W or B (only used by player heuristic)
+        self.turn_time = 0  # How long it took for the turn to be made (not calculated for player)
+        self.player_heuristics = dict([("W", "player"), ("B", "player")])  # Chosen heuristic of W and B
+        self.start_game = False  # Boolean indicating whether the game has started
+        self.search = None  # BackgroundSearch for the AI's move, while it is thinking
+        self.search_poll = None  # Tk id of the next check on the AI's search, while it is thinking
+        self.stats_shown = 0.0  # When the AI's search stats were last shown, from time.perf_counter()
+        self.metrics = metrics
+
+        # Tkinter variables for heuristic radio buttons
+        self.white_variable = tk.StringVar(master=window)
+        self.black_variable = tk.StringVar(master=window)
+
+        # Images to represent pieces on the board
+        self.black_circle = tk.PhotoImage(master=window, file=os.path.join(image_directory, "black_circle.png"))
+        self.white_circle = tk.PhotoImage(master=window, file=os.path.join(image_directory, "white_circle.png"))
+        self.empty_square = tk.PhotoImage(master=window, file=os.path.join(image_directory, "empty_square.png"))
+
+        self.board_buttons = []  # Array for storing references to the board buttons on the GUI
+
+        # What the window is showing, so only what has changed is sent to Tk
+        self.rendered_board = GameState().board  # Board the buttons show, which build() draws as the starting board
+        self.rendered_highlight = None  # (row, column) of the highlighted button, if there is one
+        self.rendered_text = dict()  # Text each label shows, by label
+        self.build()
+        self.update_GUI()
+
+    # Update all Tkinter objects with their respective internal values. Only the
+    # buttons and labels that have changed since the last update are sent to Tk
+    def update_GUI(self):
+        state = self.state
+        grid = state.board
+        current_player = state.current_player
+        rendered = self.rendered_board
+
+        # Replace the image of each button whose square has changed (the moved piece and any captures) with an image
+        # that reflects the internal representation of the board
+        for i in range(8):
+            if grid[i] != rendered[i]:
+                for j in range(8):
+                    if grid[i][j] != rendered[i][j]:
+                        self.board_buttons[i][j]["image"] = self.black_circle if grid[i][j] == "B" else \
+                            self.white_circle if grid[i][j] == "W" else self.empty_square
+                        rendered[i][j] = grid[i][j]
+
+        # If the current player has selected a piece, lets highlight the piece
+        highlight = None
+        if self.cur_move[current_player][0] != -1 and self.cur_move[current_player][1] != -1:
+            highlight = (self.cur_move[current_player][1], self.cur_move[current_player][0])
+        if highlight != self.rendered_highlight:
+            if self.rendered_highlight is not None:
+                self.board_buttons[self.rendered_highlight[0]][self.rendered_highlight[1]]["bg"] = '#E4D2B6'
+            if highlight is not None:
+                self.board_buttons[highlight[0]][highlight[1]]["bg"] = 'yellow'
+            self.rendered_highlight = highlight
+
+        # If the game is over, indicate such. Otherwise, show the turn count
+        self.set_text(self.turn_label, "Turn: " + str(state.turn_count) if not state.game_over() else "Game Over!")
+
+        # Show the time it took the last turn to complete
+        self.set_text(self.turn_time_label, "Time: " + str(self.turn_time))
+
+        self.update_flavor_text()
+
+    # Shows text on label, unless it is already showing it
+    def set_text(self, label, text):
+        if self.rendered_text.get(label) != text:
+            label["text"] = text
+            self.rendered_text[label] = text
+
+    # Shows what is happening in the game
+    def update_flavor_text(self):
+        state = self.state
+        current_player = state.current_player
+
+        # If we have not started the game, either we need to start it or it just finished
+        if not self.start_game:
+            if state.turn_count <= 1:
+                # Need to start
+                self.set_text(self.flavor_text, "Click to Start")
+            else:
+                # Just finished. Check who won.
+                winner = state.winner()
+                self.set_text(self.flavor_text, "White Wins!" if winner == WC else "Black Wins!" if winner == BC else
+                              "Its a Tie!")
+        elif self.search is not None:
+            # The AI is thinking, so show how far it has got
+            stats = self.search.stats
+            self.set_text(self.flavor_text, "{0} is thinking... depth {1}, {2} nodes, {3:.1f}s".format(
+                "White" if current_player == "W" else "Black", stats["depth"], stats["nodes"], self.search.elapsed()))
         else:
-            flavor_text["text"] = "Black's Turn"
-
-
-# Called when the white heuristic radio button is clicked
-def update_white_heuristic():
-    global player_heuristics
-
-    player_heuristics["W"] = white_variable.get()
-
-
-# Called when the black heuristic radio button is clicked
-def update_black_heuristic():
-    global player_heuristics
-
-    player_heuristics["B"] = black_variable.get()
-
-
-# Move function
-def move():
-    global grid
-    global cur_move
-    global current_player
-    global turn_time
-    global turn_count
-    global player_heuristics
-    global start_game
-
-    # Open file to store runtimes
-    heuristic_runtime_file = open("heuristic_runtimes.csv", "a")
-
-    # See if we are in the middle of a game
-    if start_game and not game_over():
-
-        # See if we are dealing with a human player or an AI
-        if player_heuristics[current_player] != "player":
-            # AI, so get the next move with the minimax
-
-            # Start timer
-            start_turn_time = int(round(time.time() * 1000))
-
-            # Get the move
-            grid = func.make_move(grid, current_player,
-                                  minimax.get_next_move(grid, current_player, player_heuristics[current_player]))
-
-            # Stop the timer
-            cur_turn_time = int(round(time.time() * 1000))
-
-            # Calculate time elapsed
-            turn_time = cur_turn_time - start_turn_time
-
-            # Record the runtime in the output file
-            heuristic_runtime_file.write(f"\"{player_heuristics[current_player]}\",\"{turn_time}\"\n")
-
-            # Change player
+            # In the middle of a game, so lets see whose turn it is
             if current_player == "W":
-                current_player = "B"
+                self.set_text(self.flavor_text, "White's Turn")
             else:
-                current_player = "W"
-
-            # Increment turn counter
-            turn_count += 1
+                self.set_text(self.flavor_text, "Black's Turn")
+
+    # Called when the white heuristic radio button is clicked
+    def update_white_heuristic(self):
+        self.player_heuristics["W"] = self.white_variable.get()
+        self.cancel_search()
+        self.advance()
+
+    # Called when the black heuristic radio button is clicked
+    def update_black_heuristic(self):
+        self.player_heuristics["B"] = self.black_variable.get()
+        self.cancel_search()
+        self.advance()
+
+    # Stops the AI if it is thinking. Its result is ignored if it still arrives
+    def cancel_search(self):
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
+        if self.search_poll is not None:
+            self.window.after_cancel(self.search_poll)
+            self.search_poll = None
+
+    # Moves the game on after something has changed: ends it if it is over, or
+    # starts the AI thinking if it is the AI's turn. Then redraws the window once
+    def advance(self):
+        state = self.state
+
+        if self.start_game:
+            if state.game_over():
+                # Someone just won, so stop the game
+                self.start_game = False
+                if isinstance(self.metrics, search_metrics.JsonlWriter):
+                    self.metrics.flush()
+            elif self.player_heuristics[state.current_player] != "player" and self.search is None:
+                # AI, so start the minimax thinking. poll_search() calls search_finished() when it is done
+                heuristic_method = self.player_heuristics[state.current_player]
+                self.search = BackgroundSearch(state.board, state.current_player, heuristic_method,
+                                               metrics=self.metrics,
+                                               book=opening_book.default_book(heuristic_method),
+                                               tablebase=tablebase.default_tablebase())
+                self.stats_shown = time.perf_counter()
+                self.search_poll = self.window.after(SEARCH_POLL_MS, self.poll_search)
+
+        # Update the GUI
+        self.update_GUI()
+
+    # Makes the AI's move once its search has finished
+    def search_finished(self):
+        search = self.search
+
+        # Ignore searches that were cancelled after they finished
+        if search is None or not search.done():
+            return
+        self.cancel_search()
+
+        if search.result:
+            self.state.make_move(search.result)
         else:
-            # Dealing with a human, so lets see if they have provided a move
-            if cur_move[current_player][0] != -1 and cur_move[current_player][1] != -1 and cur_move[current_player][
-                    2] != -1 and cur_move[current_player][3] != -1:
-                # We have a valid move to do
-
-                # Make move
-                grid = func.make_move(grid, current_player, cur_move[current_player])
-
-                # Reinitialize the move
-                cur_move[current_player] = (-1, -1, -1, -1)
-
-                # Change player
-                if current_player == "W":
-                    current_player = "B"
-                else:
-                    current_player = "W"
-
-                # Increment turn counter
-                turn_count += 1
-    elif turn_count > 1:
-        # Someone just won, so stop the game
-        start_game = False
-
-    # Update the GUI
-    update_GUI()
-
-    # Close the runtime file
-    heuristic_runtime_file.close()
-
-    # Schedule move() to run again in 50 milliseconds
-    window.after(50, move)
-
-
-# Sees what needs to be changed when the player clicks a button on the board
-def resolve_button_click(i, j):
-    global start_game
-
-    # Ignore if the game has not started
-    if start_game:
-        global grid
-        global player_heuristics
-        global current_player
-        global cur_move
-
-        # Only care about clicks if the player is a human
-        if player_heuristics[current_player] == "player":
-            # Lets see what they clicked
-
-            if cur_move[current_player][0] == -1 and cur_move[current_player][1] == -1 and grid[i][j] == current_player:
-                # Player had not clicked anything yet but just clicked one of their own pieces
-                cur_move[current_player] = (j, i, -1, -1)
-            elif cur_move[current_player][0] != -1 and cur_move[current_player][1] != -1 and cur_move[current_player][
-                2] == -1 and cur_move[current_player][3] == -1:
-                # The player had already clicked one of their own pieces and just clicked another spot, so they want
-                # to make a move
-
-                # Create the move they seem to want
-                temp_move = (cur_move[current_player][0], cur_move[current_player][1], j, i)
-
-                # See if the move is valid
-                if func.is_valid_move(grid, current_player, temp_move):
-                    # Valid move, so set their current move to the move we just tested. It will now by updated on the
-                    # next execution of move()
-                    cur_move[current_player] = temp_move
-                else:
-                    # Not a valid move, so reinitialize their current move and let them try again
-                    cur_move[current_player] = (-1, -1, -1, -1)
-
-        print(cur_move[current_player])
-
-
-# Start the game
-def play_game():
-    global start_game
-    start_game = True
-
-
-# Reinitialize the internal components
-def reset_game():
-    global start_game
-    global turn_count
-    global current_player
-    global cur_move
-    global grid
-
-    grid = [
-        [BC, BC, BC, BC, BC, BC, BC, BC],
-        [EC, EC, EC, EC, EC, EC, EC, EC],
-        [EC, EC, EC, EC, EC, EC, EC, EC],
-        [EC, EC, EC, EC, EC, EC, EC, EC],
-        [EC, EC, EC, EC, EC, EC, EC, EC],
-        [EC, EC, EC, EC, EC, EC, EC, EC],
-        [EC, EC, EC, EC, EC, EC, EC, EC],
-        [WC, WC, WC, WC, WC, WC, WC, WC]]
-    cur_move = dict([("W", (-1, -1, -1, -1)), ("B", (-1, -1, -1, -1))])
-    current_player = 'W'
-    turn_count = 1
-    start_game = False
-
-
-"""***********************GAME GUI*****************************"""
-
-# Set the title and color of the window
-window.title('Squeeze-It!')
-window["bg"] = '#FFEEE5'
-
-# Initialize the heuristics of white and black
-white_variable.set("player")
-black_variable.set("player")
-
-# Create a frame to house the instructions, put a label with the instructions inside, and pack
-instructions = tk.Frame(master=window)
-instructions_label = tk.Label(master=instructions,
-                              text="Choose an option from the following",
-                              bg=BG_COLOR)
-instructions_label.pack()
-instructions.pack()
-
-# Create a frame to house the heuristic radio buttons
-options_frame = tk.Frame(master=window,
-                         bg=BG_COLOR)
-
-# Create a frame to house the white heuristic radio buttons and fill it with a packed label indicating such
-white_options = tk.Frame(master=options_frame,
-                         bg=BG_COLOR)
-white_label = tk.Label(master=white_options,
-                       text="White Heuristic",
-                       bg=BG_COLOR)
-white_label.pack()
-
-# Create a radio button for each possible heuristic and pack them
-for heuristic in HEURISTIC_OPTIONS_LIST:
-    tk.Radiobutton(master=white_options,
-                   text=heuristic[0],
-                   indicatoron=0,
-                   padx=20,
-                   width=20,
-                   variable=white_variable,
-                   value=heuristic[1],
-                   command=update_white_heuristic
-                   ).pack(anchor=tk.W)
-
-# Pack the white options into the options frame on a grid in the top left
-white_options.grid(row=0, column=0)
-
-# Create a frame to house the black heuristic radio buttons and fill it with a packed label indicating such
-black_options = tk.Frame(master=options_frame,
-                         bg=BG_COLOR)
-black_label = tk.Label(master=black_options,
-                       text="Black Heuristic",
-                       bg=BG_COLOR)
-black_label.pack()
-
-# Create a radio button for each possible heuristic and pack them
-for heuristic in HEURISTIC_OPTIONS_LIST:
-    tk.Radiobutton(master=black_options,
-                   text=heuristic[0],
-                   indicatoron=0,
-                   padx=20,
-                   width=20,
-                   variable=black_variable,
-                   value=heuristic[1],
-                   command=update_black_heuristic
-                   ).pack(anchor=tk.W)
-
-# Pack the black options into the options frame on a grid in the top right
-black_options.grid(row=0, column=1)
-
-# Pack the options
-options_frame.pack()
-
-# Create a frame to house the turn label, turn time, flavor text, and play game button.
-# Pack them all
-play_game_frame = tk.Frame(master=window,
-                           bg=BG_COLOR)
-turn_label = tk.Label(master=play_game_frame,
-                      text="",
-                      bg=BG_COLOR)
-turn_label.pack()
-turn_time_label = tk.Label(master=play_game_frame,
-                           text="",
-                           bg=BG_COLOR)
-turn_time_label.pack()
-flavor_text = tk.Label(master=play_game_frame,
-                       text="Click to Start",
-                       bg=BG_COLOR)
-flavor_text.pack()
-play_game_button = tk.Button(master=play_game_frame,
-                             text="Play Game",
-                             command=play_game)
-play_game_button.pack()
-play_game_frame.pack()
-
-# Create a frame to house the game board
-game_board = tk.Frame(
-    master=window,
-    relief=tk.RAISED,
-    borderwidth=1,
-    bg='#513B0E'
-)
-
-# Create an 8x8 series of buttons organized on a grid that call
-# resolve_button_click() when clicked, passing the coordinates of
-# the click
-for i in range(0, 8, 1):
-    # Initialize array rows
-    board_buttons.append([])
-    board_button_funcs.append([])
-
-    for j in range(0, 8, 1):
-        # Create a frame for this button and pack it into game_board on a grid
-        frame = tk.Frame(
-            master=game_board,
+            # The AI has no legal moves, so the game cannot go on
+            self.start_game = False
+
+        # Time elapsed in milliseconds. The search's metrics have already gone to self.metrics
+        self.turn_time = int(round(search.elapsed() * 1000))
+
+        self.advance()
+
+    # Checks on the AI every SEARCH_POLL_MS while it is thinking. Makes its move once
+    # its search has finished, and shows how the search is going every STATS_REFRESH_MS.
+    # The search thread never touches Tk, as Tk is not thread safe
+    def poll_search(self):
+        self.search_poll = None
+        if self.search is None:
+            return
+        if self.search.done():
+            self.search_finished()
+            return
+
+        if time.perf_counter() - self.stats_shown >= STATS_REFRESH_MS / 1000:
+            self.stats_shown = time.perf_counter()
+            self.update_flavor_text()
+        self.search_poll = self.window.after(SEARCH_POLL_MS, self.poll_search)
+
+    # Sees what needs to be changed when the player clicks a button on the board
+    def resolve_button_click(self, i, j):
+        # Ignore if the game has not started
+        if self.start_game:
+            grid = self.state.board
+            current_player = self.state.current_player
+            cur_move = self.cur_move
+
+            # Only care about clicks if the player is a human
+            if self.player_heuristics[current_player] == "player":
+                # Lets see what they clicked
+
+                if cur_move[current_player][0] == -1 and cur_move[current_player][1] == -1 and \
+                        grid[i][j] == current_player:
+                    # Player had not clicked anything yet but just clicked one of their own pieces
+                    cur_move[current_player] = (j, i, -1, -1)
+                elif cur_move[current_player][0] != -1 and cur_move[current_player][1] != -1 and \
+                        cur_move[current_player][2] == -1 and cur_move[current_player][3] == -1:
+                    # The player had already clicked one of their own pieces and just clicked another spot, so they want
+                    # to make a move
+
+                    # Create the move they seem to want
+                    temp_move = (cur_move[current_player][0], cur_move[current_player][1], j, i)
+
+                    # See if the move is valid
+                    if self.state.is_legal_move(temp_move):
+                        # Valid move, so make it and reinitialize their current move for their next turn
+                        cur_move[current_player] = NO_MOVE
+                        self.state.make_move(temp_move)
+                        self.advance()
+                        return
+                    else:
+                        # Not a valid move, so reinitialize their current move and let them try again
+                        cur_move[current_player] = NO_MOVE
+
+                self.update_GUI()
+
+            print(cur_move[current_player])
+
+    # Start the game
+    def play_game(self):
+        self.start_game = True
+        self.advance()
+
+    # Reinitialize the internal components
+    def reset_game(self):
+        self.cancel_search()
+        self.state = GameState()
+        self.cur_move = dict([("W", NO_MOVE), ("B", NO_MOVE)])
+        self.start_game = False
+        self.advance()
+
+    # Creates every widget of the window
+    def build(self):
+        window = self.window
+
+        # Set the title and color of the window
+        window.title('Squeeze-It!')
+        window["bg"] = '#FFEEE5'
+
+        # Initialize the heuristics of white and black
+        self.white_variable.set("player")
+        self.black_variable.set("player")
+
+        # Create a frame to house the instructions, put a label with the instructions inside, and pack
+        instructions = tk.Frame(master=window)
+        instructions_label = tk.Label(master=instructions,
+                                      text="Choose an option from the following",
+                                      bg=BG_COLOR)
+        instructions_label.pack()
+        instructions.pack()
+
+        # Create a frame to house the heuristic radio buttons
+        options_frame = tk.Frame(master=window,
+                                 bg=BG_COLOR)
+
+        # Create a frame for the radio buttons of each player, with a label indicating which player it is for,
+        # and place white's in the top left and black's in the top right
+        for column, text, variable, command in ((0, "White Heuristic", self.white_variable,
+                                                 self.update_white_heuristic),
+                                                (1, "Black Heuristic", self.black_variable,
+                                                 self.update_black_heuristic)):
+            player_options = tk.Frame(master=options_frame,
+                                      bg=BG_COLOR)
+            player_label = tk.Label(master=player_options,
+                                    text=text,
+                                    bg=BG_COLOR)
+            player_label.pack()
+
+            # Create a radio button for each possible heuristic and pack them
+            for heuristic in HEURISTIC_OPTIONS_LIST:
+                tk.Radiobutton(master=player_options,
+                               text=heuristic[0],
+                               indicatoron=0,
+                               padx=20,
+                               width=20,
+                               variable=variable,
+                               value=heuristic[1],
+                               command=command
+                               ).pack(anchor=tk.W)
+
+            player_options.grid(row=0, column=column)
+
+        # Pack the options
+        options_frame.pack()
+
+        # Create a frame to house the turn label, turn time, flavor text, and play game button.
+        # Pack them all
+        play_game_frame = tk.Frame(master=window,
+                                   bg=BG_COLOR)
+        self.turn_label = tk.Label(master=play_game_frame,
+                                   text="",
+                                   bg=BG_COLOR)
+        self.turn_label.pack()
+        self.turn_time_label = tk.Label(master=play_game_frame,
+                                        text="",
+                                        bg=BG_COLOR)
+        self.turn_time_label.pack()
+        self.flavor_text = tk.Label(master=play_game_frame,
+                                    text="Click to Start",
+                                    bg=BG_COLOR)
+        self.flavor_text.pack()
+        play_game_button = tk.Button(master=play_game_frame,
+                                     text="Play Game",
+                                     command=self.play_game)
+        play_game_button.pack()
+        play_game_frame.pack()
+
+        # Create a frame to house the game board
+        game_board = tk.Frame(
+            master=window,
+            relief=tk.RAISED,
             borderwidth=1,
             bg='#513B0E'
         )
-        frame.grid(row=i, column=j)
-
-        # Dynamically create a custom function call for this button and store it in the array
-        board_button_funcs[i].append(partial(resolve_button_click, i, j))
-
-        # Create the button and pack it into it's specified spot in the grid
-        board_buttons[i].append(tk.Button(master=frame,
-                                          text='B' if i == 0 else 'W' if i == 7 else ' ',
-                                          borderwidth=1,
-                                          image=black_circle if i == 0 else white_circle if i == 7 else empty_square,
-                                          # Initialize to starting state
-                                          bg="#E4D2B6",
-                                          command=board_button_funcs[i][j]
-                                          # Provided reference to created function call
-                                          ))
-        board_buttons[i][j].pack()
-game_board.pack()
-
-# Create a button to reset the game back to its initial state
-reset_game_button = tk.Button(master=window,
-                              text="Reset Game",
-                              borderwidth=1,
-                              command=reset_game)
-reset_game_button.pack()
-
-# Schedule the move function to run
-window.after(50, move)
-
-# Start it all up
-window.mainloop()
+
+        # Create an 8x8 series of buttons organized on a grid that call
+        # resolve_button_click() when clicked, passing the coordinates of
+        # the click
+        for i in range(0, 8, 1):
+            # Initialize array rows
+            self.board_buttons.append([])
+
+            for j in range(0, 8, 1):
+                # Create a frame for this button and pack it into game_board on a grid
+                frame = tk.Frame(
+                    master=game_board,
+                    borderwidth=1,
+                    bg='#513B0E'
+                )
+                frame.grid(row=i, column=j)
+
+                # Create the button and pack it into it's specified spot in the grid
+                self.board_buttons[i].append(tk.Button(master=frame,
+                                                       text='B' if i == 0 else 'W' if i == 7 else ' ',
+                                                       borderwidth=1,
+                                                       image=self.black_circle if i == 0 else self.white_circle if
+                                                       i == 7 else self.empty_square,  # Initialize to starting state
+                                                       bg="#E4D2B6",
+                                                       # Function call resolving a click on this button
+                                                       command=partial(self.resolve_button_click, i, j)
+                                                       ))
+                self.board_buttons[i][j].pack()
+        game_board.pack()
+
+        # Create a button to reset the game back to its initial state
+        reset_game_button = tk.Button(master=window,
+                                      text="Reset Game",
+                                      borderwidth=1,
+                                      command=self.reset_game)
+        reset_game_button.pack()
+
+
+# Creates the window and runs the game until it is closed
+def main(image_directory=IMAGE_DIRECTORY):
+    window = tk.Tk()
+
+    # The icon is a Windows icon file, which other platforms cannot show
+    if os.name == 'nt':
+        window.iconbitmap(os.path.join(image_directory, "squeezeit.ico"))  # Add icon
+
+    # One buffered file for the whole session, rather than opening it for every move
+    metrics = search_metrics.JsonlWriter(METRICS_FILE)
+    try:
+        gui = SqueezeItGUI(window, image_directory, metrics)
+
+        # Start it all up
+        window.mainloop()
+
+        # Let a search that is still running stop before its metrics file is closed
+        search = gui.search
+        gui.cancel_search()
+        if search is not None:
+            search.join(SEARCH_JOIN_TIMEOUT)
+    finally:
+        metrics.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,542 @@
+"""
+    tablebase.py
+
+    Description:
+    Endgame tablebases. With only a few pieces per side a depth 3 search cannot
+    see a win, so endgames used to shuffle aimlessly until the turn limit. Here
+    every position with up to a few pieces per side is solved ahead of time by
+    retrograde analysis, and the search looks the answer up instead.
+
+    Positions are grouped by material: one file per (white pieces, black pieces),
+    holding one byte per position for each side to move. The byte says whether the
+    side to move wins, loses or draws, and for a win or loss how many plies it
+    takes (the distance to the result). A position's place in its file is worked
+    out from which squares each side's pieces are on (see position_index), so no
+    keys are stored. The files are opened with mmap and only the pages the search
+    touches are ever read.
+
+    A side that has lost all its pieces has lost. A side with no legal moves has
+    also lost, as the minimax already scores it. The turn limit is not taken into
+    account, so a draw means neither side can force a win.
+
+    The generator solves the smallest material first, since a capture always
+    leads to a smaller one. Within a material it first looks at every move of
+    every position, spread over worker processes (the slow part), and then works
+    backwards from the positions that are already decided, one distance at a time,
+    until nothing changes. What is left is drawn. Each finished piece of the first
+    step is saved, as is each finished material, so an interrupted run carries on
+    where it stopped:
+    > `python3 tablebase.py --pieces 2`
+
+    Only up to MAX_PIECES pieces per side can be built. The first step takes about
+    0.3 ms per position on one core, and W2B2 has 7.6 million positions (about 40
+    minutes of CPU time). W3B2 already has 157 million (about 13 hours) and W3B3
+    has 3 billion (about 10 days), which is too slow to be worth it in Python
+"""
+
+import argparse
+import array
+import concurrent.futures
+import itertools
+import mmap
+import os
+import shutil
+import struct
+import time
+import func
+import movegen
+
+# Results, from the point of view of the side to move
+DRAW = 0
+WIN = 1
+LOSS = 2
+
+# Longest distance to the result a table byte can hold. Wins are stored as the
+# distance itself (1 to MAX_DISTANCE), losses as LOSS_OFFSET plus the distance
+# and draws as 0
+MAX_DISTANCE = 127
+LOSS_OFFSET = 128
+
+# Score of a position the side searching wins at once. A win in n plies scores
+# WIN_SCORE - n, so faster wins score higher, and every win scores higher than
+# any heuristic
+WIN_SCORE = 1000
+
+# Scores further from zero than this are wins or losses (see tablebase_score).
+# Every heuristic scores well inside it
+DECIDED_SCORE = WIN_SCORE - 2 * LOSS_OFFSET
+
+MAGIC = b'SQZTB001'
+
+# Header: magic, white pieces and black pieces
+HEADER = struct.Struct('<8sBB6x')
+
+# Where the tables are built and looked for
+TABLEBASE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablebases')
+
+# Most pieces per side the generator will build tables for (see above)
+MAX_PIECES = 2
+
+# Positions the generator gives a worker at a time in the first step
+TASK_SIZE = 1 << 16
+
+# Marks a position whose captures include a draw, so it can never be lost
+BLOCKED = 255
+
+SIDES = ['W', 'B']
+
+# BINOMIAL[n][k] is n choose k, for every n and k up to 64
+BINOMIAL = [[0] * 65 for _ in range(0, 65, 1)]
+for _n in range(0, 65, 1):
+    BINOMIAL[_n][0] = 1
+    for _k in range(1, _n + 1, 1):
+        BINOMIAL[_n][_k] = BINOMIAL[_n - 1][_k - 1] + BINOMIAL[_n - 1][_k]
+
+# Every k squares out of n, in the order of their rank (see rank_squares), by (n, k)
+_combinations = dict()
+
+# Tablebases opened by open_tablebase, by directory
+open_tablebases = dict()
+
+
+# The rank of a sorted list of squares among every set of the same size, in colexicographic order
+def rank_squares(squares):
+    rank = 0
+    for i, square in enumerate(squares):
+        rank += BINOMIAL[square][i + 1]
+    return rank
+
+
+# Every set of k squares out of n, as sorted tuples in the order of their rank
+def combinations(n, k):
+    if (n, k) not in _combinations:
+        _combinations[(n, k)] = sorted(itertools.combinations(range(0, n, 1), k), key=lambda squares: squares[::-1])
+    return _combinations[(n, k)]
+
+
+def material_name(white, black):
+    return 'W{0}B{1}'.format(white, black)
+
+
+def table_path(directory, white, black):
+    return os.path.join(directory, material_name(white, black) + '.tb')
+
+
+# Number of positions of one side to move with the given material
+def side_size(white, black):
+    return BINOMIAL[64][white] * BINOMIAL[64 - white][black]
+
+
+# Index of a position in its material's table. Squares are numbered y * 8 + x and
+# black's are numbered again among the squares white does not use
+def position_index(white_squares, black_squares, player):
+    white_squares = sorted(white_squares)
+    black_rank = 0
+    white_index = 0
+    for i, square in enumerate(sorted(black_squares)):
+        while white_index < len(white_squares) and white_squares[white_index] < square:
+            white_index += 1
+        black_rank += BINOMIAL[square - white_index][i + 1]
+
+    side = 0 if player == 'W' else 1
+    return (side * BINOMIAL[64][len(white_squares)] + rank_squares(white_squares)) \
+        * BINOMIAL[64 - len(white_squares)][len(black_squares)] + black_rank
+
+
+# The white squares, black squares and side to move of the position at index in a material's table
+def position_at(index, white, black):
+    side, rest = divmod(index, side_size(white, black))
+    white_rank, black_rank = divmod(rest, BINOMIAL[64 - white][black])
+    white_squares = combinations(64, white)[white_rank]
+    free_squares = [square for square in range(0, 64, 1) if square not in white_squares]
+    black_squares = [free_squares[i] for i in combinations(64 - white, black)[black_rank]]
+    return list(white_squares), black_squares, SIDES[side]
+
+
+# The squares of a player's pieces
+def piece_squares(board, player):
+    return [y * 8 + x for y in range(0, 8, 1) for x in range(0, 8, 1) if board[y][x] == player]
+
+
+def build_board(white_squares, black_squares):
+    board = [[' '] * 8 for _ in range(0, 8, 1)]
+    for square in white_squares:
+        board[square >> 3][square & 7] = 'W'
+    for square in black_squares:
+        board[square >> 3][square & 7] = 'B'
+    return board
+
+
+# Turns a table byte into (result, distance)
+def decode(value):
+    if value == 0:
+        return DRAW, 0
+    elif value < LOSS_OFFSET:
+        return WIN, value
+    return LOSS, value - LOSS_OFFSET
+
+
+def encode(result, distance):
+    if distance > MAX_DISTANCE:
+        raise ValueError('Distance to the result {0} does not fit in a table'.format(distance))
+    if result == WIN:
+        return distance
+    elif result == LOSS:
+        return LOSS_OFFSET + distance
+    return 0
+
+
+# The score the minimax gives a position the side to move wins (or loses) in
+# distance plies, plies plies below the top of the tree, from the point of view
+# of the player searching. A side with no legal moves has lost at distance 0
+def tablebase_score(result, distance, plies, side_to_move, player):
+    score = WIN_SCORE - plies - distance
+    if (result == WIN) == (side_to_move == player):
+        return score
+    return -score
+
+
+class Tablebase:
+    """The tables in one directory, opened with mmap as they are needed"""
+
+    __slots__ = ('directory', 'materials', 'tables', 'probes', 'hits')
+
+    def __init__(self, directory=TABLEBASE_DIRECTORY):
+        self.directory = directory
+
+        # Materials there is a table for, as (white, black)
+        self.materials = set()
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith('.tb') and name.startswith('W') and 'B' in name:
+                    white, _, black = name[1:-3].partition('B')
+                    if white.isdigit() and black.isdigit():
+                        self.materials.add((int(white), int(black)))
+
+        self.tables = dict()
+        self.probes = 0
+        self.hits = 0
+
+    # Whether a position with this material can be looked up
+    def covers(self, white, black):
+        return white == 0 or black == 0 or (white, black) in self.materials
+
+    # The table of a material, or None if it has not been built
+    def table(self, white, black):
+        if (white, black) not in self.tables:
+            path = table_path(self.directory, white, black)
+            if not os.path.exists(path):
+                return None
+
+            with open(path, 'rb') as table_file:
+                table = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, table_white, table_black = HEADER.unpack_from(table, 0)
+            if magic != MAGIC or (table_white, table_black) != (white, black) \
+                    or len(table) != HEADER.size + 2 * side_size(white, black):
+                table.close()
+                raise ValueError('{0} is not a tablebase for {1}'.format(path, material_name(white, black)))
+            self.tables[(white, black)] = table
+            self.materials.add((white, black))
+        return self.tables[(white, black)]
+
+    # Looks up a position given by the squares of each side's pieces. Returns
+    # (result, distance) for the side to move, or None if its material has no table
+    def probe_squares(self, white_squares, black_squares, player):
+        white = len(white_squares)
+        black = len(black_squares)
+        if white == 0 or black == 0:
+            # The game is already over
+            return (LOSS if (white == 0) == (player == 'W') else WIN), 0
+
+        table = self.table(white, black)
+        if table is None:
+            return None
+        return decode(table[HEADER.size + position_index(white_squares, black_squares, player)])
+
+    # Looks up board with player to move. Returns (result, distance) for
+    # player, or None if the position is not in the tablebase
+    def probe(self, board, player):
+        self.probes += 1
+        entry = self.probe_squares(piece_squares(board, 'W'), piece_squares(board, 'B'), player)
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    # Returns (move, result, distance) for the best move for player on board: the
+    # fastest win, or else a draw, or else the slowest loss. None if the position
+    # is not in the tablebase or player has no moves
+    def best_move(self, board, player):
+        opponent = 'W' if player == 'B' else 'B'
+        board = [row[:] for row in board]
+        best = None
+
+        for move in movegen.legal_moves(board, player):
+            board[move[1]][move[0]] = ' '
+            board[move[3]][move[2]] = player
+            captured = func.resolve_captures(board, player, func.ALL_LINES, func.ALL_LINES)
+            entry = self.probe_squares(piece_squares(board, 'W'), piece_squares(board, 'B'), opponent)
+            for x, y in captured:
+                board[y][x] = opponent
+            board[move[3]][move[2]] = ' '
+            board[move[1]][move[0]] = player
+
+            if entry is None:
+                return None
+
+            # Our result is the opposite of the opponent's, one ply further away
+            result = WIN if entry[0] == LOSS else LOSS if entry[0] == WIN else DRAW
+            candidate = (move, result, entry[1] + 1 if result != DRAW else 0)
+            if best is None or move_preference(candidate) > move_preference(best):
+                best = candidate
+
+        return best
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+        self.tables.clear()
+
+
+# Orders the results of moves from worst to best: losses (slowest last), then draws, then wins (fastest last)
+def move_preference(candidate):
+    move, result, distance = candidate
+    if result == WIN:
+        return 2, -distance
+    elif result == DRAW:
+        return 1, 0
+    return 0, distance
+
+
+# Returns the Tablebase for directory, opening it the first time
+def open_tablebase(directory=TABLEBASE_DIRECTORY):
+    if directory not in open_tablebases:
+        open_tablebases[directory] = Tablebase(directory)
+    return open_tablebases[directory]
+
+
+# Returns the Tablebase in the tablebases folder next to this file, or None if it has not been built
+def default_tablebase():
+    if not os.path.isdir(TABLEBASE_DIRECTORY):
+        return None
+    return open_tablebase(TABLEBASE_DIRECTORY)
+
+
+# Runs in a worker process. Looks at every move of the positions from start to
+# stop in a material's table and saves what it found in the work folder: how many
+# moves do not capture, the fastest win a capture leads to and the slowest loss
+# the captures lead to (or BLOCKED if one leads to a draw)
+def analyse_positions(directory, white, black, start, stop):
+    tablebase = Tablebase(directory)
+    quiet_moves = array.array('B', bytes(stop - start))
+    capture_wins = array.array('B', bytes(stop - start))
+    capture_losses = array.array('B', bytes(stop - start))
+
+    for index in range(start, stop, 1):
+        white_squares, black_squares, player = position_at(index, white, black)
+        opponent = 'W' if player == 'B' else 'B'
+        board = build_board(white_squares, black_squares)
+        quiet = 0
+        fastest_win = 0
+        slowest_loss = 0
+
+        for move in movegen.legal_moves(board, player):
+            board[move[1]][move[0]] = ' '
+            board[move[3]][move[2]] = player
+            captured = func.resolve_captures(board, player, func.ALL_LINES, func.ALL_LINES)
+
+            if not captured:
+                quiet += 1
+            else:
+                result, distance = tablebase.probe_squares(piece_squares(board, 'W'), piece_squares(board, 'B'),
+                                                           opponent)
+                if result == LOSS:
+                    if fastest_win == 0 or distance + 1 < fastest_win:
+                        fastest_win = distance + 1
+                elif result == DRAW:
+                    slowest_loss = BLOCKED
+                elif slowest_loss != BLOCKED and distance + 1 > slowest_loss:
+                    slowest_loss = distance + 1
+
+                for x, y in captured:
+                    board[y][x] = opponent
+
+            board[move[3]][move[2]] = ' '
+            board[move[1]][move[0]] = player
+
+        quiet_moves[index - start] = quiet
+        capture_wins[index - start] = fastest_win
+        capture_losses[index - start] = slowest_loss
+
+    tablebase.close()
+    path = os.path.join(work_directory(directory, white, black), '{0}.part'.format(start))
+    with open(path + '.tmp', 'wb') as part_file:
+        part_file.write(quiet_moves.tobytes() + capture_wins.tobytes() + capture_losses.tobytes())
+    os.replace(path + '.tmp', path)
+    return start
+
+
+# Runs in a worker process. Returns, for each position, the positions one move
+# before it that do not capture anything. Such a move was made by the side not
+# to move, and only if that side has nothing to capture, since every capture is
+# taken as soon as a move is made
+def quiet_predecessors(white, black, indices):
+    predecessors = []
+
+    for index in indices:
+        white_squares, black_squares, player = position_at(index, white, black)
+        mover = 'W' if player == 'B' else 'B'
+        board = build_board(white_squares, black_squares)
+        parents = []
+
+        if not func.resolve_captures([row[:] for row in board], mover, func.ALL_LINES, func.ALL_LINES):
+            mover_squares = white_squares if mover == 'W' else black_squares
+            for piece, square in enumerate(mover_squares):
+                # Moves slide, so the piece could have come from anywhere it can slide to now
+                for move in movegen.generate_piece_moves(board, square & 7, square >> 3):
+                    moved = mover_squares[:]
+                    moved[piece] = move[3] * 8 + move[2]
+                    if mover == 'W':
+                        parents.append(position_index(moved, black_squares, mover))
+                    else:
+                        parents.append(position_index(white_squares, moved, mover))
+
+        predecessors.append(parents)
+
+    return predecessors
+
+
+def work_directory(directory, white, black):
+    return os.path.join(directory, material_name(white, black) + '.work')
+
+
+# Solves one material and writes its table. Uses the saved results of the first
+# step from an interrupted run, if there are any
+def solve_material(directory, white, black, pool, progress=None):
+    size = 2 * side_size(white, black)
+    work = work_directory(directory, white, black)
+    os.makedirs(work, exist_ok=True)
+
+    # First step: look at the moves of every position
+    done = set(int(name[:-5]) for name in os.listdir(work) if name.endswith('.part'))
+    starts = [start for start in range(0, size, TASK_SIZE) if start not in done]
+    futures = [pool.submit(analyse_positions, directory, white, black, start, min(start + TASK_SIZE, size))
+               for start in starts]
+    for finished, future in enumerate(concurrent.futures.as_completed(futures), 1):
+        future.result()
+        if progress is not None:
+            progress(white, black, 'moves', len(done) + finished, (size + TASK_SIZE - 1) // TASK_SIZE)
+
+    quiet_moves = array.array('B')
+    capture_wins = array.array('B')
+    capture_losses = array.array('B')
+    for start in range(0, size, TASK_SIZE):
+        count = min(TASK_SIZE, size - start)
+        with open(os.path.join(work, '{0}.part'.format(start)), 'rb') as part_file:
+            data = part_file.read()
+        quiet_moves.frombytes(data[:count])
+        capture_wins.frombytes(data[count:2 * count])
+        capture_losses.frombytes(data[2 * count:])
+
+    # Second step: work backwards from the decided positions, one distance at a time.
+    # Positions are decided at a distance as soon as we know it, and pending holds
+    # the ones decided by a capture at a distance we have not reached yet
+    values = array.array('B', bytes(size))
+    decided = array.array('B', bytes(size))
+    pending = dict()
+    for index in range(0, size, 1):
+        if capture_wins[index]:
+            pending.setdefault(capture_wins[index], []).append((index, WIN))
+        elif quiet_moves[index] == 0 and capture_losses[index] != BLOCKED:
+            pending.setdefault(capture_losses[index], []).append((index, LOSS))
+
+    distance = 0
+    frontier = []
+    while frontier or pending:
+        for index, result in pending.pop(distance, []):
+            if not decided[index]:
+                decided[index] = 1
+                values[index] = encode(result, distance)
+                frontier.append(index)
+
+        next_frontier = []
+        chunks = [frontier[start:start + 4096] for start in range(0, len(frontier), 4096)]
+        for chunk, predecessors in zip(chunks, pool.map(quiet_predecessors, itertools.repeat(white),
+                                                         itertools.repeat(black), chunks)):
+            for index, parents in zip(chunk, predecessors):
+                lost = values[index] >= LOSS_OFFSET
+                for parent in parents:
+                    if decided[parent]:
+                        continue
+                    if lost:
+                        # The parent can move here and win
+                        decided[parent] = 1
+                        values[parent] = encode(WIN, distance + 1)
+                        next_frontier.append(parent)
+                    else:
+                        quiet_moves[parent] -= 1
+                        if quiet_moves[parent] == 0 and not capture_wins[parent] \
+                                and capture_losses[parent] != BLOCKED:
+                            # Every move loses, and this is the last of them to be decided
+                            loss_distance = max(distance + 1, capture_losses[parent])
+                            if loss_distance == distance + 1:
+                                decided[parent] = 1
+                                values[parent] = encode(LOSS, loss_distance)
+                                next_frontier.append(parent)
+                            else:
+                                pending.setdefault(loss_distance, []).append((parent, LOSS))
+
+        if progress is not None:
+            progress(white, black, 'distance', distance, len(frontier))
+        frontier = next_frontier
+        distance += 1
+
+    path = table_path(directory, white, black)
+    with open(path + '.tmp', 'wb') as table_file:
+        table_file.write(HEADER.pack(MAGIC, white, black))
+        table_file.write(values.tobytes())
+    os.replace(path + '.tmp', path)
+    shutil.rmtree(work)
+
+
+# Builds the tables of every material with up to max_pieces pieces per side in
+# directory, smallest first, skipping the ones that are already built
+def generate(directory=TABLEBASE_DIRECTORY, max_pieces=MAX_PIECES, workers=None, progress=None):
+    if max_pieces > MAX_PIECES:
+        raise ValueError('Tables can only be built for up to {0} pieces per side, not {1}'.format(
+            MAX_PIECES, max_pieces))
+    os.makedirs(directory, exist_ok=True)
+    materials = sorted(((white, black) for white in range(1, max_pieces + 1, 1)
+                        for black in range(1, max_pieces + 1, 1)), key=lambda material: sum(material))
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        for white, black in materials:
+            if not os.path.exists(table_path(directory, white, black)):
+                solve_material(directory, white, black, pool, progress)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Builds endgame tablebases by retrograde analysis')
+    parser.add_argument('--pieces', type=int, default=MAX_PIECES,
+                        help='most pieces per side to solve, at most {0} (default {0})'.format(MAX_PIECES))
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default one per CPU)')
+    parser.add_argument('--out', default=TABLEBASE_DIRECTORY,
+                        help='folder to write the tables to (default tablebases next to this file)')
+    args = parser.parse_args()
+    if args.pieces > MAX_PIECES:
+        parser.error('tables can only be built for up to {0} pieces per side'.format(MAX_PIECES))
+
+    def progress(white, black, step, done, total):
+        if step == 'moves':
+            print('\r{0}: looked at the moves of {1}/{2} parts'.format(material_name(white, black), done, total),
+                  end='', flush=True)
+        else:
+            print('\r{0}: {1} positions decided at distance {2}   '.format(material_name(white, black), total, done),
+                  end='', flush=True)
+
+    start = time.perf_counter()
+    generate(args.out, args.pieces, args.workers, progress)
+    print('\nFinished in {0:.1f} seconds'.format(time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
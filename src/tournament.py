@@ -0,0 +1,290 @@
+"""
+    tournament.py
+
+    Description:
+    Plays heuristics against each other without the GUI. Every pair of entrants
+    plays a round robin match, the games are spread over a pool of worker
+    processes, and the results are printed as win/draw/loss tables, Elo estimates
+    with 95% confidence intervals and how long each entrant took per move.
+
+    An entrant is a registered heuristic with optional search settings, written as
+    heuristic[:setting=value,...], where the settings are depth, time (seconds per
+    move), nodes, quiescence (captures to search past the bottom of the tree, see
+    minimax.get_next_move), book (1 to play from the heuristic's opening book, see
+    opening_book.py) and tablebase (1 to look endgames up in the tablebase, see
+    tablebase.py). For example:
+    > `python3 tournament.py defensive aggressive:depth=4 simple:time=0.5 --games 200`
+
+    Games follow the GUI's rules (see GameState.game_over and GameState.winner):
+    white moves first, a player with no pieces left or no legal move loses, and
+    after MAX_TURNS turns the player with more pieces wins, or the game is a draw
+    if they have the same number. Each game can start with a few random moves so
+    the same pairing does not replay the same game, and the colours are swapped so
+    both entrants play every opening from both sides
+"""
+
+import argparse
+import concurrent.futures
+import math
+import random
+import time
+import heurisitcs
+import minimax
+import opening_book
+import tablebase
+import transposition
+from game_state import GameState, MAX_TURNS
+from search_metrics import percentile
+
+WHITE_WIN = 'W'
+BLACK_WIN = 'B'
+DRAW = 'draw'
+
+# z value of a 95% confidence interval
+Z_95 = 1.96
+
+# The search settings an entrant can have, with the get_next_move argument they set and how to read them
+SETTINGS = dict([("depth", ("max_depth", int)),
+                 ("time", ("time_limit", float)),
+                 ("nodes", ("node_limit", int)),
+                 ("book", ("book", int)),
+                 ("tablebase", ("tablebase", int)),
+                 ("quiescence", ("quiescence", int))])
+
+
+# Reads an entrant written as heuristic[:setting=value,...]. Returns the heuristic
+# and a dict of get_next_move arguments
+def parse_entrant(entrant):
+    heuristic_method, _, settings = entrant.partition(':')
+    heurisitcs.get_heuristic(heuristic_method)
+
+    search_arguments = dict()
+    for setting in settings.split(',') if settings else []:
+        name, _, value = setting.partition('=')
+        if name not in SETTINGS:
+            raise ValueError('Unknown search setting {0!r} in {1!r}, expected one of {2}'.format(
+                name, entrant, ', '.join(SETTINGS)))
+        argument, convert = SETTINGS[name]
+        search_arguments[argument] = convert(value)
+
+    # The book and tablebase settings only say whether to use them
+    if search_arguments.pop("book", 0):
+        search_arguments["book"] = opening_book.default_book(heuristic_method)
+    if search_arguments.pop("tablebase", 0):
+        search_arguments["tablebase"] = tablebase.default_tablebase()
+
+    return heuristic_method, search_arguments
+
+
+# Plays one game and returns its result (WHITE_WIN, BLACK_WIN or DRAW), the
+# number of turns played and how long each side took for each of its moves in
+# milliseconds. The first opening_moves moves are random, picked with opening_seed
+def play_game(white, black, opening_moves=0, opening_seed=None, max_turns=MAX_TURNS):
+    entrants = dict([("W", parse_entrant(white)), ("B", parse_entrant(black))])
+    tables = dict([("W", transposition.TranspositionTable(minimax.WORKER_TABLE_SIZE)),
+                   ("B", transposition.TranspositionTable(minimax.WORKER_TABLE_SIZE))])
+    move_times = dict([("W", []), ("B", [])])
+    opening_random = random.Random(opening_seed)
+    state = GameState()
+
+    while not state.game_over(max_turns):
+        player = state.current_player
+        if state.turn_count <= opening_moves:
+            move = opening_random.choice(state.legal_moves())
+        else:
+            heuristic_method, search_arguments = entrants[player]
+            start = time.perf_counter()
+            move = minimax.get_next_move(state.board, player, heuristic_method, table=tables[player],
+                                         **search_arguments)
+            move_times[player].append((time.perf_counter() - start) * 1000)
+        state.make_move(move)
+
+    winner = state.winner()
+    if winner == 'W':
+        return WHITE_WIN, state.turn_count - 1, move_times
+    if winner == 'B':
+        return BLACK_WIN, state.turn_count - 1, move_times
+    return DRAW, state.turn_count - 1, move_times
+
+
+# Lists every game of a round robin between entrants as (white, black, opening
+# seed). Each pairing plays games games, in pairs with the colours swapped if swap is set
+def schedule(entrants, games, swap, seed):
+    seeds = random.Random(seed)
+    scheduled = []
+
+    for i in range(0, len(entrants), 1):
+        for j in range(i + 1, len(entrants), 1):
+            game = 0
+            while game < games:
+                opening_seed = seeds.getrandbits(32)
+                scheduled.append((entrants[i], entrants[j], opening_seed))
+                game += 1
+                if swap and game < games:
+                    scheduled.append((entrants[j], entrants[i], opening_seed))
+                    game += 1
+
+    return scheduled
+
+
+class Record:
+    """Wins, draws and losses of one entrant against another (or against everyone)"""
+
+    __slots__ = ('wins', 'draws', 'losses')
+
+    def __init__(self):
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    # Fraction of the available points scored, counting a draw as half a win
+    def score(self):
+        return (self.wins + 0.5 * self.draws) / self.games()
+
+    # Elo difference implied by the score and its 95% confidence interval, as (low, estimate, high)
+    def elo(self):
+        games = self.games()
+        score = self.score()
+        variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2 + self.losses * score ** 2) / games
+        margin = Z_95 * math.sqrt(variance / games)
+        return elo_difference(score - margin), elo_difference(score), elo_difference(score + margin)
+
+
+# The Elo difference that gives an expected score of score. Scores of 0 and 1 are clamped to +-inf
+def elo_difference(score):
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1) + 0.0  # Adding 0.0 turns -0.0 into 0.0
+
+
+# Plays every scheduled game across workers processes and returns the pairwise
+# records, each entrant's overall record, each entrant's move times and the number of turns of each game
+def run(entrants, games, swap=True, opening_moves=4, workers=None, seed=5368, max_turns=MAX_TURNS, progress=None):
+    scheduled = schedule(entrants, games, swap, seed)
+    records = dict(((a, b), Record()) for a in entrants for b in entrants if a != b)
+    totals = dict((entrant, Record()) for entrant in entrants)
+    move_times = dict((entrant, []) for entrant in entrants)
+    game_lengths = []
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = dict((pool.submit(play_game, white, black, opening_moves, opening_seed, max_turns), (white, black))
+                       for white, black, opening_seed in scheduled)
+
+        for finished, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            white, black = futures[future]
+            result, turns, times = future.result()
+            game_lengths.append(turns)
+            move_times[white].extend(times['W'])
+            move_times[black].extend(times['B'])
+
+            for entrant, opponent, won in ((white, black, result == WHITE_WIN), (black, white, result == BLACK_WIN)):
+                for record in (records[(entrant, opponent)], totals[entrant]):
+                    if result == DRAW:
+                        record.draws += 1
+                    elif won:
+                        record.wins += 1
+                    else:
+                        record.losses += 1
+
+            if progress is not None:
+                progress(finished, len(scheduled))
+
+    return records, totals, move_times, game_lengths
+
+
+# Formats an Elo estimate and its interval
+def format_elo(elo):
+    low, estimate, high = elo
+    return '{0:+7.0f} [{1:+.0f}, {2:+.0f}]'.format(estimate, low, high)
+
+
+def print_report(entrants, records, totals, move_times, game_lengths, max_turns=MAX_TURNS):
+    width = max(len(entrant) for entrant in entrants) + 2
+
+    print('\nWins/draws/losses of each row against each column')
+    print(''.ljust(width) + ''.join(entrant.rjust(width + 4) for entrant in entrants))
+    for entrant in entrants:
+        cells = []
+        for opponent in entrants:
+            if opponent == entrant:
+                cells.append('-'.rjust(width + 4))
+            else:
+                record = records[(entrant, opponent)]
+                cells.append('{0}/{1}/{2}'.format(record.wins, record.draws, record.losses).rjust(width + 4))
+        print(entrant.ljust(width) + ''.join(cells))
+
+    print('\nElo difference of each row against each column (95% confidence interval)')
+    for entrant in entrants:
+        for opponent in entrants:
+            if opponent != entrant and records[(entrant, opponent)].games():
+                print('{0} vs {1}: {2}'.format(entrant.ljust(width), opponent.ljust(width),
+                                               format_elo(records[(entrant, opponent)].elo())))
+
+    print('\nOverall')
+    print('{0}{1:>8} {2:>6} {3:>6} {4:>6} {5:>7}  {6}'.format('entrant'.ljust(width), 'games', 'wins', 'draws',
+                                                               'losses', 'score', 'Elo against the field'))
+    for entrant in sorted(entrants, key=lambda e: totals[e].score() if totals[e].games() else 0, reverse=True):
+        total = totals[entrant]
+        if total.games():
+            print('{0}{1:>8} {2:>6} {3:>6} {4:>6} {5:>7.3f}  {6}'.format(
+                entrant.ljust(width), total.games(), total.wins, total.draws, total.losses, total.score(),
+                format_elo(total.elo())))
+
+    print('\nMilliseconds per move')
+    print('{0}{1:>8} {2:>9} {3:>9} {4:>9} {5:>9} {6:>9}'.format('entrant'.ljust(width), 'moves', 'p50', 'p90',
+                                                                 'p95', 'p99', 'max'))
+    for entrant in entrants:
+        times = sorted(move_times[entrant])
+        print('{0}{1:>8} {2:>9.1f} {3:>9.1f} {4:>9.1f} {5:>9.1f} {6:>9.1f}'.format(
+            entrant.ljust(width), len(times), percentile(times, 50), percentile(times, 90), percentile(times, 95),
+            percentile(times, 99), times[-1] if times else math.nan))
+
+    if game_lengths:
+        print('\nGames: {0}, average length {1:.1f} turns, {2} reached the turn limit'.format(
+            len(game_lengths), sum(game_lengths) / len(game_lengths),
+            sum(1 for turns in game_lengths if turns >= max_turns)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays a round robin tournament between heuristics')
+    parser.add_argument('entrants', nargs='+',
+                        help='heuristic[:setting=value,...] with settings depth, time, nodes, quiescence, book and '
+                             'tablebase')
+    parser.add_argument('--games', type=int, default=20, help='games per pairing (default 20)')
+    parser.add_argument('--openings', type=int, default=4,
+                        help='random moves at the start of each game (default 4)')
+    parser.add_argument('--no-swap', action='store_true', help='do not replay each opening with the colours swapped')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default one per CPU)')
+    parser.add_argument('--seed', type=int, default=5368, help='seed for the openings (default 5368)')
+    parser.add_argument('--max-turns', type=int, default=MAX_TURNS,
+                        help='turns before the player with more pieces wins (default {0})'.format(MAX_TURNS))
+    args = parser.parse_args()
+
+    if len(set(args.entrants)) < 2:
+        parser.error('at least two different entrants are needed')
+    for entrant in args.entrants:
+        try:
+            parse_entrant(entrant)
+        except ValueError as error:
+            parser.error(str(error))
+
+    # Keep the order they were given in, without repeats
+    entrants = list(dict.fromkeys(args.entrants))
+
+    def progress(finished, total):
+        print('\rPlayed {0}/{1} games'.format(finished, total), end='', flush=True)
+
+    start = time.perf_counter()
+    records, totals, move_times, game_lengths = run(entrants, args.games, not args.no_swap, args.openings,
+                                                    args.workers, args.seed, args.max_turns, progress)
+    print('\nFinished in {0:.1f} seconds'.format(time.perf_counter() - start))
+    print_report(entrants, records, totals, move_times, game_lengths, args.max_turns)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+    transposition.py
+
+    Description:
+    A fixed size transposition table for the minimax. Each entry stores the
+    remaining search depth, the score, whether that score is exact or only a
+    bound, and the best move found for a position, keyed by its Zobrist key
+    (see zobrist.py). The table is indexed by the low bits of the key, so when two
+    positions land in the same slot a replacement policy decides which one is kept
+"""
+
+# Bound types
+EXACT = 0
+LOWER_BOUND = 1  # The real score is at least the stored score (we failed high)
+UPPER_BOUND = 2  # The real score is at most the stored score (we failed low)
+
+# Replacement policies
+DEPTH_PREFERRED = 'depth'  # Keep the deeper entry, unless the stored one is from an older search
+ALWAYS_REPLACE = 'always'  # Always keep the newest entry
+
+DEFAULT_SIZE = 1 << 18
+
+# Positions of each value within an entry
+KEY = 0
+DEPTH = 1
+SCORE = 2
+FLAG = 3
+MOVE = 4
+GENERATION = 5
+
+
+class TranspositionTable:
+    """Stores previously searched positions by Zobrist key"""
+
+    __slots__ = ('size', 'mask', 'policy', 'entries', 'generation', 'probes', 'hits', 'stores', 'overwrites')
+
+    # size is rounded down to a power of two so the slot can be found with a mask
+    def __init__(self, size=DEFAULT_SIZE, policy=DEPTH_PREFERRED):
+        if size < 1:
+            raise ValueError('Transposition table size must be at least 1, got {0}'.format(size))
+        if policy not in (DEPTH_PREFERRED, ALWAYS_REPLACE):
+            raise ValueError('Unknown replacement policy {0!r}'.format(policy))
+
+        self.size = 1 << (size.bit_length() - 1)
+        self.mask = self.size - 1
+        self.policy = policy
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    # Removes every entry
+    def clear(self):
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.reset_counters()
+
+    # Marks the start of a new search. Entries from older searches are still used,
+    # but are the first to be replaced
+    def new_search(self):
+        self.generation += 1
+
+    # Returns the entry stored for key, or None if there is not one
+    def probe(self, key):
+        self.probes += 1
+        entry = self.entries[key & self.mask]
+
+        if entry is not None and entry[KEY] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    # Stores the result of searching a position
+    def store(self, key, depth, score, flag, move):
+        index = key & self.mask
+        entry = self.entries[index]
+
+        if entry is not None:
+            if self.policy == DEPTH_PREFERRED and entry[KEY] != key and entry[GENERATION] == self.generation \
+                    and entry[DEPTH] > depth:
+                # The stored entry took more work to find, so keep it
+                return
+            if entry[KEY] != key:
+                self.overwrites += 1
+
+        self.stores += 1
+        self.entries[index] = (key, depth, score, flag, move, self.generation)
+
+    # Fraction of probes that found an entry
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    # Fraction of slots in use
+    def fill_rate(self):
+        return sum(1 for entry in self.entries if entry is not None) / self.size
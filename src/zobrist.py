@@ -0,0 +1,54 @@
+"""
+    zobrist.py
+
+    Description:
+    Zobrist hashing for Squeeze-It positions. Every (player, square) pair gets a
+    random 64-bit key and a position's key is the xor of the keys of every piece on
+    the board, so moving or capturing a piece only takes an xor or two to update.
+    The keys come from a fixed seed, so they are the same in every process.
+
+    A search whose scores mean something different (see settings_key) mixes one
+    more key into every position's key, so it never shares transposition table
+    entries with searches made with other settings
+"""
+
+import random
+
+SEED = 5368
+
+_random = random.Random(SEED)
+
+# PIECE_KEYS[player][y * 8 + x]
+PIECE_KEYS = {
+    'W': [_random.getrandbits(64) for _ in range(64)],
+    'B': [_random.getrandbits(64) for _ in range(64)]
+}
+
+# Mixed into the key when black is the side to move
+BLACK_TO_MOVE = _random.getrandbits(64)
+
+
+# Computes the key of a board from scratch
+def hash_board(board):
+    key = 0
+
+    for y in range(0, 8, 1):
+        for x in range(0, 8, 1):
+            if board[y][x] != ' ':
+                key ^= PIECE_KEYS[board[y][x]][y * 8 + x]
+
+    return key
+
+
+# Adds the side to move to a board key
+def with_side_to_move(key, player):
+    return key ^ BLACK_TO_MOVE if player == 'B' else key
+
+
+# Key mixed into every position's key by a search that extends its leaves by up
+# to quiescence captures and scores endgames from a tablebase (if tablebase is
+# set), as the scores it finds differ from a plain search's. 0 for a plain search
+def settings_key(quiescence, tablebase):
+    if not quiescence and not tablebase:
+        return 0
+    return random.Random('{0}:{1}:{2}'.format(SEED, quiescence, int(bool(tablebase)))).getrandbits(64)
@@ -0,0 +1,170 @@
+"""
+    test_captures.py
+
+    Description:
+    Differential test of the capture resolution. Plays seeded random games and
+    checks that func.make_move (with and without the previous move), the
+    BitBoard and Position.make all give the same board after every move as a
+    scan of all 64 squares for intervention and custodian captures, which is
+    kept here as the reference.
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import bitboard  # noqa: E402
+import func  # noqa: E402
+import movegen  # noqa: E402
+from game_state import GameState  # noqa: E402
+from position import Position  # noqa: E402
+
+GAMES = 200
+
+# Longest a game is played for
+MAX_PLIES = 120
+
+
+# Makes a move by scanning every square of the board for captures, the way
+# make_move did before captures were resolved only on the lines that changed
+def reference_make_move(board, player, move):
+    new_board = [row[:] for row in board]
+    opponent = 'W' if player == 'B' else 'B'
+
+    new_board[move[1]][move[0]] = ' '
+    new_board[move[3]][move[2]] = player
+
+    # Resolve any intervention captures
+    for x in range(0, 8, 1):
+        for y in range(0, 8, 1):
+            if new_board[y][x] == opponent:
+                # Check down
+                for down_space in range(y + 2, 8, 1):
+                    if new_board[down_space][x] == opponent and \
+                            all(new_board[inter][x] == player for inter in range(y + 1, down_space, 1)):
+                        new_board[y][x] = ' '
+                        new_board[down_space][x] = ' '
+
+                # Check right
+                for right_space in range(x + 2, 8, 1):
+                    if new_board[y][right_space] == opponent and \
+                            all(new_board[y][inter] == player for inter in range(x + 1, right_space, 1)):
+                        new_board[y][x] = ' '
+                        new_board[y][right_space] = ' '
+
+    # Resolve any custodian captures
+    for x in range(0, 8, 1):
+        for y in range(0, 8, 1):
+            if new_board[y][x] == player:
+                # Check down
+                for down_space in range(y + 1, 8, 1):
+                    if new_board[down_space][x] == player and \
+                            all(new_board[inter][x] == opponent for inter in range(y + 1, down_space, 1)):
+                        for inter in range(y + 1, down_space, 1):
+                            new_board[inter][x] = ' '
+
+                # Check right
+                for right_space in range(x + 1, 8, 1):
+                    if new_board[y][right_space] == player and \
+                            all(new_board[y][inter] == opponent for inter in range(x + 1, right_space, 1)):
+                        for inter in range(x + 1, right_space, 1):
+                            new_board[y][inter] = ' '
+
+    return new_board
+
+
+# Squares that hold a piece on before and not on after
+def removed_squares(before, after):
+    return sorted((x, y) for x in range(0, 8, 1) for y in range(0, 8, 1)
+                  if before[y][x] != ' ' and after[y][x] == ' ')
+
+
+def test_captures_match_full_scan():
+    moves_checked = 0
+    captures_seen = 0
+
+    for game in range(0, GAMES, 1):
+        game_random = random.Random(game)
+        board = GameState().board
+        position = Position(board)
+        player = 'W'
+        previous_move = None
+
+        for ply in range(0, MAX_PLIES, 1):
+            moves = movegen.legal_moves(board, player)
+            if not moves:
+                break
+            move = game_random.choice(moves)
+
+            expected = reference_make_move(board, player, move)
+            label = 'game {0} ply {1} move {2}'.format(game, ply, move)
+
+            assert func.make_move(board, player, move) == expected, label
+            assert func.make_move(board, player, move, previous_move) == expected, label
+            assert bitboard.to_grid(bitboard.make_move(bitboard.from_grid(board), player, move)) == expected, label
+
+            captured = position.make(player, move)
+            assert position.board == expected, label
+
+            # The captured squares are the ones emptied, other than the square moved from
+            emptied = [square for square in removed_squares(board, expected) if square != (move[0], move[1])]
+            assert sorted(captured) == emptied, label
+
+            moves_checked += 1
+            captures_seen += len(captured)
+            board = expected
+            previous_move = move
+            player = 'B' if player == 'W' else 'W'
+
+            if min(sum(row.count('W') for row in board), sum(row.count('B') for row in board)) == 0:
+                break
+
+        # Taking every move back gives the start position again
+        while position.undo_stack:
+            position.unmake()
+        assert position.board == GameState().board
+        assert position.key == Position(GameState().board).key
+
+    # Make sure the games actually exercised the captures
+    assert moves_checked > GAMES * 10
+    assert captures_seen > GAMES
+
+
+# Builds a board from rows of 'W', 'B' and ' '
+def board_from_rows(rows):
+    return [list(row) for row in rows]
+
+
+# Black moves into a capture, which white takes on its next move even though that move is on other lines
+def test_captures_on_previous_landing_lines():
+    empty_row = '        '
+
+    # Custodian: black lands between two white pieces on row 3
+    board = board_from_rows([empty_row, empty_row, empty_row, 'WBW     ', empty_row, empty_row, empty_row,
+                             '       W'])
+    previous_move = (1, 5, 1, 3)
+    move = (7, 7, 6, 7)
+    expected = reference_make_move(board, 'W', move)
+    assert expected[3][1] == ' '
+    assert func.make_move(board, 'W', move, previous_move) == expected
+    captured = Position(board, previous_move).make('W', move)
+    assert sorted(captured) == [(1, 3)]
+
+    # Only looking at the lines of white's own move misses it
+    after_move = [row[:] for row in board]
+    after_move[7][7] = ' '
+    after_move[7][6] = 'W'
+    assert func.resolve_captures(after_move, 'W', {move[2]}, {move[3]}) == []
+
+    # Intervention: black lands at the end of column 2, trapping a white piece between two black ones
+    board = board_from_rows([empty_row, '  B     ', '  W     ', '  B     ', empty_row, empty_row, empty_row,
+                             'W       '])
+    previous_move = (5, 3, 2, 3)
+    move = (0, 7, 0, 6)
+    expected = reference_make_move(board, 'W', move)
+    assert expected[1][2] == ' ' and expected[3][2] == ' '
+    assert func.make_move(board, 'W', move, previous_move) == expected
+    captured = Position(board, previous_move).make('W', move)
+    assert sorted(captured) == [(2, 1), (2, 3)]